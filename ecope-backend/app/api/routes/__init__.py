@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.routes import auth, complaints, users, chatbot, eda
+from app.api.routes import auth, complaints, users, chatbot, eda, model
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
@@ -8,3 +8,4 @@ api_router.include_router(complaints.router, prefix="/complaints", tags=["compla
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(chatbot.router, prefix="/chatbot", tags=["chatbot"])
 api_router.include_router(eda.router, prefix="/eda", tags=["data-analysis"])
+api_router.include_router(model.router, prefix="/model", tags=["model"])
@@ -1,13 +1,19 @@
+import json
+import time
 from typing import Any, Optional, List
 
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.db.database import get_db
+from app.db.database import SessionLocal, get_db
 from app.api.dependencies.auth import get_current_user, get_current_staff_user
+from app.services.classification_service import FAILED, UNCLASSIFIED, ClassificationService
 from app.services.complaint_service import ComplaintService
 from app.services.ocr_service import OCRService
-from app.models.domain.user import UserRole
+from app.core.config import settings
+from app.models.domain.user import User, UserRole
 from app.models.domain.complaint import Complaint
 from app.models.schemas.complaint import (
     ComplaintCreate,
@@ -16,7 +22,7 @@ from app.models.schemas.complaint import (
     ComplaintPrediction,
     PaginatedComplaintsResponse
 )
-from app.ml.model import get_model_predictor
+from app.ml.executor import predict_async, predict_batch_async
 
 router = APIRouter()
 
@@ -65,25 +71,21 @@ async def read_complaints(
     status: Optional[str] = None,
     search: Optional[str] = None,
     assigned_to: Optional[str] = None,
+    include_total: bool = True,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ) -> Any:
-    complaints = await ComplaintService.get_complaints(
+    """
+    List complaints newest first. The page and the total matching the filters come
+    from one query; with include_total=false the total is skipped (returned as null)
+    and has_more tells whether another page follows, for infinite scrolling.
+    """
+    complaints, total, has_more = await ComplaintService.get_complaints_page(
         db,
         current_user=current_user,
         skip=skip, 
         limit=limit,
-        category=category,
-        urgency=urgency,
-        status=status,
-        search=search,
-        assigned_to=assigned_to
-    )
-    
-    # Get total count with same filters
-    total = await ComplaintService.get_complaints_count(
-        db,
-        current_user=current_user,
+        include_total=include_total,
         category=category,
         urgency=urgency,
         status=status,
@@ -95,7 +97,8 @@ async def read_complaints(
         items=complaints,
         total=total,
         page=skip // limit + 1,
-        size=limit
+        size=limit,
+        has_more=has_more
     )
 
 
@@ -115,6 +118,89 @@ async def read_complaint(
     return complaint
 
 
+@router.get("/{complaint_id}/classification", response_model=dict)
+async def read_complaint_classification(
+    complaint_id: int,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+) -> Any:
+    """
+    Poll the background classification of a complaint; category, urgency and
+    assigned_to are filled in once classification_status is "completed".
+    """
+    complaint = await ComplaintService.get_complaint(db, complaint_id=complaint_id)
+    if complaint is None:
+        raise HTTPException(status_code=404, detail="Complaint not found")
+    check_complaint_access(complaint, current_user, "read")
+    return {
+        "id": complaint.id,
+        "classification_status": complaint.classification_status,
+        "category": complaint.category,
+        "urgency": complaint.urgency,
+        "assigned_to": complaint.assigned_to
+    }
+
+
+def _event(name: str, data: str) -> str:
+    return f"event: {name}\ndata: {data}\n\n"
+
+
+@router.get("/{complaint_id}/events")
+async def stream_complaint_classification(
+    complaint_id: int,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+) -> Any:
+    """
+    Server-sent events stream that sends a "classified" event with the complaint once
+    its background classification completes, a "failed" event if the workers gave up
+    on it, or a "timeout" event after CLASSIFICATION_EVENTS_TIMEOUT_SECONDS.
+    """
+    complaint = await ComplaintService.get_complaint(db, complaint_id=complaint_id)
+    if complaint is None:
+        raise HTTPException(status_code=404, detail="Complaint not found")
+    check_complaint_access(complaint, current_user, "read")
+
+    def read_event(stream_db):
+        """The event for the complaint's current state, or None while it is unclassified"""
+        complaint = stream_db.get(Complaint, complaint_id, populate_existing=True)
+        if complaint is None:
+            return _event("deleted", json.dumps({"id": complaint_id}))
+        if complaint.classification_status not in UNCLASSIFIED:
+            name = "failed" if complaint.classification_status == FAILED else "classified"
+            return _event(name, ComplaintResponse.model_validate(complaint).model_dump_json())
+        stream_db.rollback()
+        return None
+
+    async def events():
+        # The request session is closed once the response starts, so the stream uses its own.
+        # Its calls block, so they run in the threadpool instead of on the event loop
+        stream_db = SessionLocal()
+        deadline = time.monotonic() + settings.CLASSIFICATION_EVENTS_TIMEOUT_SECONDS
+        try:
+            while True:
+                event = await run_in_threadpool(read_event, stream_db)
+                if event is not None:
+                    yield event
+                    return
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    yield _event("timeout", json.dumps({"id": complaint_id}))
+                    return
+                # Woken by a worker of this process; workers elsewhere are picked up by the next read
+                await ClassificationService.wait_for(
+                    complaint_id, min(remaining, settings.CLASSIFICATION_POLL_SECONDS)
+                )
+        finally:
+            await run_in_threadpool(stream_db.close)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.put("/{complaint_id}", response_model=ComplaintResponse)
 async def update_complaint(
     complaint_id: int,
@@ -131,7 +217,8 @@ async def update_complaint(
     check_complaint_access(existing_complaint, current_user, "update")
     
     complaint = await ComplaintService.update_complaint(
-        db=db, complaint_id=complaint_id, complaint_update=complaint_update
+        db=db, complaint_id=complaint_id, complaint_update=complaint_update,
+        corrected_by=current_user.email
     )
     return complaint
 
@@ -160,11 +247,28 @@ async def classify_complaint_text(
     complaint: ComplaintCreate,
     current_user = Depends(get_current_user)
 ) -> Any:
-    model_predictor = get_model_predictor()
-    prediction = model_predictor.predict(complaint.complaint_text)
+    prediction = await predict_async(complaint.complaint_text)
     return prediction
 
 
+@router.post("/classify/batch", response_model=List[ComplaintPrediction])
+async def classify_complaint_batch(
+    complaints: List[ComplaintCreate],
+    current_user = Depends(get_current_user)
+) -> Any:
+    """
+    Classify many complaint texts in one request without creating them.
+    Predictions are returned in the same order as the submitted complaints.
+    """
+    if len(complaints) > settings.CLASSIFY_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.CLASSIFY_BATCH_MAX_ITEMS} complaints can be classified per request"
+        )
+
+    return await predict_batch_async([complaint.complaint_text for complaint in complaints])
+
+
 @router.post("/ocr", response_model=dict)
 async def perform_ocr(
     files: List[UploadFile] = File(...),
@@ -246,8 +350,7 @@ async def classify_complaint_with_files(
             )
         
         # Classify the combined text
-        model_predictor = get_model_predictor()
-        prediction = model_predictor.predict(final_text)
+        prediction = await predict_async(final_text)
         
         return prediction
         
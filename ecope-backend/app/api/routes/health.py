@@ -0,0 +1,29 @@
+from typing import Any, Dict
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+
+from app.db.database import get_db
+from app.services.health_service import HealthService
+
+router = APIRouter()
+
+
+@router.get("/live")
+def liveness() -> Dict[str, Any]:
+    """
+    Liveness probe: the process is up and serving HTTP.
+    """
+    return {"status": "alive"}
+
+
+@router.get("/ready")
+def readiness(db: Session = Depends(get_db)) -> Any:
+    """
+    Readiness probe: returns 200 once the model is loaded and warmed up and the
+    database is reachable, 503 otherwise, so load balancers only route to warm workers.
+    A worker serving fallback predictions (degraded) or loading the model on first
+    use (MODEL_LOAD_AT_STARTUP=false) is reported as ready.
+    """
+    report = HealthService.readiness(db)
+    return JSONResponse(status_code=200 if report["ready"] else 503, content=report)
@@ -0,0 +1,205 @@
+from pathlib import Path
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.api.dependencies.auth import get_current_admin_user
+from app.core.config import settings
+from app.db.database import get_db
+from app.ml.executor import get_inference_executor
+from app.ml.predictor import get_model_predictor
+from app.services.classification_service import ClassificationService
+from app.services.intake_buffer import get_intake_buffer
+from app.services.model_registry_service import ModelRegistryService
+from app.services.reclassification_service import ReclassificationService
+
+router = APIRouter()
+
+
+@router.get("/stats")
+async def get_model_stats(
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_admin_user)
+) -> Dict[str, Any]:
+    """
+    Get runtime statistics of the complaint classifier, such as the
+    micro-batching queue depth and batch size histograms, cache hit rates and
+    executor queue-wait versus compute latencies, and the background
+    classification backlog and intake buffer flushes when those are enabled.
+    """
+    predictor = get_model_predictor()
+    stats = {
+        "predictor": type(predictor).__name__,
+        **predictor.stats(),
+        "executor": get_inference_executor().stats()
+    }
+    if settings.ASYNC_CLASSIFICATION_ENABLED:
+        stats["classification"] = ClassificationService.stats(db)
+    if settings.INTAKE_BUFFER_ENABLED:
+        stats["intake"] = get_intake_buffer().stats()
+    return stats
+
+
+@router.post("/reclassify", status_code=status.HTTP_202_ACCEPTED)
+async def start_reclassification(
+    batch_size: Optional[int] = Query(None, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_admin_user)
+) -> Dict[str, Any]:
+    """
+    Relabel every complaint that was not classified by the current model version.
+    The job runs in the background and resumes from its last checkpoint if it was
+    interrupted; poll GET /model/reclassify for progress.
+    """
+    if get_model_predictor().model_version == "dummy":
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="The model is not loaded"
+        )
+    if not ReclassificationService.start_background(batch_size):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A reclassification job is already running"
+        )
+    return ReclassificationService.status(db)
+
+
+@router.get("/reclassify")
+async def get_reclassification_status(
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_admin_user)
+) -> Dict[str, Any]:
+    """Get the progress of the latest reclassification job."""
+    return ReclassificationService.status(db)
+
+
+@router.post("/heads")
+async def swap_model_heads(
+    checkpoint: str = Body(..., embed=True),
+    current_user = Depends(get_current_admin_user)
+) -> Dict[str, Any]:
+    """
+    Hot-swap the classification heads of the running model with those of a checkpoint
+    in MODEL_CHECKPOINT_DIR written by scripts/retrain_heads.py. The swap only reaches
+    the worker process handling the call, so it is refused when WEB_CONCURRENCY runs
+    several workers; register and activate the checkpoint through /model/registry instead.
+    """
+    if settings.WEB_CONCURRENCY > 1:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Head swapping only reaches one of several workers; activate the checkpoint through the model registry"
+        )
+    checkpoint_dir = Path(settings.MODEL_CHECKPOINT_DIR).resolve()
+    checkpoint_path = (checkpoint_dir / checkpoint).resolve()
+    if checkpoint_path.parent != checkpoint_dir or not checkpoint_path.exists():
+        raise HTTPException(status_code=404, detail="Checkpoint not found")
+
+    predictor = get_model_predictor()
+    if getattr(predictor, "engine", None) != "torch":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Head swapping needs a locally loaded torch model"
+        )
+    try:
+        predictor.swap_heads(checkpoint_path)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"predictor": type(predictor).__name__, **predictor.stats()}
+
+
+def _require_local_model() -> None:
+    if settings.MODEL_SERVER_SOCKET:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Model versions are managed by the model server process"
+        )
+
+
+@router.get("/registry")
+async def get_model_registry(
+    current_user = Depends(get_current_admin_user)
+) -> Dict[str, Any]:
+    """
+    List the registered model versions, the version served by this worker, its
+    shadow version and the state of the latest background load.
+    """
+    return {**ModelRegistryService.versions(), "job": ModelRegistryService.status()}
+
+
+@router.post("/registry", status_code=status.HTTP_201_CREATED)
+async def register_model_version(
+    checkpoint: str = Body(...),
+    engine: str = Body("torch"),
+    note: Optional[str] = Body(None),
+    current_user = Depends(get_current_admin_user)
+) -> Dict[str, Any]:
+    """Register a checkpoint in MODEL_CHECKPOINT_DIR as a model version."""
+    checkpoint_dir = Path(settings.MODEL_CHECKPOINT_DIR).resolve()
+    checkpoint_path = (checkpoint_dir / checkpoint).resolve()
+    if checkpoint_path.parent != checkpoint_dir or not checkpoint_path.exists():
+        raise HTTPException(status_code=404, detail="Checkpoint not found")
+    try:
+        return ModelRegistryService.register(str(checkpoint_path), engine, note)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.post("/registry/{version}/activate", status_code=status.HTTP_202_ACCEPTED)
+async def activate_model_version(
+    version: str,
+    current_user = Depends(get_current_admin_user)
+) -> Dict[str, Any]:
+    """
+    Load a registered version in the background, warm it up and swap it in. Requests
+    already running finish on the previous version. The registry records the version,
+    and the other worker processes load it within MODEL_REGISTRY_POLL_SECONDS.
+    """
+    _require_local_model()
+    try:
+        started = ModelRegistryService.start_activation(version)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Model version not found")
+    if not started:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A model version is already being loaded"
+        )
+    return ModelRegistryService.status()
+
+
+@router.post("/registry/{version}/shadow", status_code=status.HTTP_202_ACCEPTED)
+async def shadow_model_version(
+    version: str,
+    fraction: Optional[float] = Body(None, embed=True, ge=0.0, le=1.0),
+    current_user = Depends(get_current_admin_user)
+) -> Dict[str, Any]:
+    """
+    Load a registered version in the background and also score a fraction of this
+    worker's requests on it (MODEL_SHADOW_FRACTION by default). Agreement and
+    latency against the served version are reported under "shadow" in GET /model/stats.
+    """
+    _require_local_model()
+    try:
+        started = ModelRegistryService.start_shadow(version, fraction)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Model version not found")
+    if not started:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A model version is already being loaded"
+        )
+    return ModelRegistryService.status()
+
+
+@router.delete("/shadow", status_code=status.HTTP_204_NO_CONTENT)
+async def stop_shadow_model(
+    current_user = Depends(get_current_admin_user)
+) -> None:
+    """Stop shadow scoring and unload the shadow version."""
+    if ModelRegistryService.status()["active"]:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A model version is already being loaded"
+        )
+    if not ModelRegistryService.stop_shadow():
+        raise HTTPException(status_code=404, detail="No shadow model version")
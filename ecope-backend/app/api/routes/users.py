@@ -8,6 +8,7 @@ from app.api.dependencies.auth import get_current_admin_user
 from app.models.domain.user import User
 from app.models.schemas.user import UserCreate, User as UserSchema, UserUpdate
 from app.core.security import get_password_hash
+from app.services.assignment_service import AssignmentService
 
 router = APIRouter()
 
@@ -34,6 +35,7 @@ def create_user(
     db.add(user)
     db.commit()
     db.refresh(user)
+    AssignmentService.invalidate_roster()
     return user
 
 
@@ -80,6 +82,7 @@ def update_user(
     
     db.commit()
     db.refresh(user)
+    AssignmentService.invalidate_roster()
     return user
 
 
@@ -95,3 +98,4 @@ def delete_user(
     
     db.delete(user)
     db.commit()
+    AssignmentService.invalidate_roster()
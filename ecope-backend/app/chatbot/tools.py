@@ -12,9 +12,9 @@ from app.models.domain.complaint import Complaint, Category, Urgency
 from app.services.complaint_service import ComplaintService
 from app.services.eda_service import EdaService
 from app.models.schemas.complaint import ComplaintCreate, ComplaintUpdate
-from app.ml.model import get_model_predictor
+from app.ml.predictor import get_model_predictor
 from app.models.schemas.complaint import ComplaintCreate, ComplaintUpdate
-from app.ml.model import get_model_predictor
+from app.ml.predictor import get_model_predictor
 
 
 class SearchComplaintInput(BaseModel):
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional, List
+from typing import Literal, Optional, List
 from pydantic import SecretStr
 from urllib.parse import quote_plus
 from pathlib import Path 
@@ -24,6 +24,14 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "CHANGE_THIS_TO_A_PROPER_SECRET_IN_PRODUCTION"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
     
+    # Complaint assignment: active support users are cached per worker for this long
+    # (and refreshed at once when users are changed through the API)
+    SUPPORT_ROSTER_TTL_SECONDS: float = 60.0
+
+    # "round_robin" rotates through the support users; "least_loaded" picks the one with
+    # the lowest urgency-weighted count of open complaints (see assignee_loads)
+    ASSIGNMENT_STRATEGY: Literal["round_robin", "least_loaded"] = "round_robin"
+
     # Google Gemini API
     GOOGLE_API_KEY: Optional[SecretStr] = None
     
@@ -31,6 +39,124 @@ class Settings(BaseSettings):
     # Make MODEL_PATH absolute relative to the app root
     MODEL_PATH: str = str(Path(__file__).parent.parent / "ml" / "model.pt")
     MODEL: str = 'distilbert-base-uncased'
+
+    # Inference engine: "torch" runs the checkpoint eagerly, "onnx" runs the graph
+    # exported by `python -m app.ml.onnx_engine` through onnxruntime.
+    # 0 threads lets onnxruntime pick based on the available cores.
+    MODEL_ENGINE: Literal["torch", "onnx"] = "torch"
+    # Precision of the torch engine: "fp32", "bf16" or "dynamic-int8"
+    # (int8 weights for every Linear layer, CPU only)
+    MODEL_PRECISION: Literal["fp32", "bf16", "dynamic-int8"] = "fp32"
+    ONNX_MODEL_PATH: str = str(Path(__file__).parent.parent / "ml" / "model.onnx")
+    ONNX_INTRA_OP_THREADS: int = 0
+    ONNX_INTER_OP_THREADS: int = 1
+
+    # Prediction cache keyed on the normalized complaint text and model version,
+    # bounded to PREDICTION_CACHE_MAX_ENTRIES and expiring after the TTL
+    PREDICTION_CACHE_ENABLED: bool = True
+    PREDICTION_CACHE_MAX_ENTRIES: int = 10000
+    PREDICTION_CACHE_TTL_SECONDS: float = 3600.0
+
+    # Model server: when MODEL_SERVER_SOCKET is set, API workers do not load the model
+    # and classify through the `python -m app.ml.model_server` process listening on
+    # that Unix domain socket
+    MODEL_SERVER_SOCKET: Optional[str] = None
+    MODEL_SERVER_TIMEOUT: float = 30.0
+
+    # Worker processes started by gunicorn.conf.py, which preloads the model before
+    # forking; each worker then uses TORCH_NUM_THREADS intra-op threads
+    # (0 splits the CPU cores evenly between the workers)
+    WEB_CONCURRENCY: int = 1
+    TORCH_NUM_THREADS: int = 0
+
+    # Inference executor: async routes run the model on a thread pool with at most
+    # INFERENCE_CONCURRENCY predictions in flight (0 picks INFERENCE_MAX_BATCH_SIZE
+    # when micro-batching is enabled, otherwise 2)
+    INFERENCE_CONCURRENCY: int = 0
+
+    # Batch classification: predict_batch sorts texts by token length and runs the
+    # model on buckets of INFERENCE_BATCH_SIZE texts; /complaints/classify/batch
+    # accepts at most CLASSIFY_BATCH_MAX_ITEMS complaints per request
+    INFERENCE_BATCH_SIZE: int = 32
+    CLASSIFY_BATCH_MAX_ITEMS: int = 1000
+
+    # Asynchronous classification: POST /complaints/ stores the complaint with
+    # classification_status "pending" and returns at once; CLASSIFICATION_WORKERS
+    # background threads per process classify and assign pending complaints in batches
+    # of up to CLASSIFICATION_BATCH_SIZE, waking on new complaints or every
+    # CLASSIFICATION_POLL_SECONDS. GET /complaints/{id}/events streams the result
+    ASYNC_CLASSIFICATION_ENABLED: bool = False
+    CLASSIFICATION_WORKERS: int = 1
+    CLASSIFICATION_BATCH_SIZE: int = 32
+    CLASSIFICATION_POLL_SECONDS: float = 1.0
+    CLASSIFICATION_EVENTS_TIMEOUT_SECONDS: float = 30.0
+    # Workers claim a batch before running the model and hold no row locks meanwhile.
+    # A claim not written within CLASSIFICATION_LEASE_SECONDS (a crashed worker) is
+    # taken over; after CLASSIFICATION_MAX_ATTEMPTS claims the complaint is marked failed
+    CLASSIFICATION_LEASE_SECONDS: float = 300.0
+    CLASSIFICATION_MAX_ATTEMPTS: int = 3
+
+    # Intake buffer (group commit): complaints created within INTAKE_BUFFER_MAX_WAIT_MS
+    # of each other, up to INTAKE_BUFFER_MAX_ROWS, are assigned and written with one
+    # multi-row INSERT and one commit by a flush thread per process
+    INTAKE_BUFFER_ENABLED: bool = False
+    INTAKE_BUFFER_MAX_ROWS: int = 100
+    INTAKE_BUFFER_MAX_WAIT_MS: float = 10.0
+
+    # Tokenization: sequences are truncated to INFERENCE_MAX_LENGTH tokens and each
+    # batch is padded to its longest member, rounded up to INFERENCE_PAD_TO_MULTIPLE_OF
+    # (0 disables the rounding)
+    INFERENCE_MAX_LENGTH: int = 512
+    INFERENCE_PAD_TO_MULTIPLE_OF: int = 8
+
+    # Store the [CLS] embedding (float16), the category and urgency probability vectors
+    # and the model version of every new complaint in complaint_inferences
+    STORE_MODEL_OUTPUTS: bool = True
+
+    # Complaints per batch when `scripts/reclassify.py` or POST /model/reclassify relabels
+    # the complaints table after a model change
+    RECLASSIFY_BATCH_SIZE: int = 64
+    # A run claims its reclassification_runs row across processes; one whose last batch
+    # is older than this is treated as crashed and may be resumed by another process
+    RECLASSIFY_LEASE_SECONDS: float = 600.0
+
+    # Versioned checkpoints written by `scripts/retrain_heads.py`; POST /model/heads only
+    # loads checkpoints from this directory
+    MODEL_CHECKPOINT_DIR: str = str(Path(__file__).parent.parent / "ml" / "checkpoints")
+
+    # Registry of versioned checkpoints (`python -m app.ml.registry`); the version
+    # activated there is served instead of MODEL_PATH. MODEL_SHADOW_FRACTION is the
+    # default share of requests also scored on a shadow version for comparison
+    MODEL_REGISTRY_PATH: str = str(Path(__file__).parent.parent / "ml" / "registry.json")
+    MODEL_SHADOW_FRACTION: float = 0.1
+    # How often each worker checks the registry file for a version activated by another
+    # worker and loads it (0 disables following; activations then apply on restart)
+    MODEL_REGISTRY_POLL_SECONDS: float = 5.0
+
+    # Load the model on a background thread at startup and warm it up on a few
+    # representative batch shapes before /health/ready reports the worker as ready
+    MODEL_LOAD_AT_STARTUP: bool = True
+    MODEL_WARMUP_ENABLED: bool = True
+
+    # Inference micro-batching: concurrent predict calls are collected for up to
+    # INFERENCE_MAX_WAIT_MS and run as a single padded batch
+    INFERENCE_BATCHING_ENABLED: bool = False
+    INFERENCE_MAX_BATCH_SIZE: int = 16
+    INFERENCE_MAX_WAIT_MS: float = 5.0
+
+    # Classifier cascade: a TF-IDF + linear first stage (trained with
+    # `python -m app.ml.cascade`) answers when both its category and urgency
+    # confidence reach CASCADE_THRESHOLD; other complaints go to the model
+    CASCADE_ENABLED: bool = False
+    CASCADE_MODEL_PATH: str = str(Path(__file__).parent.parent / "ml" / "cascade.joblib")
+    CASCADE_THRESHOLD: float = 0.9
+
+    # Early exit (torch engine): heads trained with `python -m app.ml.early_exit` let a
+    # complaint leave the encoder at the first intermediate layer where both its
+    # category and urgency confidence reach EARLY_EXIT_THRESHOLD
+    EARLY_EXIT_ENABLED: bool = False
+    EARLY_EXIT_HEADS_PATH: str = str(Path(__file__).parent.parent / "ml" / "early_exit.pt")
+    EARLY_EXIT_THRESHOLD: float = 0.9
     
     def _build_mysql_url(self) -> str:
         user = quote_plus(self.MYSQL_USER or "")
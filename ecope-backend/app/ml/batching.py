@@ -0,0 +1,192 @@
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+from app.ml.predictions import FALLBACK_PREDICTION
+
+# Queued by close() to stop the worker thread once the requests ahead of it are served
+_STOP = object()
+
+
+def _depth_bucket(depth):
+    """Round a queue depth up to the next power of two for the histogram"""
+    bucket = 1
+    while bucket < depth:
+        bucket *= 2
+    return bucket
+
+
+class BatchingPredictor:
+    """
+    Micro-batching front for a ModelPredictor.
+
+    Concurrent predict and analyze calls are queued; a single worker thread takes
+    the first waiting request, keeps collecting until max_batch_size requests are
+    queued or max_wait_ms has passed, then runs them as one padded forward pass per
+    kind of call and resolves every caller's future.
+    """
+
+    def __init__(self, predictor, max_batch_size=16, max_wait_ms=5.0):
+        self.predictor = predictor
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+
+        self._batch_sizes = Counter()
+        self._queue_depths = Counter()
+        self._requests = 0
+        self._batches = 0
+        self._start()
+
+    def _start(self):
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._submit_lock = threading.Lock()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+        self._worker.start()
+
+    def after_fork(self):
+        """Threads do not survive fork, so a forked worker needs its own queue and worker thread"""
+        self._start()
+        self.predictor.after_fork()
+
+    def __getattr__(self, name):
+        # Expose the wrapped predictor's attributes (model_version, label classes, ...)
+        if name == "predictor":
+            raise AttributeError(name)
+        return getattr(self.predictor, name)
+
+    def submit(self, text, analyze=False):
+        """
+        Queue a text for classification and return a Future for its prediction,
+        which carries the analysis fields when analyze is set
+        """
+        future = Future()
+        with self._submit_lock:
+            if not self._closed:
+                self._queue.put((text, analyze, future))
+                return future
+        # Swapped out: late callers that still hold this predictor run unbatched
+        if analyze:
+            future.set_result(self.predictor.analyze_batch([text])[0])
+        else:
+            future.set_result(self.predictor.predict(text))
+        return future
+
+    def close(self):
+        """Stop the worker thread after the queued requests are served"""
+        with self._submit_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._worker.join()
+        self.predictor.close()
+
+    def predict(self, text):
+        """Predict category and urgency for a complaint text"""
+        return self.submit(text).result()
+
+    def predict_batch(self, texts, batch_size=None):
+        """
+        Predict many texts. A caller with a whole batch already has what the queue
+        would build, so it goes straight to the wrapped predictor, which buckets the
+        texts by length and splits them by batch_size. A single text is queued like
+        any other request, to share a forward pass with concurrent ones.
+        """
+        if len(texts) == 1:
+            return [self.submit(texts[0]).result()]
+        return self.predictor.predict_batch(texts, batch_size)
+
+    def analyze_batch(self, texts, batch_size=None):
+        """Like predict_batch, with the embedding, probabilities and model version of each text"""
+        if len(texts) == 1:
+            return [self.submit(texts[0], analyze=True).result()]
+        return self.predictor.analyze_batch(texts, batch_size)
+
+    def _collect(self):
+        """
+        Block for the first request, then gather more until the batch is full or the wait expires.
+        Returns the batch, the queue depth seen at the start and whether close() was requested.
+        """
+        item = self._queue.get()
+        if item is _STOP:
+            return [], 0, True
+        batch = [item]
+        depth = self._queue.qsize() + 1
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, depth, True
+            batch.append(item)
+        return batch, depth, False
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            try:
+                batch, depth, stopping = self._collect()
+                if not batch:
+                    continue
+                for analyze in (False, True):
+                    items = [(text, future) for text, kind, future in batch if kind == analyze]
+                    if items:
+                        self._serve(items, analyze)
+
+                with self._stats_lock:
+                    self._requests += len(batch)
+                    self._batches += 1
+                    self._batch_sizes[len(batch)] += 1
+                    self._queue_depths[_depth_bucket(depth)] += 1
+            except Exception as e:
+                # The thread must outlive any error, or every later caller would wait forever
+                print("Inference batcher error:", e)
+                self._resolve([(text, future) for text, _, future in batch], None)
+
+    def _serve(self, items, analyze):
+        """Run one forward pass over the queued texts and resolve their futures"""
+        texts = [text for text, _ in items]
+        try:
+            if analyze:
+                results = self.predictor._analyze_texts(texts)
+            else:
+                results = self.predictor._predict_texts(texts)
+            if len(results) != len(texts):
+                raise RuntimeError(f"Got {len(results)} predictions for {len(texts)} texts")
+        except Exception as e:
+            print("Batched prediction failed:", e)
+            results = None
+        self._resolve(items, results)
+
+    @staticmethod
+    def _resolve(items, results):
+        """Resolve every unresolved future, with the fallback prediction when results is None"""
+        for i, (_, future) in enumerate(items):
+            if not future.done():
+                future.set_result(results[i] if results is not None else dict(FALLBACK_PREDICTION))
+
+    def stats(self):
+        """Queue depth and batch size histograms for tuning the batching window"""
+        with self._stats_lock:
+            batching = {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "queue_depth": self._queue.qsize(),
+                "requests": self._requests,
+                "batches": self._batches,
+                "mean_batch_size": self._requests / self._batches if self._batches else 0.0,
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+                # Keys are power-of-two upper bounds of the queue depth seen at dispatch
+                "queue_depth_histogram": dict(sorted(self._queue_depths.items())),
+            }
+        return {**self.predictor.stats(), "batching": batching}
@@ -0,0 +1,136 @@
+"""
+Self-contained model bundle.
+
+A bundle is a directory holding everything needed to serve the classifier offline:
+
+    config.json          encoder configuration
+    tokenizer files      tokenizer.json, vocab.txt, ...
+    model.safetensors    encoder and head weights
+    labels.json          category and urgency classes in model output order
+
+The encoder is built from config.json alone and the weights are memory-mapped from
+model.safetensors, so loading a bundle never downloads or materializes the
+pretrained base weights.
+"""
+import argparse
+import json
+from pathlib import Path
+
+import torch
+from safetensors.torch import load_file, save_file
+from transformers import AutoConfig, AutoTokenizer
+
+from app.core.config import settings
+
+WEIGHTS_FILE = "model.safetensors"
+LABELS_FILE = "labels.json"
+
+
+def is_bundle(path):
+    """Whether path is a model bundle directory rather than a model.pt checkpoint"""
+    path = Path(path)
+    return path.is_dir() and (path / LABELS_FILE).exists()
+
+
+def save_bundle(model, tokenizer, category_classes, urgency_classes, output_dir, metadata=None):
+    """Write a MultiTaskModel, its tokenizer and label classes as a bundle"""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    model.enc.config.save_pretrained(output_dir)
+    tokenizer.save_pretrained(output_dir)
+
+    # Non-persistent buffers (e.g. position ids) are not part of the state dict,
+    # but a model built on the meta device needs them too
+    state = dict(model.state_dict())
+    for name, buffer in model.named_buffers():
+        state.setdefault(name, buffer)
+    save_file(
+        {name: tensor.detach().cpu().contiguous() for name, tensor in state.items()},
+        str(output_dir / WEIGHTS_FILE),
+        metadata={"format": "pt"}
+    )
+
+    labels = {
+        "category_classes": [str(label) for label in category_classes],
+        "urgency_classes": [str(label) for label in urgency_classes],
+        **(metadata or {})
+    }
+    with open(output_dir / LABELS_FILE, "w") as f:
+        json.dump(labels, f, indent=2)
+    print(f"Model bundle written to {output_dir}")
+    return output_dir
+
+
+def read_bundle_labels(bundle_dir):
+    """Label classes and metadata stored in a bundle's labels.json"""
+    with open(Path(bundle_dir) / LABELS_FILE) as f:
+        return json.load(f)
+
+
+def load_bundle(bundle_dir, device):
+    """Build a MultiTaskModel from a bundle; returns (model, category_classes, urgency_classes)"""
+    from app.ml.model import MultiTaskModel
+
+    bundle_dir = Path(bundle_dir)
+    labels = read_bundle_labels(bundle_dir)
+    config = AutoConfig.from_pretrained(bundle_dir)
+
+    # Build the architecture without allocating or initializing any weights
+    with torch.device("meta"):
+        model = MultiTaskModel(
+            num_genres=len(labels["category_classes"]),
+            num_priority=len(labels["urgency_classes"]),
+            encoder_config=config
+        )
+
+    tensors = load_file(str(bundle_dir / WEIGHTS_FILE))
+    missing, unexpected = model.load_state_dict(tensors, strict=False, assign=True)
+    if missing:
+        raise ValueError(f"Model bundle is missing weights: {', '.join(missing)}")
+    for name in unexpected:
+        module_name, _, buffer_name = name.rpartition(".")
+        model.get_submodule(module_name).register_buffer(buffer_name, tensors[name], persistent=False)
+
+    if device.type != "cpu":
+        model.to(device)
+    model.eval()
+    return model, labels["category_classes"], labels["urgency_classes"]
+
+
+def convert_checkpoint(checkpoint_path, output_dir, base_model=None):
+    """Convert a model.pt checkpoint (state, le_cat, le_urg) into a bundle"""
+    from sklearn.preprocessing._label import LabelEncoder as LabelEncoderClass
+    from app.ml.model import MultiTaskModel
+
+    base_model = base_model or settings.MODEL
+    torch.serialization.add_safe_globals([LabelEncoderClass])
+    checkpoint = torch.load(checkpoint_path, map_location="cpu", weights_only=False)
+    le_cat, le_urg = checkpoint.get("le_cat"), checkpoint.get("le_urg")
+    if le_cat is None or le_urg is None:
+        raise ValueError("Label encoders not found in checkpoint")
+
+    model = MultiTaskModel(
+        num_genres=len(le_cat.classes_),
+        num_priority=len(le_urg.classes_),
+        encoder_config=AutoConfig.from_pretrained(base_model)
+    )
+    model.load_state_dict(checkpoint["state"])
+    tokenizer = AutoTokenizer.from_pretrained(base_model)
+    return save_bundle(
+        model,
+        tokenizer,
+        le_cat.classes_,
+        le_urg.classes_,
+        output_dir,
+        metadata={"source_checkpoint": str(Path(checkpoint_path).resolve())}
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a model.pt checkpoint into a self-contained model bundle")
+    parser.add_argument("--checkpoint", default=settings.MODEL_PATH, help="Checkpoint to convert (defaults to MODEL_PATH)")
+    parser.add_argument("--output", required=True, help="Bundle directory to write")
+    parser.add_argument("--base-model", default=None, help="Tokenizer and encoder config source (defaults to MODEL)")
+    args = parser.parse_args()
+    convert_checkpoint(args.checkpoint, args.output, args.base_model)
@@ -0,0 +1,198 @@
+import hashlib
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+from app.ml.embeddings import EMBEDDING_DTYPE
+from app.ml.predictions import FALLBACK_PREDICTION, prediction_view
+from app.ml.predictor import checkpoint_version
+
+# Seconds between checks of the checkpoint file for changes
+VERSION_CHECK_INTERVAL = 5.0
+
+
+def normalize_text(text):
+    """Normalize unicode and whitespace so trivially different submissions share a cache entry"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def cache_key(text, model_version):
+    """Content address of a prediction: hash of the model version and the normalized text"""
+    payload = f"{model_version}\0{normalize_text(text)}".encode("utf-8")
+    return hashlib.sha256(payload).digest()
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache with a per-entry TTL.
+
+    Keys are 32-byte digests rather than the complaint text, so the footprint is
+    bounded by max_entries regardless of how long the complaints are.
+    """
+
+    def __init__(self, max_entries=10000, ttl_seconds=3600.0):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(value)
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries[key] = (expires_at, dict(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def after_fork(self):
+        # A lock held by another thread at fork time would never be released in the child
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+class CachedPredictor:
+    """
+    Serves repeated complaint texts from a PredictionCache before running the model.
+    The cache is cleared whenever the contents of the model file on disk change.
+
+    With analyze set (and a model that supports it), misses are run through
+    analyze_batch and cached with their embedding and probabilities, so a text that
+    was classified and then created as a complaint runs the model only once.
+    """
+
+    def __init__(self, predictor, cache, analyze=False):
+        self.predictor = predictor
+        self.cache = cache
+        self.analyze = analyze and getattr(predictor, "supports_analysis", False)
+        self._file_version = self._current_file_version()
+        self._next_version_check = time.monotonic() + VERSION_CHECK_INTERVAL
+        self._version_lock = threading.Lock()
+
+    def __getattr__(self, name):
+        # Expose the wrapped predictor's attributes (model_version, label classes, ...)
+        if name == "predictor":
+            raise AttributeError(name)
+        return getattr(self.predictor, name)
+
+    def after_fork(self):
+        self._version_lock = threading.Lock()
+        self.cache.after_fork()
+        self.predictor.after_fork()
+
+    def _current_file_version(self):
+        path = getattr(self.predictor, "model_path", None)
+        try:
+            return checkpoint_version(path) if path else None
+        except OSError:
+            return None
+
+    def _check_model_file(self):
+        now = time.monotonic()
+        if now < self._next_version_check:
+            return
+        with self._version_lock:
+            if now < self._next_version_check:
+                return
+            self._next_version_check = now + VERSION_CHECK_INTERVAL
+            file_version = self._current_file_version()
+            if file_version != self._file_version:
+                print("Model file changed, clearing prediction cache")
+                self._file_version = file_version
+                self.cache.clear()
+
+    def _store(self, key, prediction):
+        # Never cache the fallback answer given when inference failed
+        if prediction == FALLBACK_PREDICTION:
+            return
+        if prediction.get("embedding") is not None:
+            # Stored as float16 anyway, so keep the cached copy at half the size
+            prediction = {**prediction, "embedding": np.asarray(prediction["embedding"], dtype=EMBEDDING_DTYPE)}
+        self.cache.set(key, prediction)
+
+    def _lookup(self, key, analyze):
+        entry = self.cache.get(key)
+        if entry is not None and analyze and "model_version" not in entry:
+            # Cached by a predict call without the analysis fields
+            return None
+        return entry
+
+    def predict(self, text):
+        """Predict category and urgency for a complaint text"""
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts, batch_size=None):
+        """Predict many texts, running the model only on distinct texts that are not cached"""
+        return [prediction_view(result) for result in self._run(texts, batch_size, analyze=False)]
+
+    def analyze_batch(self, texts, batch_size=None):
+        """Like predict_batch, with the embedding, probabilities and model version of each text"""
+        return self._run(texts, batch_size, analyze=True)
+
+    def _run(self, texts, batch_size, analyze):
+        self._check_model_file()
+        model_version = self.predictor.model_version
+        keys = [cache_key(text, model_version) for text in texts]
+        results = [self._lookup(key, analyze) for key in keys]
+
+        pending = {}
+        for i, (key, result) in enumerate(zip(keys, results)):
+            if result is None:
+                pending.setdefault(key, []).append(i)
+
+        if pending:
+            first_indexes = [indexes[0] for indexes in pending.values()]
+            model_batch = self.predictor.analyze_batch if analyze or self.analyze else self.predictor.predict_batch
+            predictions = model_batch([texts[i] for i in first_indexes], batch_size=batch_size)
+            for (key, indexes), prediction in zip(pending.items(), predictions):
+                self._store(key, prediction)
+                for i in indexes:
+                    results[i] = dict(prediction)
+        return results
+
+    def stats(self):
+        return {**self.predictor.stats(), "cache": self.cache.stats()}
@@ -0,0 +1,215 @@
+"""
+Confidence-gated classifier cascade.
+
+A TF-IDF + logistic regression first stage labels the complaints it is confident
+about; only the rest go through the DistilBERT MultiTaskModel. The first stage is
+trained on the bundled dataset in the label space of the loaded checkpoint
+(le_cat / le_urg), so both stages produce the same labels.
+
+    python -m app.ml.cascade            # train and save to CASCADE_MODEL_PATH
+    python scripts/cascade_report.py    # share per stage and accuracy cost per threshold
+"""
+import argparse
+import threading
+from pathlib import Path
+
+import joblib
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+from app.core.config import settings
+from app.ml.evaluation import load_dataset
+
+
+def _fit_head(features, labels, classes):
+    """Fit one logistic regression on the rows whose label the checkpoint knows"""
+    known = np.isin(labels, classes)
+    model = LogisticRegression(max_iter=1000, C=10.0)
+    model.fit(features[known], labels[known])
+    return model
+
+
+class FirstStageClassifier:
+    """TF-IDF features with one linear model per task, aligned to the checkpoint's classes"""
+
+    def __init__(self, vectorizer, category_model, urgency_model, category_classes, urgency_classes, version=None):
+        self.vectorizer = vectorizer
+        # Fingerprint of the saved file, stamped on the stored outputs of first-stage answers
+        self.version = version
+        self.category_model = category_model
+        self.urgency_model = urgency_model
+        self.category_classes = list(category_classes)
+        self.urgency_classes = list(urgency_classes)
+        # Column of each fitted class in the checkpoint's class order; classes
+        # missing from the training data simply get zero probability
+        self._category_columns = [self.category_classes.index(c) for c in category_model.classes_]
+        self._urgency_columns = [self.urgency_classes.index(c) for c in urgency_model.classes_]
+
+    @classmethod
+    def train(cls, texts, categories, urgencies, category_classes, urgency_classes):
+        vectorizer = TfidfVectorizer(ngram_range=(1, 2), min_df=2, sublinear_tf=True)
+        features = vectorizer.fit_transform(texts)
+        return cls(
+            vectorizer,
+            _fit_head(features, np.asarray(categories), category_classes),
+            _fit_head(features, np.asarray(urgencies), urgency_classes),
+            category_classes,
+            urgency_classes
+        )
+
+    @classmethod
+    def load(cls, path):
+        from app.ml.predictor import checkpoint_version
+        return cls(**joblib.load(path), version=checkpoint_version(path))
+
+    @property
+    def model_version(self):
+        """Version of first-stage answers, distinct from the model's, so they read as stale"""
+        return f"cascade:{self.version or 'unsaved'}"
+
+    def save(self, path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump({
+            "vectorizer": self.vectorizer,
+            "category_model": self.category_model,
+            "urgency_model": self.urgency_model,
+            "category_classes": self.category_classes,
+            "urgency_classes": self.urgency_classes,
+        }, path)
+
+    def predict_proba(self, texts):
+        """Return (category_probs, urgency_probs) with columns in the checkpoint's class order"""
+        features = self.vectorizer.transform(texts)
+        category_probs = np.zeros((len(texts), len(self.category_classes)))
+        urgency_probs = np.zeros((len(texts), len(self.urgency_classes)))
+        category_probs[:, self._category_columns] = self.category_model.predict_proba(features)
+        urgency_probs[:, self._urgency_columns] = self.urgency_model.predict_proba(features)
+        return category_probs, urgency_probs
+
+
+class CascadePredictor:
+    """
+    Answers from the first stage when both its category and urgency confidence reach
+    threshold, and sends the remaining texts to the wrapped model predictor.
+    """
+
+    def __init__(self, predictor, first_stage, threshold=0.9):
+        self.predictor = predictor
+        self.first_stage = first_stage
+        self.threshold = threshold
+        self._stats_lock = threading.Lock()
+        self._first_stage_count = 0
+        self._model_count = 0
+
+        if first_stage.category_classes != list(predictor.category_classes) or \
+                first_stage.urgency_classes != list(predictor.urgency_classes):
+            raise ValueError("Cascade first stage was trained for different label classes than the model")
+
+    def __getattr__(self, name):
+        # Expose the wrapped predictor's attributes (model_version, label classes, ...)
+        if name == "predictor":
+            raise AttributeError(name)
+        return getattr(self.predictor, name)
+
+    def after_fork(self):
+        self._stats_lock = threading.Lock()
+        self.predictor.after_fork()
+
+    def predict(self, text):
+        """Predict category and urgency for a complaint text"""
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts, batch_size=None):
+        """Predict many texts, running the model only on those the first stage is unsure about"""
+        return self._run(texts, batch_size, analyze=False)
+
+    def analyze_batch(self, texts, batch_size=None):
+        """
+        Like predict_batch, with the probabilities and model version of each text. Texts
+        answered by the first stage carry its probabilities and no embedding.
+        """
+        return self._run(texts, batch_size, analyze=True)
+
+    def _run(self, texts, batch_size, analyze):
+        results = [None] * len(texts)
+        if not texts:
+            return results
+        model_batch = self.predictor.analyze_batch if analyze else self.predictor.predict_batch
+
+        try:
+            category_probs, urgency_probs = self.first_stage.predict_proba(texts)
+        except Exception as e:
+            print("Cascade first stage failed:", e)
+            return model_batch(texts, batch_size=batch_size)
+
+        category_idx = category_probs.argmax(axis=1)
+        urgency_idx = urgency_probs.argmax(axis=1)
+        confidence_category = category_probs.max(axis=1)
+        confidence_urgency = urgency_probs.max(axis=1)
+        confident = np.minimum(confidence_category, confidence_urgency) >= self.threshold
+
+        deferred = []
+        for i in range(len(texts)):
+            if confident[i]:
+                results[i] = {
+                    "category": self.predictor.category_labels[category_idx[i]],
+                    "urgency": self.predictor.urgency_labels[urgency_idx[i]],
+                    "confidence_category": float(confidence_category[i]),
+                    "confidence_urgency": float(confidence_urgency[i])
+                }
+                if analyze:
+                    results[i].update({
+                        "category_probs": dict(zip(self.first_stage.category_classes, category_probs[i].tolist())),
+                        "urgency_probs": dict(zip(self.first_stage.urgency_classes, urgency_probs[i].tolist())),
+                        "model_version": self.first_stage.model_version
+                    })
+            else:
+                deferred.append(i)
+
+        if deferred:
+            predictions = model_batch([texts[i] for i in deferred], batch_size=batch_size)
+            for i, prediction in zip(deferred, predictions):
+                results[i] = prediction
+
+        with self._stats_lock:
+            self._first_stage_count += len(texts) - len(deferred)
+            self._model_count += len(deferred)
+        return results
+
+    def stats(self):
+        with self._stats_lock:
+            total = self._first_stage_count + self._model_count
+            cascade = {
+                "threshold": self.threshold,
+                "first_stage": self._first_stage_count,
+                "model": self._model_count,
+                "first_stage_share": self._first_stage_count / total if total else 0.0,
+            }
+        return {**self.predictor.stats(), "cascade": cascade}
+
+
+def train_first_stage(category_classes, urgency_classes, csv_path=None):
+    """Train a first stage on the labelled complaints CSV"""
+    df = load_dataset(csv_path)
+    return FirstStageClassifier.train(
+        df["complaint_text"].tolist(),
+        df["category"].astype(str).to_numpy(),
+        df["urgency"].astype(str).to_numpy(),
+        category_classes,
+        urgency_classes
+    )
+
+
+if __name__ == "__main__":
+    from app.ml.model import ModelPredictor
+
+    parser = argparse.ArgumentParser(description="Train the cascade first stage for the current checkpoint")
+    parser.add_argument("--csv", default=None, help="Labelled complaints CSV (defaults to data/complaints.csv)")
+    parser.add_argument("--output", default=settings.CASCADE_MODEL_PATH)
+    args = parser.parse_args()
+
+    predictor = ModelPredictor()
+    first_stage = train_first_stage(predictor.category_classes, predictor.urgency_classes, args.csv)
+    first_stage.save(args.output)
+    print(f"Cascade first stage written to {args.output}")
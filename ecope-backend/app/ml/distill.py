@@ -0,0 +1,239 @@
+"""
+Knowledge distillation into a compact student model.
+
+The student is the teacher's MultiTaskModel with only a few of its transformer
+layers kept (evenly spaced, first and last included), initialized from the
+teacher's weights and then trained on data/complaints.csv to match the teacher's
+softened category and urgency distributions as well as the CSV labels. Batches are
+drawn from length buckets, so short complaints are not padded to long ones.
+
+The student is written as a model bundle (config.json records its layer count), so
+ModelPredictor loads it like any other checkpoint:
+
+    python -m app.ml.distill --output app/ml/student
+    MODEL_PATH=app/ml/student uvicorn main:app
+
+Teacher and student are compared on a held-out split; the report (accuracy,
+agreement and latency of both) is printed and saved as distillation.json in the bundle.
+"""
+import argparse
+import copy
+import json
+import random
+from pathlib import Path
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from app.core.config import settings
+from app.ml.bundle import save_bundle
+from app.ml.evaluation import accuracy, load_dataset, measure_single_latency
+from app.ml.model import ModelPredictor, length_buckets
+
+REPORT_FILE = "distillation.json"
+
+
+def student_layers(num_teacher_layers, num_student_layers):
+    """Evenly spaced teacher layers to keep, always including the first and the last"""
+    if not 1 <= num_student_layers < num_teacher_layers:
+        raise ValueError(f"A student needs between 1 and {num_teacher_layers - 1} layers")
+    if num_student_layers == 1:
+        return [num_teacher_layers - 1]
+    step = (num_teacher_layers - 1) / (num_student_layers - 1)
+    return [round(i * step) for i in range(num_student_layers)]
+
+
+def build_student(teacher_model, layers):
+    """Copy of a MultiTaskModel keeping only the given (0-based) transformer layers"""
+    if not hasattr(teacher_model.enc, "transformer"):
+        raise ValueError("Distillation supports DistilBERT encoders only")
+    student = copy.deepcopy(teacher_model).float().cpu()
+    transformer = student.enc.transformer
+    transformer.layer = nn.ModuleList([transformer.layer[i] for i in layers])
+    transformer.n_layers = len(layers)
+    student.enc.config.n_layers = len(layers)
+    return student
+
+
+def teacher_logits(teacher, encoded, batch_size=32):
+    """Category and urgency logits of the teacher for every tokenized text"""
+    lengths = [len(ids) for ids in encoded]
+    category_logits = [None] * len(encoded)
+    urgency_logits = [None] * len(encoded)
+    with torch.no_grad():
+        for bucket in length_buckets(lengths, batch_size):
+            category, urgency = teacher._forward(teacher._pad([encoded[i] for i in bucket]))
+            for row, i in enumerate(bucket):
+                category_logits[i] = category[row].float().cpu()
+                urgency_logits[i] = urgency[row].float().cpu()
+    return torch.stack(category_logits), torch.stack(urgency_logits)
+
+
+def _label_indexes(labels, classes):
+    """Class index of each label, -100 (ignored by cross_entropy) for unknown labels"""
+    index = {label: i for i, label in enumerate(classes)}
+    return torch.tensor([index.get(label, -100) for label in labels], dtype=torch.long)
+
+
+def _distillation_loss(student_logits, teacher_logits, labels, temperature, alpha):
+    soft = F.kl_div(
+        F.log_softmax(student_logits / temperature, dim=1),
+        F.softmax(teacher_logits / temperature, dim=1),
+        reduction="batchmean"
+    ) * temperature ** 2
+    if (labels == -100).all():
+        return soft
+    return alpha * soft + (1.0 - alpha) * F.cross_entropy(student_logits, labels, ignore_index=-100)
+
+
+def distill(
+    teacher,
+    df,
+    num_layers=2,
+    epochs=4,
+    batch_size=32,
+    lr=1e-4,
+    temperature=2.0,
+    alpha=0.5,
+    seed=0
+):
+    """
+    Train a num_layers student of the teacher predictor's model on the complaints in df.
+    Returns (student, kept teacher layers).
+    """
+    torch.manual_seed(seed)
+    rng = random.Random(seed)
+    texts = df["complaint_text"].tolist()
+    encoded = teacher.tokenizer(texts, truncation=True, max_length=settings.INFERENCE_MAX_LENGTH)["input_ids"]
+    targets_cat, targets_urg = teacher_logits(teacher, encoded, batch_size)
+    labels_cat = _label_indexes(df["category"].tolist(), teacher.category_classes)
+    labels_urg = _label_indexes(df["urgency"].tolist(), teacher.urgency_classes)
+
+    layers = student_layers(len(teacher.model.enc.transformer.layer), num_layers)
+    student = build_student(teacher.model, layers)
+    print(f"Student keeps teacher layers {layers}")
+
+    buckets = length_buckets([len(ids) for ids in encoded], batch_size)
+    optimizer = torch.optim.AdamW(student.parameters(), lr=lr, weight_decay=0.01)
+    scheduler = torch.optim.lr_scheduler.LinearLR(
+        optimizer, start_factor=1.0, end_factor=0.0, total_iters=epochs * len(buckets)
+    )
+    student.train()
+    for epoch in range(epochs):
+        rng.shuffle(buckets)
+        total = 0.0
+        for bucket in buckets:
+            inputs = teacher.tokenizer.pad({"input_ids": [encoded[i] for i in bucket]}, return_tensors="pt")
+            category_logits, urgency_logits = student(inputs["input_ids"], attention_mask=inputs["attention_mask"])
+            loss = _distillation_loss(
+                category_logits, targets_cat[bucket], labels_cat[bucket], temperature, alpha
+            ) + _distillation_loss(
+                urgency_logits, targets_urg[bucket], labels_urg[bucket], temperature, alpha
+            )
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            scheduler.step()
+            total += loss.item() * len(bucket)
+        print(f"Epoch {epoch + 1}/{epochs}: loss {total / len(texts):.4f}")
+    student.eval()
+    return student, layers
+
+
+def _agreement(teacher_predictions, student_predictions, key):
+    return float(np.mean([t[key] == s[key] for t, s in zip(teacher_predictions, student_predictions)]))
+
+
+def compare(teacher, student, df, latency_samples=100):
+    """Accuracy, agreement and latency of the student against the teacher on df"""
+    texts = df["complaint_text"].tolist()
+    teacher_predictions = teacher.predict_batch(texts)
+    student_predictions = student.predict_batch(texts)
+    report = {"holdout": len(texts)}
+    for name, predictor in (("teacher", teacher), ("student", student)):
+        report[name] = {
+            "layers": len(predictor.model.enc.transformer.layer),
+            **accuracy(predictor, df),
+            "single": measure_single_latency(predictor, texts[:latency_samples]),
+        }
+    report["category_accuracy_delta"] = report["student"]["category_accuracy"] - report["teacher"]["category_accuracy"]
+    report["urgency_accuracy_delta"] = report["student"]["urgency_accuracy"] - report["teacher"]["urgency_accuracy"]
+    report["category_agreement"] = _agreement(teacher_predictions, student_predictions, "category")
+    report["urgency_agreement"] = _agreement(teacher_predictions, student_predictions, "urgency")
+    report["speedup_p50"] = report["teacher"]["single"]["p50_ms"] / report["student"]["single"]["p50_ms"]
+    return report
+
+
+def distill_to_bundle(output_dir, teacher_path=None, csv_path=None, limit=None, holdout=0.2, **options):
+    """Distill the teacher, write the student bundle and its comparison report"""
+    teacher = ModelPredictor(precision="fp32", model_path=teacher_path)
+    df = load_dataset(csv_path, limit).sample(frac=1.0, random_state=options.get("seed", 0))
+    split = int(len(df) * (1.0 - holdout))
+    train, test = df.iloc[:split], df.iloc[split:]
+    print(f"Distilling on {len(train)} complaints, evaluating on {len(test)}")
+
+    student_model, layers = distill(teacher, train, **options)
+    output_dir = save_bundle(
+        student_model,
+        teacher.tokenizer,
+        teacher.category_classes,
+        teacher.urgency_classes,
+        output_dir,
+        metadata={
+            "distilled_from": teacher.model_version,
+            "teacher_path": str(teacher.model_path),
+            "teacher_layers": layers,
+        }
+    )
+
+    # Load the bundle the way the API will, so the report measures what gets served
+    student = ModelPredictor(precision="fp32", model_path=output_dir)
+    report = compare(teacher, student, test)
+    with open(Path(output_dir) / REPORT_FILE, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(
+        f"\nTeacher ({report['teacher']['layers']} layers): category {report['teacher']['category_accuracy']:.2%}, "
+        f"urgency {report['teacher']['urgency_accuracy']:.2%}, p50 {report['teacher']['single']['p50_ms']:.2f} ms"
+    )
+    print(
+        f"Student ({report['student']['layers']} layers): category {report['student']['category_accuracy']:.2%}, "
+        f"urgency {report['student']['urgency_accuracy']:.2%}, p50 {report['student']['single']['p50_ms']:.2f} ms"
+    )
+    print(
+        f"Delta: category {report['category_accuracy_delta']:+.2%}, urgency {report['urgency_accuracy_delta']:+.2%}, "
+        f"{report['speedup_p50']:.2f}x faster"
+    )
+    return output_dir, report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distill the classifier into a compact student bundle")
+    parser.add_argument("--output", required=True, help="Student bundle directory to write")
+    parser.add_argument("--teacher", default=None, help="Teacher checkpoint or bundle (defaults to MODEL_PATH)")
+    parser.add_argument("--csv", default=None, help="Labelled complaints CSV (defaults to data/complaints.csv)")
+    parser.add_argument("--limit", type=int, default=None, help="Only use the first N complaints")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Fraction of complaints held out for evaluation")
+    parser.add_argument("--layers", type=int, default=2, help="Transformer layers of the student")
+    parser.add_argument("--epochs", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--lr", type=float, default=1e-4)
+    parser.add_argument("--temperature", type=float, default=2.0, help="Softmax temperature of the teacher targets")
+    parser.add_argument("--alpha", type=float, default=0.5, help="Weight of the teacher targets against the CSV labels")
+    args = parser.parse_args()
+
+    distill_to_bundle(
+        args.output,
+        teacher_path=args.teacher,
+        csv_path=args.csv,
+        limit=args.limit,
+        holdout=args.holdout,
+        num_layers=args.layers,
+        epochs=args.epochs,
+        batch_size=args.batch_size,
+        lr=args.lr,
+        temperature=args.temperature,
+        alpha=args.alpha
+    )
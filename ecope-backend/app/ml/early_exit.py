@@ -0,0 +1,273 @@
+"""
+Early-exit inference on intermediate DistilBERT layers.
+
+Small category and urgency heads read the [CLS] hidden state after some of the
+encoder's transformer layers. At inference a text leaves the encoder at the first
+exit whose category and urgency confidence both reach EARLY_EXIT_THRESHOLD; the
+rest continue to the next layer and, at the end, the model's own heads.
+
+The exit heads are trained with the encoder frozen, to reproduce the full model's
+output distribution (self-distillation), so they need no extra labels:
+
+    python -m app.ml.early_exit                 # train heads into EARLY_EXIT_HEADS_PATH
+    python scripts/early_exit_report.py         # latency and accuracy per threshold
+"""
+import argparse
+import threading
+from collections import Counter
+from pathlib import Path
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from app.core.config import settings
+from app.ml.evaluation import load_dataset
+from app.ml.model import ModelPredictor, checkpoint_version
+
+try:
+    from transformers.masking_utils import create_bidirectional_mask
+except ImportError:
+    # Older transformers (4.x): DistilBertModel builds the layer mask itself
+    create_bidirectional_mask = None
+    from transformers.modeling_attn_mask_utils import _prepare_4d_attention_mask_for_sdpa
+
+
+def _layer_mask(encoder, hidden, attention_mask):
+    """Attention mask in the form the encoder's transformer layers expect"""
+    if create_bidirectional_mask is not None:
+        return create_bidirectional_mask(config=encoder.config, inputs_embeds=hidden, attention_mask=attention_mask)
+    # As DistilBertModel.forward does: SDPA attention takes a 4D float mask (None without
+    # padding), eager and flash attention take the 2D padding mask
+    if encoder.config._attn_implementation == "sdpa":
+        return _prepare_4d_attention_mask_for_sdpa(attention_mask, hidden.dtype, tgt_len=hidden.shape[1])
+    return attention_mask
+
+
+def _run_layer(layer, hidden, mask):
+    output = layer(hidden, mask)
+    # Older transformers return a tuple ending with the hidden states
+    return output[-1] if isinstance(output, tuple) else output
+
+
+def cls_states(model, input_ids, attention_mask):
+    """[CLS] hidden state after every transformer layer of a MultiTaskModel's encoder"""
+    encoder = model.enc
+    hidden = encoder.embeddings(input_ids)
+    mask = _layer_mask(encoder, hidden, attention_mask)
+    states = []
+    for layer in encoder.transformer.layer:
+        hidden = _run_layer(layer, hidden, mask)
+        states.append(hidden[:, 0])
+    return states
+
+
+class ExitHeads(nn.Module):
+    """One category and one urgency head per exit layer (1-based layer numbers)"""
+
+    def __init__(self, layers, hidden_size, num_genres, num_priority):
+        super().__init__()
+        self.layers = sorted(layers)
+        self.head_cat = nn.ModuleDict({str(layer): nn.Linear(hidden_size, num_genres) for layer in self.layers})
+        self.head_urg = nn.ModuleDict({str(layer): nn.Linear(hidden_size, num_priority) for layer in self.layers})
+
+    def forward(self, layer, x):
+        return self.head_cat[str(layer)](x), self.head_urg[str(layer)](x)
+
+
+def default_exit_layers(model):
+    """Every layer except the last, which is served by the model's own heads"""
+    return list(range(1, len(model.enc.transformer.layer)))
+
+
+def train_exit_heads(predictor, texts, layers=None, epochs=30, batch_size=32, lr=1e-3):
+    """
+    Fit exit heads on a frozen model. The [CLS] states of every layer and the full
+    model's probabilities are computed once, then the heads are trained on them.
+    """
+    model = predictor.model
+    layers = layers or default_exit_layers(model)
+    features = {layer: [] for layer in layers}
+    category_targets, urgency_targets = [], []
+
+    with torch.no_grad():
+        for start in range(0, len(texts), batch_size):
+            inputs = predictor._tokenize(texts[start:start + batch_size])
+            states = cls_states(model, inputs["input_ids"], inputs["attention_mask"])
+            for layer in layers:
+                features[layer].append(states[layer - 1].float().cpu())
+            category_logits = model.head_cat(states[-1])
+            urgency_logits = model.head_urg(states[-1])
+            category_targets.append(torch.softmax(category_logits.float(), dim=1).cpu())
+            urgency_targets.append(torch.softmax(urgency_logits.float(), dim=1).cpu())
+
+    features = {layer: torch.cat(chunks) for layer, chunks in features.items()}
+    category_targets = torch.cat(category_targets)
+    urgency_targets = torch.cat(urgency_targets)
+
+    heads = ExitHeads(
+        layers,
+        model.enc.config.hidden_size,
+        len(predictor.category_classes),
+        len(predictor.urgency_classes)
+    )
+    optimizer = torch.optim.AdamW(heads.parameters(), lr=lr)
+    heads.train()
+    for epoch in range(epochs):
+        order = torch.randperm(len(texts))
+        total = 0.0
+        for start in range(0, len(texts), batch_size):
+            rows = order[start:start + batch_size]
+            loss = 0.0
+            for layer in layers:
+                category_logits, urgency_logits = heads(layer, features[layer][rows])
+                loss = loss + F.kl_div(
+                    F.log_softmax(category_logits, dim=1), category_targets[rows], reduction="batchmean"
+                ) + F.kl_div(
+                    F.log_softmax(urgency_logits, dim=1), urgency_targets[rows], reduction="batchmean"
+                )
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            total += loss.item() * len(rows)
+        if (epoch + 1) % 10 == 0 or epoch == epochs - 1:
+            print(f"Epoch {epoch + 1}/{epochs}: loss {total / len(texts):.4f}")
+    heads.eval()
+    return heads
+
+
+def save_exit_heads(heads, path, model_version):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    torch.save({
+        "layers": heads.layers,
+        "state": heads.state_dict(),
+        "model_version": model_version,
+    }, path)
+
+
+class EarlyExitPredictor(ModelPredictor):
+    """ModelPredictor that lets confident texts leave the encoder at an intermediate layer"""
+
+    def __init__(self, precision=None, heads_path=None, threshold=None, model_path=None):
+        # Check the exit heads before loading the model, so a missing or mismatched file fails fast
+        self.heads_checkpoint = torch.load(
+            heads_path or settings.EARLY_EXIT_HEADS_PATH, map_location="cpu", weights_only=True
+        )
+        if self.heads_checkpoint["model_version"] != checkpoint_version(model_path or self._default_model_path()):
+            raise ValueError("Early-exit heads were trained for a different model checkpoint")
+        self.threshold = settings.EARLY_EXIT_THRESHOLD if threshold is None else threshold
+        self._exit_layers = Counter()
+        self._stats_lock = threading.Lock()
+        super().__init__(precision, model_path)
+        self.exit_heads = ExitHeads(
+            self.heads_checkpoint["layers"],
+            self.model.enc.config.hidden_size,
+            len(self.category_classes),
+            len(self.urgency_classes)
+        )
+        self.exit_heads.load_state_dict(self.heads_checkpoint["state"])
+        self.exit_heads.to(self.device).eval()
+        self.num_layers = len(self.model.enc.transformer.layer)
+
+    def swap_heads(self, checkpoint_path):
+        # The exit heads were trained to agree with the current heads, so texts leaving
+        # early would keep getting the old answers
+        raise ValueError(
+            "Head swapping is not supported with early exit; retrain the exit heads for the "
+            "new checkpoint and restart with it as MODEL_PATH"
+        )
+
+    def _predict_inputs(self, inputs):
+        """Run the encoder layer by layer, decoding each text at the first confident exit"""
+        return self._exit_inputs(inputs, analyze=False)
+
+    def _analyze_inputs(self, inputs):
+        """
+        Like _predict_inputs, keeping the probabilities of the exit each text left at.
+        Only texts that reach the last layer have the model's [CLS] embedding; the rest
+        carry none, rather than paying for the layers they skipped.
+        """
+        return self._exit_inputs(inputs, analyze=True)
+
+    def _exit_inputs(self, inputs, analyze):
+        encoder = self.model.enc
+        attention_mask = inputs["attention_mask"]
+        active = torch.arange(attention_mask.shape[0])
+        results = [None] * attention_mask.shape[0]
+
+        with torch.no_grad():
+            hidden = encoder.embeddings(inputs["input_ids"])
+            for depth, layer in enumerate(encoder.transformer.layer, start=1):
+                hidden = _run_layer(layer, hidden, _layer_mask(encoder, hidden, attention_mask))
+                if depth == self.num_layers:
+                    cls = hidden[:, 0]
+                    category_logits, urgency_logits = self.model.head_cat(cls), self.model.head_urg(cls)
+                elif depth in self.exit_heads.layers:
+                    category_logits, urgency_logits = self.exit_heads(depth, hidden[:, 0].float())
+                else:
+                    continue
+
+                predictions = self._decode(category_logits, urgency_logits)
+                if depth == self.num_layers:
+                    exiting = torch.ones(len(predictions), dtype=torch.bool)
+                else:
+                    exiting = torch.tensor([
+                        min(p["confidence_category"], p["confidence_urgency"]) >= self.threshold
+                        for p in predictions
+                    ])
+                rows = active.tolist()
+                if analyze:
+                    category_probs = torch.softmax(category_logits.float(), dim=1).tolist()
+                    urgency_probs = torch.softmax(urgency_logits.float(), dim=1).tolist()
+                    embeddings = cls.float().cpu().numpy() if depth == self.num_layers else None
+                for row in exiting.nonzero().flatten().tolist():
+                    results[rows[row]] = {**predictions[row], "exit_layer": depth}
+                    if analyze:
+                        results[rows[row]].update({
+                            "embedding": embeddings[row] if embeddings is not None else None,
+                            "category_probs": dict(zip(self.category_classes, category_probs[row])),
+                            "urgency_probs": dict(zip(self.urgency_classes, urgency_probs[row])),
+                            "model_version": self.model_version
+                        })
+
+                with self._stats_lock:
+                    self._exit_layers[depth] += int(exiting.sum())
+                remaining = ~exiting
+                if not remaining.any():
+                    break
+                keep = remaining.to(hidden.device)
+                hidden, attention_mask, active = hidden[keep], attention_mask[keep], active[remaining]
+        return results
+
+    def after_fork(self):
+        self._stats_lock = threading.Lock()
+
+    def stats(self):
+        with self._stats_lock:
+            exits = dict(sorted(self._exit_layers.items()))
+        total = sum(exits.values())
+        return {
+            **super().stats(),
+            "early_exit": {
+                "threshold": self.threshold,
+                "exit_layers": self.exit_heads.layers,
+                "exits_per_layer": exits,
+                "mean_exit_layer": sum(layer * n for layer, n in exits.items()) / total if total else None,
+            },
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train early-exit heads for the current checkpoint")
+    parser.add_argument("--csv", default=None, help="Complaints CSV to train on (defaults to data/complaints.csv)")
+    parser.add_argument("--limit", type=int, default=None, help="Only use the first N complaints")
+    parser.add_argument("--layers", type=int, nargs="+", default=None, help="Exit layers (default: all but the last)")
+    parser.add_argument("--epochs", type=int, default=30)
+    parser.add_argument("--output", default=settings.EARLY_EXIT_HEADS_PATH)
+    args = parser.parse_args()
+
+    predictor = ModelPredictor(precision="fp32")
+    texts = load_dataset(args.csv, args.limit)["complaint_text"].tolist()
+    heads = train_exit_heads(predictor, texts, args.layers, args.epochs)
+    save_exit_heads(heads, args.output, predictor.model_version)
+    print(f"Early-exit heads for layers {heads.layers} written to {args.output}")
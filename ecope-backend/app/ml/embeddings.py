@@ -0,0 +1,15 @@
+"""Compact storage format for the encoder's [CLS] embeddings."""
+import numpy as np
+
+# Half precision halves the storage of a 768-d DistilBERT vector to 1.5 KB
+EMBEDDING_DTYPE = np.float16
+
+
+def pack_embedding(vector):
+    """Serialize an embedding vector to bytes"""
+    return np.asarray(vector, dtype=EMBEDDING_DTYPE).tobytes()
+
+
+def unpack_embedding(blob):
+    """Deserialize bytes written by pack_embedding into a float32 vector"""
+    return np.frombuffer(blob, dtype=EMBEDDING_DTYPE).astype(np.float32)
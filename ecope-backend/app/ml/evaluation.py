@@ -0,0 +1,77 @@
+"""Helpers shared by the model parity, accuracy and latency scripts."""
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_DATASET = Path(__file__).parent.parent.parent / "data" / "complaints.csv"
+
+
+def load_dataset(csv_path=None, limit=None):
+    """Load the labelled complaints CSV (complaint_text, category, urgency)"""
+    df = pd.read_csv(csv_path or DEFAULT_DATASET)
+    df = df.dropna(subset=["complaint_text"])
+    if limit:
+        df = df.head(limit)
+    return df
+
+
+def predict_probabilities(predictor, texts, batch_size=32):
+    """Run the predictor's model over texts and return (category_probs, urgency_probs) arrays"""
+    import torch
+
+    category_probs, urgency_probs = [], []
+    for start in range(0, len(texts), batch_size):
+        inputs = predictor._tokenize(texts[start:start + batch_size])
+        with torch.no_grad():
+            category_logits, urgency_logits = predictor._forward(inputs)
+        category_probs.append(torch.softmax(category_logits.float(), dim=1).cpu().numpy())
+        urgency_probs.append(torch.softmax(urgency_logits.float(), dim=1).cpu().numpy())
+    return np.concatenate(category_probs), np.concatenate(urgency_probs)
+
+
+def accuracy(predictor, df, batch_size=32):
+    """Category and urgency accuracy of the predictor against the CSV labels"""
+    category_probs, urgency_probs = predict_probabilities(
+        predictor, df["complaint_text"].tolist(), batch_size
+    )
+    categories = np.array(predictor.category_classes)[category_probs.argmax(1)]
+    urgencies = np.array(predictor.urgency_classes)[urgency_probs.argmax(1)]
+    return {
+        "category_accuracy": float((categories == df["category"].to_numpy()).mean()),
+        "urgency_accuracy": float((urgencies == df["urgency"].to_numpy()).mean()),
+    }
+
+
+def latency_summary(samples_ms):
+    """Summarize a list of latencies in milliseconds"""
+    samples = np.asarray(samples_ms)
+    return {
+        "count": int(samples.size),
+        "mean_ms": float(samples.mean()),
+        "p50_ms": float(np.percentile(samples, 50)),
+        "p95_ms": float(np.percentile(samples, 95)),
+        "p99_ms": float(np.percentile(samples, 99)),
+    }
+
+
+def measure_single_latency(predictor, texts, warmup=3):
+    """Latency of one predict call per text"""
+    for text in texts[:warmup]:
+        predictor.predict(text)
+    samples = []
+    for text in texts:
+        start = time.perf_counter()
+        predictor.predict(text)
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return latency_summary(samples)
+
+
+def measure_throughput(predictor, texts, batch_size):
+    """Texts per second when classifying texts with predict_batch"""
+    predictor.predict_batch(texts[:batch_size], batch_size=batch_size)
+    start = time.perf_counter()
+    predictor.predict_batch(texts, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+    return {"batch_size": batch_size, "texts_per_second": len(texts) / elapsed}
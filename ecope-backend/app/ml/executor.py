@@ -0,0 +1,111 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.config import settings
+from app.ml.evaluation import latency_summary
+from app.ml.predictions import FALLBACK_PREDICTION
+from app.ml.predictor import get_model_predictor
+
+# Number of recent requests kept for the latency percentiles
+LATENCY_WINDOW = 1000
+
+
+class InferenceExecutor:
+    """
+    Bounded thread pool that runs blocking model calls off the asyncio event loop.
+
+    At most max_concurrency predictions run at once; the rest wait in the pool's
+    queue. Time spent waiting and time spent computing are recorded separately.
+    """
+
+    def __init__(self, max_concurrency):
+        self.max_concurrency = max(1, max_concurrency)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self._queue_wait_ms = deque(maxlen=LATENCY_WINDOW)
+        self._compute_ms = deque(maxlen=LATENCY_WINDOW)
+        self._pending = 0
+        self._completed = 0
+
+    async def run(self, fn, *args):
+        """Run fn(*args) on the pool and await its result"""
+        submitted = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self._pending -= 1
+                    self._completed += 1
+                    self._queue_wait_ms.append((started - submitted) * 1000.0)
+                    self._compute_ms.append((finished - started) * 1000.0)
+
+        with self._lock:
+            self._pending += 1
+        return await asyncio.wrap_future(self._pool.submit(task))
+
+    def stats(self):
+        with self._lock:
+            queue_wait = list(self._queue_wait_ms)
+            compute = list(self._compute_ms)
+            stats = {
+                "max_concurrency": self.max_concurrency,
+                "pending": self._pending,
+                "completed": self._completed,
+            }
+        stats["queue_wait"] = latency_summary(queue_wait) if queue_wait else None
+        stats["compute"] = latency_summary(compute) if compute else None
+        return stats
+
+
+inference_executor = None
+_inference_executor_lock = threading.Lock()
+
+
+def get_inference_executor():
+    """Get or create the inference executor singleton"""
+    global inference_executor
+    if inference_executor is None:
+        with _inference_executor_lock:
+            if inference_executor is None:
+                max_concurrency = settings.INFERENCE_CONCURRENCY
+                if max_concurrency <= 0:
+                    # Let enough callers through to fill a micro-batch
+                    max_concurrency = settings.INFERENCE_MAX_BATCH_SIZE if settings.INFERENCE_BATCHING_ENABLED else 2
+                inference_executor = InferenceExecutor(max_concurrency)
+    return inference_executor
+
+
+async def predict_async(text):
+    """Predict category and urgency for a complaint text without blocking the event loop"""
+    return await get_inference_executor().run(lambda: get_model_predictor().predict(text))
+
+
+async def predict_batch_async(texts):
+    """Predict many complaint texts without blocking the event loop"""
+    return await get_inference_executor().run(lambda: get_model_predictor().predict_batch(texts))
+
+
+def _analyze(text):
+    predictor = get_model_predictor()
+    if getattr(predictor, "supports_analysis", False):
+        return predictor.analyze_batch([text])[0]
+    # Engines without embeddings still report which model produced the labels
+    prediction = predictor.predict(text)
+    if prediction != FALLBACK_PREDICTION:
+        prediction["model_version"] = predictor.model_version
+    return prediction
+
+
+async def analyze_async(text):
+    """
+    Predict a complaint text without blocking the event loop, including its embedding,
+    probability vectors and model version when the engine provides them
+    """
+    return await get_inference_executor().run(_analyze, text)
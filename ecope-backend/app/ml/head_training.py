@@ -0,0 +1,201 @@
+"""
+Head-only retraining from stored embeddings.
+
+Staff corrections of a complaint's category or urgency are turned into training
+examples for head_cat and head_urg, using the [CLS] embeddings kept in
+complaint_inferences instead of running the encoder again. Uncorrected complaints
+are replayed with their stored probabilities as soft targets, so the heads do not
+drift away from what the model already gets right.
+
+The result is a new checkpoint with the same encoder weights. Its lineage lists the
+versions of the model it was derived from, whose stored embeddings stay valid for it.
+
+    python scripts/retrain_heads.py
+"""
+import copy
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from safetensors import safe_open
+
+from app.ml.bundle import WEIGHTS_FILE, is_bundle, read_bundle_labels, save_bundle
+
+
+def read_checkpoint_heads(checkpoint_path):
+    """Head weights, label classes and lineage of a model.pt checkpoint or bundle"""
+    checkpoint_path = Path(checkpoint_path)
+    if is_bundle(checkpoint_path):
+        labels = read_bundle_labels(checkpoint_path)
+        state = {}
+        with safe_open(str(checkpoint_path / WEIGHTS_FILE), framework="pt") as f:
+            for name in f.keys():
+                if name.startswith(("head_cat.", "head_urg.")):
+                    state[name] = f.get_tensor(name)
+        category_classes, urgency_classes = labels["category_classes"], labels["urgency_classes"]
+        lineage = labels.get("lineage", [])
+    else:
+        # The checkpoint includes LabelEncoder objects
+        checkpoint = torch.load(checkpoint_path, map_location="cpu", weights_only=False)
+        state = checkpoint["state"]
+        category_classes = [str(label) for label in checkpoint["le_cat"].classes_]
+        urgency_classes = [str(label) for label in checkpoint["le_urg"].classes_]
+        lineage = list(checkpoint.get("lineage", []))
+
+    return {
+        "head_cat": {name.split(".", 1)[1]: t for name, t in state.items() if name.startswith("head_cat.")},
+        "head_urg": {name.split(".", 1)[1]: t for name, t in state.items() if name.startswith("head_urg.")},
+        "category_classes": category_classes,
+        "urgency_classes": urgency_classes,
+        "lineage": lineage,
+    }
+
+
+def _split(n, holdout, generator):
+    order = torch.randperm(n, generator=generator)
+    n_holdout = int(round(n * holdout)) if n > 1 else 0
+    return order[n_holdout:], order[:n_holdout]
+
+
+def _accuracy(head, features, labels):
+    if len(labels) == 0:
+        return None
+    with torch.no_grad():
+        return float((head(features).argmax(1) == labels).float().mean())
+
+
+def _agreement(old_head, new_head, features):
+    if len(features) == 0:
+        return None
+    with torch.no_grad():
+        return float((old_head(features).argmax(1) == new_head(features).argmax(1)).float().mean())
+
+
+def train_heads(
+    model,
+    corrections,
+    replay,
+    holdout=0.2,
+    replay_weight=1.0,
+    epochs=200,
+    lr=1e-3,
+    weight_decay=1e-4,
+    seed=0
+):
+    """
+    Fine-tune copies of model.head_cat and model.head_urg on stored embeddings.
+
+    corrections maps "category" and "urgency" to (embeddings, class indexes) arrays of
+    corrected complaints; replay is (embeddings, category_probs, urgency_probs) of
+    uncorrected ones. A holdout of each is used to compare the old and new heads.
+    Returns (head_cat, head_urg, report).
+    """
+    generator = torch.Generator().manual_seed(seed)
+    old_heads = {
+        "category": copy.deepcopy(model.head_cat).float().cpu().eval(),
+        "urgency": copy.deepcopy(model.head_urg).float().cpu().eval(),
+    }
+    hidden_size = model.head_cat.in_features
+    new_heads = {task: nn.Linear(head.in_features, head.out_features) for task, head in old_heads.items()}
+    for task, head in new_heads.items():
+        head.load_state_dict(old_heads[task].state_dict())
+
+    train, validation = {}, {}
+    for task, (features, labels) in corrections.items():
+        features = torch.as_tensor(np.asarray(features), dtype=torch.float32).reshape(-1, hidden_size)
+        labels = torch.as_tensor(np.asarray(labels), dtype=torch.long)
+        train_rows, holdout_rows = _split(len(labels), holdout, generator)
+        train[task] = (features[train_rows], labels[train_rows])
+        validation[task] = (features[holdout_rows], labels[holdout_rows])
+
+    replay_features = torch.as_tensor(np.asarray(replay[0]), dtype=torch.float32).reshape(-1, hidden_size)
+    replay_targets = {
+        "category": torch.as_tensor(np.asarray(replay[1]), dtype=torch.float32),
+        "urgency": torch.as_tensor(np.asarray(replay[2]), dtype=torch.float32),
+    }
+    replay_train, replay_holdout = _split(len(replay_features), holdout, generator)
+
+    optimizer = torch.optim.AdamW(
+        [p for head in new_heads.values() for p in head.parameters()], lr=lr, weight_decay=weight_decay
+    )
+    for task in new_heads:
+        new_heads[task].train()
+    for _ in range(epochs):
+        loss = 0.0
+        for task, head in new_heads.items():
+            features, labels = train[task]
+            if len(labels):
+                loss = loss + F.cross_entropy(head(features), labels)
+            if len(replay_train):
+                loss = loss + replay_weight * F.cross_entropy(
+                    head(replay_features[replay_train]), replay_targets[task][replay_train]
+                )
+        if not torch.is_tensor(loss):
+            break
+        optimizer.zero_grad()
+        loss.backward()
+        optimizer.step()
+    for task in new_heads:
+        new_heads[task].eval()
+
+    report = {"epochs": epochs}
+    for task in new_heads:
+        features, labels = validation[task]
+        report[task] = {
+            "corrections": len(train[task][1]) + len(labels),
+            "holdout": len(labels),
+            "holdout_accuracy_before": _accuracy(old_heads[task], features, labels),
+            "holdout_accuracy_after": _accuracy(new_heads[task], features, labels),
+            "replay_agreement": _agreement(old_heads[task], new_heads[task], replay_features[replay_holdout]),
+        }
+    return new_heads["category"], new_heads["urgency"], report
+
+
+def is_improvement(report):
+    """Whether the new heads are at least as accurate as the old ones on every holdout"""
+    for task in ("category", "urgency"):
+        before = report[task]["holdout_accuracy_before"]
+        after = report[task]["holdout_accuracy_after"]
+        if before is not None and after < before:
+            return False
+    return True
+
+
+def save_retrained_checkpoint(predictor, head_cat, head_urg, output_dir, metadata=None):
+    """
+    Write a versioned copy of the predictor's checkpoint with new heads, in the same
+    format as the checkpoint it was loaded from. Returns the checkpoint path.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    name = f"heads-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+    metadata = {
+        "lineage": predictor.embedding_versions,
+        "parent": str(predictor.model_path),
+        **(metadata or {})
+    }
+
+    if is_bundle(predictor.model_path):
+        # Shallow copy sharing the encoder, with the new heads in place
+        model = copy.copy(predictor.model)
+        model._modules = dict(predictor.model._modules)
+        model.head_cat, model.head_urg = head_cat, head_urg
+        return save_bundle(
+            model,
+            predictor.tokenizer,
+            predictor.category_classes,
+            predictor.urgency_classes,
+            output_dir / name,
+            metadata=metadata
+        )
+
+    state = dict(predictor.model.state_dict())
+    state.update({f"head_cat.{k}": v for k, v in head_cat.state_dict().items()})
+    state.update({f"head_urg.{k}": v for k, v in head_urg.state_dict().items()})
+    path = output_dir / f"{name}.pt"
+    torch.save({"state": state, "le_cat": predictor.le_cat, "le_urg": predictor.le_urg, **metadata}, path)
+    print(f"Retrained checkpoint written to {path}")
+    return path
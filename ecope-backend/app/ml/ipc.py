@@ -0,0 +1,209 @@
+"""
+Binary protocol between API workers and the model server, and the worker-side client.
+
+Every message is a frame: a big-endian uint32 payload length followed by the payload.
+A length over MAX_FRAME_SIZE closes the connection instead of being read.
+
+    request   op:uint8  count:uint32  (length:uint32 utf8-text) * count
+    response  status:uint8  body
+
+A successful PREDICT body is count:uint32 followed by one 10-byte record per text:
+category:uint8 urgency:uint8 confidence_category:float32 confidence_urgency:float32,
+where category and urgency index into the Category and Urgency enums. INFO and
+STATS bodies are JSON; an ERROR body is a utf8 message.
+"""
+import json
+import socket
+import struct
+import threading
+
+from app.ml.predictions import FALLBACK_PREDICTION
+from app.models.domain.complaint import Category, Urgency
+
+OP_PREDICT = 1
+OP_INFO = 2
+OP_STATS = 3
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+# Largest frame either side accepts; a bigger length prefix means a corrupt or hostile
+# peer, and reading it would allocate up to 4 GiB
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+FRAME_HEADER = struct.Struct(">I")
+REQUEST_HEADER = struct.Struct(">BI")
+TEXT_HEADER = struct.Struct(">I")
+PREDICTION = struct.Struct(">BBff")
+
+CATEGORIES = list(Category)
+URGENCIES = list(Urgency)
+CATEGORY_INDEX = {category.value: i for i, category in enumerate(CATEGORIES)}
+URGENCY_INDEX = {urgency.value: i for i, urgency in enumerate(URGENCIES)}
+
+
+def _recv_exact(sock, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:])
+        if n == 0:
+            raise ConnectionError("Model server connection closed")
+        received += n
+    return bytes(buffer)
+
+
+class FrameTooLarge(ConnectionError):
+    """A frame over MAX_FRAME_SIZE; the connection cannot be used after it"""
+
+
+def send_frame(sock, payload):
+    if len(payload) > MAX_FRAME_SIZE:
+        raise FrameTooLarge(f"Frame of {len(payload)} bytes exceeds {MAX_FRAME_SIZE}")
+    sock.sendall(FRAME_HEADER.pack(len(payload)) + payload)
+
+
+def recv_frame(sock):
+    (length,) = FRAME_HEADER.unpack(_recv_exact(sock, FRAME_HEADER.size))
+    if length > MAX_FRAME_SIZE:
+        raise FrameTooLarge(f"Frame of {length} bytes exceeds {MAX_FRAME_SIZE}")
+    return _recv_exact(sock, length)
+
+
+def encode_request(op, texts=()):
+    parts = [REQUEST_HEADER.pack(op, len(texts))]
+    for text in texts:
+        data = text.encode("utf-8")
+        parts.append(TEXT_HEADER.pack(len(data)))
+        parts.append(data)
+    return b"".join(parts)
+
+
+def decode_request(payload):
+    op, count = REQUEST_HEADER.unpack_from(payload)
+    offset = REQUEST_HEADER.size
+    texts = []
+    for _ in range(count):
+        (length,) = TEXT_HEADER.unpack_from(payload, offset)
+        offset += TEXT_HEADER.size
+        texts.append(payload[offset:offset + length].decode("utf-8"))
+        offset += length
+    return op, texts
+
+
+def encode_predictions(predictions):
+    parts = [bytes([STATUS_OK]), FRAME_HEADER.pack(len(predictions))]
+    for prediction in predictions:
+        parts.append(PREDICTION.pack(
+            CATEGORY_INDEX.get(prediction["category"], CATEGORY_INDEX["Other"]),
+            URGENCY_INDEX.get(prediction["urgency"], URGENCY_INDEX["Medium"]),
+            prediction["confidence_category"],
+            prediction["confidence_urgency"]
+        ))
+    return b"".join(parts)
+
+
+def decode_predictions(body):
+    (count,) = FRAME_HEADER.unpack_from(body)
+    predictions = []
+    for category, urgency, confidence_category, confidence_urgency in PREDICTION.iter_unpack(
+        body[FRAME_HEADER.size:FRAME_HEADER.size + count * PREDICTION.size]
+    ):
+        predictions.append({
+            "category": CATEGORIES[category].value,
+            "urgency": URGENCIES[urgency].value,
+            "confidence_category": confidence_category,
+            "confidence_urgency": confidence_urgency
+        })
+    return predictions
+
+
+def encode_json(data):
+    return bytes([STATUS_OK]) + json.dumps(data).encode("utf-8")
+
+
+def encode_error(message):
+    return bytes([STATUS_ERROR]) + message.encode("utf-8")
+
+
+class RemoteModelPredictor:
+    """
+    Client for the model server with the same interface as ModelPredictor.
+    Each thread keeps its own connection to the Unix domain socket.
+    """
+
+    model_path = None
+
+    def __init__(self, socket_path, timeout=30.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._model_version = None
+
+    def after_fork(self):
+        # Never share the parent's sockets with a forked worker
+        self._local = threading.local()
+        self._model_version = None
+
+    def _connection(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            # The server may have restarted with another model since the version was read
+            self._model_version = None
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def _call(self, op, texts=()):
+        request = encode_request(op, texts)
+        # Retry once on a fresh connection in case the server restarted
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                send_frame(sock, request)
+                response = recv_frame(sock)
+                break
+            except OSError:
+                self._close()
+                if attempt:
+                    raise
+        status, body = response[0], response[1:]
+        if status != STATUS_OK:
+            raise RuntimeError(f"Model server error: {body.decode('utf-8')}")
+        return body
+
+    @property
+    def model_version(self):
+        """Version served by the model server, read once per connection to it"""
+        version = self._model_version
+        if version is None:
+            version = self._model_version = json.loads(self._call(OP_INFO))["model_version"]
+        return version
+
+    def predict(self, text):
+        """Predict category and urgency for a complaint text"""
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts, batch_size=None):
+        """Predict category and urgency for many complaint texts"""
+        try:
+            return decode_predictions(self._call(OP_PREDICT, texts))
+        except Exception as e:
+            print("Remote prediction failed:", e)
+            return [dict(FALLBACK_PREDICTION) for _ in texts]
+
+    def stats(self):
+        try:
+            server = json.loads(self._call(OP_STATS))
+        except Exception as e:
+            server = {"error": str(e)}
+        return {"model_server": self.socket_path, **server}
@@ -1,17 +1,52 @@
+import copy
 import torch
 import torch.nn as nn
 from transformers import AutoTokenizer, AutoModel
 from pathlib import Path
 from app.core.config import settings
+from app.ml.bundle import WEIGHTS_FILE, is_bundle, load_bundle, read_bundle_labels
+from app.ml.predictions import ANALYSIS_KEYS, FALLBACK_PREDICTION, prediction_view
+from app.ml.predictor import DummyPredictor, checkpoint_version
 from app.models.domain.complaint import Category, Urgency
 from sklearn.preprocessing._label import LabelEncoder as LabelEncoderClass
 
 
+PRECISIONS = ("fp32", "bf16", "dynamic-int8")
+
+
+def apply_precision(model, precision, device):
+    """
+    Convert a loaded fp32 model to the requested inference precision.
+    dynamic-int8 quantizes the weights of every Linear layer (CPU only),
+    bf16 casts all weights to bfloat16.
+    """
+    if precision == "fp32":
+        return model
+    if precision == "bf16":
+        return model.to(torch.bfloat16)
+    if precision == "dynamic-int8":
+        if device.type != "cpu":
+            print("Dynamic int8 quantization is only supported on CPU, keeping fp32")
+            return model
+        return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+    raise ValueError(f"Unknown MODEL_PRECISION {precision!r}, expected one of {', '.join(PRECISIONS)}")
+
+
+def length_buckets(lengths, batch_size):
+    """Group sequence indexes into batches of similar length, shortest first"""
+    order = sorted(range(len(lengths)), key=lengths.__getitem__)
+    return [order[start:start + batch_size] for start in range(0, len(order), batch_size)]
+
+
 class MultiTaskModel(nn.Module):
-    def __init__(self, num_genres, num_priority):
+    def __init__(self, num_genres, num_priority, encoder_config=None):
         super().__init__()
         print("Initializing MultiTaskModel with", num_genres, "categories and", num_priority, "urgency classes")
-        self.enc = AutoModel.from_pretrained(settings.MODEL)
+        if encoder_config is None:
+            self.enc = AutoModel.from_pretrained(settings.MODEL)
+        else:
+            # Architecture only; the weights are loaded from a model bundle
+            self.enc = AutoModel.from_config(encoder_config)
         h = self.enc.config.hidden_size
         self.drop = nn.Dropout(0.3)
         self.head_cat = nn.Linear(h, num_genres)
@@ -24,26 +59,68 @@ class MultiTaskModel(nn.Module):
 
 
 class ModelPredictor:
-    def __init__(self):
+    engine = "torch"
+    # Whether analyze_batch can return embeddings and probability vectors
+    supports_analysis = True
+    # Versions of earlier checkpoints that share this model's encoder weights
+    # (set by head-only retraining), so their stored embeddings are still valid
+    lineage = []
+
+    def __init__(self, precision=None, model_path=None):
+        self.precision = precision or settings.MODEL_PRECISION
+        self.model_path = Path(model_path or self._default_model_path())
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         print("Using device:", self.device)
 
-        # Load tokenizer
+        # Load tokenizer, from the model bundle when the model path points to one
+        tokenizer_source = self.model_path if is_bundle(self.model_path) else settings.MODEL
         try:
-            self.tokenizer = AutoTokenizer.from_pretrained(settings.MODEL)
+            self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_source)
             print("Tokenizer loaded successfully")
         except Exception as e:
             print("Failed to load tokenizer:", e)
             raise
 
+        # Load model and label classes
+        self._load_model()
+
+        # Enum validation
+        self.category_values = {cat.value for cat in Category}
+        self.urgency_values = {urg.value for urg in Urgency}
+
+        # Index -> validated label tables, so decoding a batch is a list lookup
+        # instead of a LabelEncoder.inverse_transform call per item
+        self.category_labels = [
+            label if label in self.category_values else "Other"
+            for label in self.category_classes
+        ]
+        self.urgency_labels = [
+            label if label in self.urgency_values else "Medium"
+            for label in self.urgency_classes
+        ]
+
+    @staticmethod
+    def _default_model_path():
+        return settings.MODEL_PATH
+
+    def _load_model(self):
+        """Load the checkpoint at model_path into an eager PyTorch MultiTaskModel"""
         # Add safe globals for label encoder
         torch.serialization.add_safe_globals([LabelEncoderClass])
 
-        # Check MODEL_PATH
-        model_path = Path(settings.MODEL_PATH)
+        # Check the model path
+        model_path = self.model_path
         print("Checking model path:", model_path)
         if not model_path.exists():
             raise FileNotFoundError(f"Model file not found at {model_path}")
+        self.model_version = checkpoint_version(model_path)
+
+        if is_bundle(model_path):
+            self.model, self.category_classes, self.urgency_classes = load_bundle(model_path, self.device)
+            self.lineage = read_bundle_labels(model_path).get("lineage", [])
+            self.model = apply_precision(self.model, self.precision, self.device)
+            print(f"Model bundle loaded successfully ({self.precision})")
+            return
 
         try:
             # Load checkpoint
@@ -56,102 +133,284 @@ class ModelPredictor:
             self.le_urg = checkpoint.get('le_urg')
             if self.le_cat is None or self.le_urg is None:
                 raise ValueError("Label encoders not found in checkpoint")
+            self.category_classes = [str(label) for label in self.le_cat.classes_]
+            self.urgency_classes = [str(label) for label in self.le_urg.classes_]
+            self.lineage = list(checkpoint.get("lineage", []))
 
             # Initialize model
             self.model = MultiTaskModel(
-                num_genres=len(self.le_cat.classes_),
-                num_priority=len(self.le_urg.classes_)
+                num_genres=len(self.category_classes),
+                num_priority=len(self.urgency_classes)
             )
 
             # Load model weights
             self.model.load_state_dict(checkpoint['state'])
             self.model.to(self.device)
             self.model.eval()
-            print("Model loaded successfully")
+            self.model = apply_precision(self.model, self.precision, self.device)
+            print(f"Model loaded successfully ({self.precision})")
 
         except Exception as e:
             print(f"Error loading model: {str(e)}")
             raise
 
-        # Enum validation
-        self.category_values = {cat.value for cat in Category}
-        self.urgency_values = {urg.value for urg in Urgency}
+    @property
+    def embedding_versions(self):
+        """Model versions whose stored embeddings this model's encoder reproduces"""
+        return [*self.lineage, self.model_version]
+
+    def swap_heads(self, checkpoint_path):
+        """
+        Replace head_cat and head_urg with those of a head-retrained checkpoint of this
+        encoder, without reloading the encoder. Requests already running finish on the
+        old heads.
+        """
+        from app.ml.head_training import read_checkpoint_heads
+
+        heads = read_checkpoint_heads(checkpoint_path)
+        if heads["category_classes"] != self.category_classes or heads["urgency_classes"] != self.urgency_classes:
+            raise ValueError("Checkpoint was trained for different label classes")
+        if not set(heads["lineage"]) & set(self.embedding_versions):
+            raise ValueError("Checkpoint was not retrained from this model's encoder")
+
+        hidden_size = self.model.enc.config.hidden_size
+        new_heads = nn.ModuleDict({
+            "cat": nn.Linear(hidden_size, len(self.category_classes)),
+            "urg": nn.Linear(hidden_size, len(self.urgency_classes))
+        })
+        new_heads["cat"].load_state_dict(heads["head_cat"])
+        new_heads["urg"].load_state_dict(heads["head_urg"])
+        new_heads = apply_precision(new_heads.to(self.device).eval(), self.precision, self.device)
+
+        # Swap in a shallow copy sharing the encoder, so both heads change in one assignment
+        model = copy.copy(self.model)
+        model._modules = dict(self.model._modules)
+        model.head_cat, model.head_urg = new_heads["cat"], new_heads["urg"]
+        self.model = model
+        self.model_path = Path(checkpoint_path)
+        self.model_version = checkpoint_version(checkpoint_path)
+        self.lineage = heads["lineage"]
+        print(f"Swapped in classification heads from {checkpoint_path}")
 
     def predict(self, text):
         """Predict category and urgency for a complaint text"""
         try:
-            # Tokenize input
-            inputs = self.tokenizer(
-                text,
-                return_tensors="pt",
-                truncation=True,
-                padding=True,
-                max_length=512
-            ).to(self.device)
-
-            with torch.no_grad():
-                category_logits, urgency_logits = self.model(**inputs)
-
-                # Predicted indices
-                category_idx = category_logits.argmax(1).item()
-                urgency_idx = urgency_logits.argmax(1).item()
-
-                # Probabilities
-                category_probs = torch.softmax(category_logits, dim=1)
-                urgency_probs = torch.softmax(urgency_logits, dim=1)
-                confidence_category = category_probs[0][category_idx].item()
-                confidence_urgency = urgency_probs[0][urgency_idx].item()
-
-                # Map indices to labels
-                category = self.le_cat.inverse_transform([category_idx])[0]
-                urgency = self.le_urg.inverse_transform([urgency_idx])[0]
-
-                # Validate enums
-                if category not in self.category_values:
-                    category = "Other"
-                if urgency not in self.urgency_values:
-                    urgency = "Medium"
-
-                return {
-                    "category": category,
-                    "urgency": urgency,
-                    "confidence_category": confidence_category,
-                    "confidence_urgency": confidence_urgency
-                }
-
+            return self._predict_texts([text])[0]
         except Exception as e:
             print("Prediction failed:", e)
-            return {
-                "category": "Other",
-                "urgency": "Medium",
-                "confidence_category": 1.0,
-                "confidence_urgency": 1.0
+            return dict(FALLBACK_PREDICTION)
+
+    def predict_batch(self, texts, batch_size=None):
+        """
+        Predict category and urgency for many complaint texts.
+
+        Texts are tokenized once, sorted by token length and split into buckets of
+        batch_size, so each bucket is only padded to its own longest member.
+        Results are returned in the original order.
+        """
+        return self._run_bucketed(texts, batch_size, self._predict_inputs)
+
+    def analyze_batch(self, texts, batch_size=None):
+        """
+        Like predict_batch, but each prediction also carries the encoder's [CLS]
+        embedding, the full category and urgency probability vectors and the model
+        version, so they can be stored alongside the complaint.
+        """
+        return self._run_bucketed(texts, batch_size, self._analyze_inputs)
+
+    def _run_bucketed(self, texts, batch_size, predict_inputs):
+        """Tokenize texts once and run predict_inputs on length buckets, keeping the input order"""
+        batch_size = batch_size or settings.INFERENCE_BATCH_SIZE
+        results = [None] * len(texts)
+        if not texts:
+            return results
+
+        encoded = self.tokenizer(
+            list(texts),
+            truncation=True,
+            max_length=settings.INFERENCE_MAX_LENGTH
+        )
+        lengths = [len(ids) for ids in encoded["input_ids"]]
+        for bucket in length_buckets(lengths, batch_size):
+            try:
+                inputs = self._pad([encoded["input_ids"][i] for i in bucket])
+                predictions = predict_inputs(inputs)
+            except Exception as e:
+                print("Batch prediction failed:", e)
+                predictions = [dict(FALLBACK_PREDICTION) for _ in bucket]
+            for i, prediction in zip(bucket, predictions):
+                results[i] = prediction
+        return results
+
+    def _predict_texts(self, texts):
+        """Run one padded forward pass over a list of texts"""
+        return self._predict_inputs(self._tokenize(texts))
+
+    def _analyze_texts(self, texts):
+        """Run one padded forward pass over a list of texts, keeping the analysis fields"""
+        return self._analyze_inputs(self._tokenize(texts))
+
+    def _predict_inputs(self, inputs):
+        """Run the model on a tokenized batch and decode the labels"""
+        with torch.no_grad():
+            category_logits, urgency_logits = self._forward(inputs)
+        return self._decode(category_logits, urgency_logits)
+
+    def _analyze_inputs(self, inputs):
+        """Run the model on a tokenized batch, keeping the [CLS] embeddings and probabilities"""
+        with torch.no_grad():
+            embeddings = self.model.enc(inputs["input_ids"], attention_mask=inputs["attention_mask"])[0][:, 0]
+            x = self.model.drop(embeddings)
+            category_logits, urgency_logits = self.model.head_cat(x), self.model.head_urg(x)
+
+        predictions = self._decode(category_logits, urgency_logits)
+        category_probs = torch.softmax(category_logits.float(), dim=1).tolist()
+        urgency_probs = torch.softmax(urgency_logits.float(), dim=1).tolist()
+        embeddings = embeddings.float().cpu().numpy()
+        for i, prediction in enumerate(predictions):
+            prediction.update({
+                "embedding": embeddings[i],
+                "category_probs": dict(zip(self.category_classes, category_probs[i])),
+                "urgency_probs": dict(zip(self.urgency_classes, urgency_probs[i])),
+                "model_version": self.model_version
+            })
+        return predictions
+
+    def _decode(self, category_logits, urgency_logits):
+        """Turn a batch of logits into prediction dicts"""
+        # Probabilities
+        category_probs = torch.softmax(category_logits.float(), dim=1)
+        urgency_probs = torch.softmax(urgency_logits.float(), dim=1)
+        confidence_category, category_idx = category_probs.max(dim=1)
+        confidence_urgency, urgency_idx = urgency_probs.max(dim=1)
+
+        return [
+            {
+                "category": self.category_labels[cat],
+                "urgency": self.urgency_labels[urg],
+                "confidence_category": conf_cat,
+                "confidence_urgency": conf_urg
             }
+            for cat, urg, conf_cat, conf_urg in zip(
+                category_idx.tolist(),
+                urgency_idx.tolist(),
+                confidence_category.tolist(),
+                confidence_urgency.tolist()
+            )
+        ]
+
+    def _tokenize(self, texts):
+        """Tokenize texts into a batch padded to its longest member on the model device"""
+        return self.tokenizer(
+            texts,
+            return_tensors="pt",
+            truncation=True,
+            padding=True,
+            max_length=settings.INFERENCE_MAX_LENGTH,
+            pad_to_multiple_of=settings.INFERENCE_PAD_TO_MULTIPLE_OF or None
+        ).to(self.device)
+
+    def _pad(self, input_ids):
+        """Pad already tokenized sequences into a batch on the model device"""
+        return self.tokenizer.pad(
+            {"input_ids": input_ids},
+            padding=True,
+            pad_to_multiple_of=settings.INFERENCE_PAD_TO_MULTIPLE_OF or None,
+            return_tensors="pt"
+        ).to(self.device)
 
+    def _forward(self, inputs):
+        """Return (category_logits, urgency_logits) for a tokenized batch"""
+        return self.model(inputs["input_ids"], attention_mask=inputs["attention_mask"])
 
-# Singleton instance
-model_predictor = None
+    def after_fork(self):
+        """Called in a forked worker process that inherited this predictor"""
 
-def get_model_predictor():
-    """Get or create model predictor singleton"""
-    global model_predictor
-    if model_predictor is None:
+    def close(self):
+        """Called when the predictor is swapped out for another model version"""
+
+    def stats(self):
+        """Runtime information exposed on the model stats endpoint"""
+        return {
+            "engine": self.engine,
+            "device": str(self.device),
+            "precision": self.precision,
+            "model_version": self.model_version
+        }
+
+
+def build_active_predictor():
+    """Local predictor for the version activated in the model registry, else MODEL_PATH"""
+    from app.ml.registry import ModelRegistry
+    active = ModelRegistry().active()
+    if active is not None:
+        print(f"Loading model version {active['version']} from the registry")
+        return build_local_predictor(model_path=active["path"], engine=active["engine"])
+    return build_local_predictor()
+
+
+def _build_early_exit_predictor(model_path=None):
+    from app.ml.early_exit import EarlyExitPredictor
+    try:
+        return EarlyExitPredictor(model_path=model_path)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Early-exit heads not usable, running the full model: {str(e)}")
+        return ModelPredictor(model_path=model_path)
+
+
+def build_local_predictor(model_path=None, engine=None, fallback=True):
+    """
+    Load the model in this process, wrapped in the configured batching and caching layers.
+    model_path and engine default to the settings; with fallback=False a model that
+    fails to load raises instead of being replaced by the DummyPredictor.
+    """
+    engine = engine or settings.MODEL_ENGINE
+    try:
+        if engine == "onnx":
+            from app.ml.onnx_engine import OnnxModelPredictor
+            predictor = OnnxModelPredictor(model_path=model_path)
+        elif settings.EARLY_EXIT_ENABLED:
+            predictor = _build_early_exit_predictor(model_path)
+        else:
+            predictor = ModelPredictor(model_path=model_path)
+        print("Model predictor initialized successfully")
+    except Exception as e:
+        print(f"Failed to initialize model predictor: {str(e)}")
+        if not fallback:
+            raise
+        print("Using dummy predictor as fallback")
+        return DummyPredictor()
+
+    if settings.INFERENCE_BATCHING_ENABLED:
+        from app.ml.batching import BatchingPredictor
+        predictor = BatchingPredictor(
+            predictor,
+            max_batch_size=settings.INFERENCE_MAX_BATCH_SIZE,
+            max_wait_ms=settings.INFERENCE_MAX_WAIT_MS
+        )
+        print("Inference micro-batching enabled")
+
+    if settings.CASCADE_ENABLED:
         try:
-            model_predictor = ModelPredictor()
-            print("Model predictor initialized successfully")
+            from app.ml.cascade import CascadePredictor, FirstStageClassifier
+            predictor = CascadePredictor(
+                predictor,
+                FirstStageClassifier.load(settings.CASCADE_MODEL_PATH),
+                threshold=settings.CASCADE_THRESHOLD
+            )
+            print("Classifier cascade enabled")
         except Exception as e:
-            print(f"Failed to initialize model predictor: {str(e)}")
-            # Fallback dummy predictor
-            class DummyPredictor:
-                def predict(self, text):
-                    return {
-                        "category": "Other",
-                        "urgency": "Medium",
-                        "confidence_category": 1.0,
-                        "confidence_urgency": 1.0
-                    }
-            model_predictor = DummyPredictor()
-            print("Using dummy predictor as fallback")
-    return model_predictor
-
+            print(f"Failed to load cascade first stage, using the model only: {str(e)}")
 
+    if settings.PREDICTION_CACHE_ENABLED:
+        from app.ml.cache import CachedPredictor, PredictionCache
+        predictor = CachedPredictor(
+            predictor,
+            PredictionCache(
+                max_entries=settings.PREDICTION_CACHE_MAX_ENTRIES,
+                ttl_seconds=settings.PREDICTION_CACHE_TTL_SECONDS
+            ),
+            analyze=settings.STORE_MODEL_OUTPUTS
+        )
+        print("Prediction cache enabled")
+    return predictor
@@ -0,0 +1,85 @@
+"""
+Standalone model server.
+
+One process owns the classifier and serves every API worker over a Unix domain
+socket (see app/ml/ipc.py for the protocol), so N workers share a single copy of
+the model and requests from different workers can be micro-batched together.
+
+    python -m app.ml.model_server --socket /tmp/scope-model.sock
+"""
+import argparse
+import os
+import socketserver
+import stat
+
+from app.core.config import settings
+from app.ml.ipc import (
+    OP_INFO,
+    OP_PREDICT,
+    OP_STATS,
+    decode_request,
+    encode_error,
+    encode_json,
+    encode_predictions,
+    recv_frame,
+    send_frame,
+)
+from app.ml.model import build_active_predictor
+
+
+class ModelRequestHandler(socketserver.BaseRequestHandler):
+    """Serves one worker connection until it disconnects"""
+
+    def handle(self):
+        predictor = self.server.predictor
+        while True:
+            try:
+                payload = recv_frame(self.request)
+            except ConnectionError:
+                return
+
+            try:
+                op, texts = decode_request(payload)
+                if op == OP_PREDICT:
+                    response = encode_predictions(predictor.predict_batch(texts))
+                elif op == OP_INFO:
+                    response = encode_json({"model_version": predictor.model_version})
+                elif op == OP_STATS:
+                    response = encode_json({"predictor": type(predictor).__name__, **predictor.stats()})
+                else:
+                    response = encode_error(f"Unknown operation {op}")
+            except Exception as e:
+                print("Model server request failed:", e)
+                response = encode_error(str(e))
+            send_frame(self.request, response)
+
+
+class ModelServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, predictor):
+        self.predictor = predictor
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, ModelRequestHandler)
+        # Only the owner and its group (the API workers) may connect
+        os.chmod(socket_path, stat.S_IRUSR | stat.S_IWUSR | stat.S_IRGRP | stat.S_IWGRP)
+
+
+def serve(socket_path):
+    predictor = build_active_predictor()
+    server = ModelServer(socket_path, predictor)
+    print(f"Model server listening on {socket_path}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the complaint classifier over a Unix domain socket")
+    parser.add_argument("--socket", default=settings.MODEL_SERVER_SOCKET or "/tmp/scope-model.sock")
+    args = parser.parse_args()
+    serve(args.socket)
@@ -0,0 +1,133 @@
+import argparse
+import json
+from pathlib import Path
+
+import torch
+
+from app.core.config import settings
+from app.ml.model import ModelPredictor, checkpoint_version
+
+INPUT_NAMES = ["input_ids", "attention_mask"]
+OUTPUT_NAMES = ["category_logits", "urgency_logits"]
+
+
+def export_onnx(output_path=None, opset_version=17):
+    """
+    Export the checkpoint at MODEL_PATH (encoder plus both heads) to an ONNX graph
+    with dynamic batch and sequence axes. The label classes are stored in the graph
+    metadata so the ONNX engine does not need to unpickle the checkpoint.
+    """
+    import onnx
+
+    output_path = Path(output_path or settings.ONNX_MODEL_PATH)
+    predictor = ModelPredictor(precision="fp32")
+    model = predictor.model.cpu().eval()
+
+    sample = predictor.tokenizer(
+        ["The wifi in my room keeps disconnecting.", "Broken chair."],
+        return_tensors="pt",
+        padding=True
+    )
+    dynamic_axes = {
+        "input_ids": {0: "batch", 1: "sequence"},
+        "attention_mask": {0: "batch", 1: "sequence"},
+        "category_logits": {0: "batch"},
+        "urgency_logits": {0: "batch"},
+    }
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"]),
+            str(output_path),
+            input_names=INPUT_NAMES,
+            output_names=OUTPUT_NAMES,
+            dynamic_axes=dynamic_axes,
+            opset_version=opset_version
+        )
+
+    graph = onnx.load(str(output_path))
+    metadata = {
+        "category_classes": json.dumps(predictor.category_classes),
+        "urgency_classes": json.dumps(predictor.urgency_classes),
+        "source_checkpoint": str(Path(settings.MODEL_PATH).resolve()),
+    }
+    for key, value in metadata.items():
+        entry = graph.metadata_props.add()
+        entry.key = key
+        entry.value = value
+    onnx.save(graph, str(output_path))
+    print(f"Exported ONNX model to {output_path}")
+    return output_path
+
+
+class OnnxModelPredictor(ModelPredictor):
+    """ModelPredictor that runs the exported graph through onnxruntime on CPU"""
+
+    engine = "onnx"
+    # The exported graph only outputs the logits
+    supports_analysis = False
+
+    @staticmethod
+    def _default_model_path():
+        return settings.ONNX_MODEL_PATH
+
+    def _load_model(self):
+        self.device = torch.device("cpu")
+        self.precision = "fp32"
+        onnx_path = self.model_path
+        print("Checking ONNX model path:", onnx_path)
+        if not onnx_path.exists():
+            raise FileNotFoundError(
+                f"ONNX model not found at {onnx_path}, export it with `python -m app.ml.onnx_engine`"
+            )
+
+        self.session = self._create_session()
+        self.model_version = checkpoint_version(onnx_path)
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        if "category_classes" not in metadata or "urgency_classes" not in metadata:
+            raise ValueError("Label classes not found in ONNX model metadata")
+        self.category_classes = json.loads(metadata["category_classes"])
+        self.urgency_classes = json.loads(metadata["urgency_classes"])
+        print("ONNX model loaded successfully")
+
+    def _create_session(self):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = settings.ONNX_INTRA_OP_THREADS
+        options.inter_op_num_threads = settings.ONNX_INTER_OP_THREADS
+
+        return ort.InferenceSession(
+            str(self.model_path),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+
+    def after_fork(self):
+        # onnxruntime thread pools are not fork-safe, give the worker its own session
+        self.session = self._create_session()
+
+    def _forward(self, inputs):
+        outputs = self.session.run(
+            OUTPUT_NAMES,
+            {name: inputs[name].cpu().numpy() for name in INPUT_NAMES}
+        )
+        return torch.from_numpy(outputs[0]), torch.from_numpy(outputs[1])
+
+    def stats(self):
+        return {
+            **super().stats(),
+            "intra_op_threads": settings.ONNX_INTRA_OP_THREADS,
+            "inter_op_threads": settings.ONNX_INTER_OP_THREADS,
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the complaint classifier to ONNX")
+    parser.add_argument("--output", default=None, help="Output path (defaults to ONNX_MODEL_PATH)")
+    parser.add_argument("--opset", type=int, default=17, help="ONNX opset version")
+    args = parser.parse_args()
+    export_onnx(args.output, args.opset)
@@ -0,0 +1,21 @@
+"""
+Prediction values shared by every predictor layer and the model server client.
+Kept free of torch and transformers imports, so the client side does not load them.
+"""
+
+# Returned whenever the model cannot produce a prediction
+FALLBACK_PREDICTION = {
+    "category": "Other",
+    "urgency": "Medium",
+    "confidence_category": 1.0,
+    "confidence_urgency": 1.0
+}
+
+
+# Extra fields analyze_batch adds to a prediction, for storing alongside the complaint
+ANALYSIS_KEYS = ("embedding", "category_probs", "urgency_probs", "model_version")
+
+
+def prediction_view(result):
+    """A prediction without the analysis fields, as returned by predict"""
+    return {key: value for key, value in result.items() if key not in ANALYSIS_KEYS}
@@ -0,0 +1,51 @@
+"""
+Fork-safe model preloading.
+
+Call preload_model() in the master process before the server forks its workers
+(see gunicorn.conf.py). The predictor is built once and inherited by every worker:
+tensor storages are shared copy-on-write, and the weights of a model bundle are
+memory-mapped so they stay in the shared page cache.
+"""
+import gc
+import os
+
+import torch
+
+from app.core.config import settings
+from app.db.database import engine
+from app.ml import predictor as predictor_module
+
+_fork_handler_registered = False
+
+
+def preload_model():
+    """Build the predictor singleton in the current (master) process"""
+    global _fork_handler_registered
+
+    # Keep the intra-op pool single threaded in the master: an OpenMP pool that
+    # existed at fork time can deadlock the first parallel op in the child
+    torch.set_num_threads(1)
+    predictor = predictor_module.get_model_predictor()
+
+    # Move everything allocated so far out of the garbage collector's reach, so
+    # collections in the workers do not write to (and copy) the shared pages
+    gc.freeze()
+
+    if not _fork_handler_registered:
+        os.register_at_fork(after_in_child=after_fork)
+        _fork_handler_registered = True
+    print(f"Preloaded {type(predictor).__name__} in process {os.getpid()}")
+    return predictor
+
+
+def after_fork():
+    """Reinitialize per-process inference and database state in a freshly forked worker"""
+    # The master connected when main.py created the tables; drop the inherited pool
+    # without closing its sockets, which the master still owns, so each worker opens its own
+    engine.dispose(close=False)
+    if settings.TORCH_NUM_THREADS > 0:
+        torch.set_num_threads(settings.TORCH_NUM_THREADS)
+    else:
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // max(1, settings.WEB_CONCURRENCY)))
+    if predictor_module.model_predictor is not None:
+        predictor_module.model_predictor.after_fork()
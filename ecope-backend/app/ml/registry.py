@@ -0,0 +1,128 @@
+"""
+Model registry.
+
+A small JSON file (MODEL_REGISTRY_PATH) listing versioned checkpoints with their
+metadata, and which one is active. Versions are the checkpoint fingerprints used as
+model_version everywhere else, so stored model outputs can be traced to an entry.
+
+    python -m app.ml.registry register app/ml/checkpoints/heads-20250101-120000 --note "retrained heads"
+    python -m app.ml.registry list
+    python -m app.ml.registry activate <version>
+
+The active version is loaded at startup instead of MODEL_PATH. Running workers check
+the file every MODEL_REGISTRY_POLL_SECONDS and load a newly activated version, whether
+it was activated here or through POST /model/registry/{version}/activate.
+"""
+import argparse
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.core.config import settings
+from app.ml.predictor import checkpoint_version
+
+ENGINES = ("torch", "onnx")
+
+# Serializes read-modify-write cycles of the registry file within this process
+_registry_lock = threading.Lock()
+
+
+class ModelRegistry:
+    def __init__(self, path=None):
+        self.path = Path(path or settings.MODEL_REGISTRY_PATH)
+
+    def _read(self):
+        if not self.path.exists():
+            return {"active": None, "versions": {}}
+        with open(self.path) as f:
+            return json.load(f)
+
+    def _write(self, data):
+        # Write to a temporary file and rename, so readers never see a partial file
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def register(self, checkpoint_path, engine="torch", metadata=None):
+        """Add a checkpoint (model.pt, bundle or ONNX graph) and return its entry"""
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine {engine!r}, expected one of {', '.join(ENGINES)}")
+        checkpoint_path = Path(checkpoint_path).resolve()
+        if not checkpoint_path.exists():
+            raise FileNotFoundError(f"Checkpoint not found at {checkpoint_path}")
+
+        entry = {
+            "version": checkpoint_version(checkpoint_path),
+            "path": str(checkpoint_path),
+            "engine": engine,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "metadata": metadata or {},
+        }
+        with _registry_lock:
+            data = self._read()
+            existing = data["versions"].get(entry["version"])
+            if existing is not None:
+                return existing
+            data["versions"][entry["version"]] = entry
+            self._write(data)
+        return entry
+
+    def get(self, version):
+        return self._read()["versions"].get(version)
+
+    def versions(self):
+        """All entries, oldest first, with an active flag"""
+        data = self._read()
+        entries = sorted(data["versions"].values(), key=lambda entry: entry["created_at"])
+        return [{**entry, "active": entry["version"] == data["active"]} for entry in entries]
+
+    def active(self):
+        """Entry of the active version, or None when MODEL_PATH is served"""
+        data = self._read()
+        if data["active"] is None:
+            return None
+        return data["versions"].get(data["active"])
+
+    def activate(self, version):
+        """Mark a registered version as active; None reverts to MODEL_PATH"""
+        with _registry_lock:
+            data = self._read()
+            if version is not None and version not in data["versions"]:
+                raise KeyError(version)
+            data["active"] = version
+            self._write(data)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the registry of model versions")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    register_parser = subparsers.add_parser("register", help="Register a checkpoint")
+    register_parser.add_argument("path", help="model.pt checkpoint, bundle directory or ONNX graph")
+    register_parser.add_argument("--engine", choices=ENGINES, default="torch")
+    register_parser.add_argument("--note", default=None, help="Free-form description stored with the version")
+    register_parser.add_argument("--activate", action="store_true", help="Also make it the active version")
+
+    subparsers.add_parser("list", help="List registered versions")
+
+    activate_parser = subparsers.add_parser("activate", help="Serve a version; running workers follow within MODEL_REGISTRY_POLL_SECONDS")
+    activate_parser.add_argument("version", nargs="?", default=None, help="Version to activate (omit for MODEL_PATH)")
+
+    args = parser.parse_args()
+    registry = ModelRegistry()
+    if args.command == "register":
+        entry = registry.register(args.path, args.engine, {"note": args.note} if args.note else None)
+        if args.activate:
+            registry.activate(entry["version"])
+        print(f"Registered version {entry['version']} ({entry['engine']}) at {entry['path']}")
+    elif args.command == "list":
+        for entry in registry.versions():
+            marker = "*" if entry["active"] else " "
+            print(f"{marker} {entry['version']}  {entry['engine']:<6} {entry['created_at']}  {entry['path']}")
+    else:
+        registry.activate(args.version)
+        print(f"Active version: {args.version or 'MODEL_PATH'}")
@@ -0,0 +1,133 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.ml.predictions import FALLBACK_PREDICTION, prediction_view
+
+# Shadow batches allowed to wait for the shadow thread before new ones are dropped
+MAX_PENDING_BATCHES = 32
+
+
+class ShadowPredictor:
+    """
+    Serves every request from the primary predictor and also scores a random
+    fraction of them on a shadow predictor (a candidate model version), off the
+    request path, to compare their answers before the candidate is activated.
+    """
+
+    def __init__(self, predictor, shadow, fraction=0.1):
+        self.predictor = predictor
+        self.shadow = shadow
+        self.fraction = min(1.0, max(0.0, fraction))
+        self._start()
+        self._sampled = 0
+        self._dropped = 0
+        self._compared = 0
+        self._failed = 0
+        self._timed = 0
+        self._category_agreement = 0
+        self._urgency_agreement = 0
+        self._primary_ms = 0.0
+        self._shadow_ms = 0.0
+
+    def _start(self):
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow-inference")
+        self._stats_lock = threading.Lock()
+        self._pending = 0
+
+    def __getattr__(self, name):
+        # Expose the primary predictor's attributes (model_version, label classes, ...)
+        if name in ("predictor", "shadow"):
+            raise AttributeError(name)
+        return getattr(self.predictor, name)
+
+    def after_fork(self):
+        self._start()
+        self.predictor.after_fork()
+        self.shadow.after_fork()
+
+    def close(self):
+        """Stop shadow scoring; the primary and shadow predictors stay open"""
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def predict(self, text):
+        """Predict category and urgency for a complaint text"""
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts, batch_size=None):
+        return self._serve(texts, batch_size, self.predictor.predict_batch)
+
+    def analyze_batch(self, texts, batch_size=None):
+        """Analyze on the primary predictor; sampled texts are compared on their labels"""
+        return self._serve(texts, batch_size, self.predictor.analyze_batch)
+
+    def _serve(self, texts, batch_size, primary_batch):
+        start = time.perf_counter()
+        results = primary_batch(texts, batch_size=batch_size)
+        primary_ms = (time.perf_counter() - start) * 1000.0
+
+        sampled = [i for i in range(len(texts)) if random.random() < self.fraction]
+        if sampled:
+            with self._stats_lock:
+                if self._pending >= MAX_PENDING_BATCHES:
+                    self._dropped += len(sampled)
+                    return results
+                self._pending += 1
+                self._sampled += len(sampled)
+            try:
+                self._pool.submit(
+                    self._compare,
+                    [texts[i] for i in sampled],
+                    [prediction_view(results[i]) for i in sampled],
+                    primary_ms * len(sampled) / len(texts)
+                )
+            except RuntimeError:
+                # Shut down while the predictor was being swapped out
+                with self._stats_lock:
+                    self._pending -= 1
+        return results
+
+    def _compare(self, texts, primary_results, primary_ms):
+        try:
+            start = time.perf_counter()
+            shadow_results = self.shadow.predict_batch(texts)
+            shadow_ms = (time.perf_counter() - start) * 1000.0
+        except Exception as e:
+            print("Shadow prediction failed:", e)
+            shadow_results, shadow_ms = None, 0.0
+
+        with self._stats_lock:
+            self._pending -= 1
+            if shadow_results is None:
+                self._failed += len(texts)
+                return
+            for primary, shadow in zip(primary_results, shadow_results):
+                if primary == FALLBACK_PREDICTION or shadow == FALLBACK_PREDICTION:
+                    self._failed += 1
+                    continue
+                self._compared += 1
+                self._category_agreement += primary["category"] == shadow["category"]
+                self._urgency_agreement += primary["urgency"] == shadow["urgency"]
+            self._timed += len(texts)
+            self._primary_ms += primary_ms
+            self._shadow_ms += shadow_ms
+
+    def stats(self):
+        with self._stats_lock:
+            compared = self._compared
+            shadow = {
+                "model_version": self.shadow.model_version,
+                "fraction": self.fraction,
+                "sampled": self._sampled,
+                "compared": compared,
+                "failed": self._failed,
+                "dropped": self._dropped,
+                "pending_batches": self._pending,
+                "category_agreement": self._category_agreement / compared if compared else None,
+                "urgency_agreement": self._urgency_agreement / compared if compared else None,
+                # Per-text latency of the sampled requests on each version
+                "primary_mean_ms": self._primary_ms / self._timed if self._timed else None,
+                "shadow_mean_ms": self._shadow_ms / self._timed if self._timed else None,
+            }
+        return {**self.predictor.stats(), "shadow": shadow}
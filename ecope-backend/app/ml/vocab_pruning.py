@@ -0,0 +1,209 @@
+"""
+Vocabulary pruning.
+
+The complaint corpus only uses a small share of the base model's WordPiece
+vocabulary, yet its word-embedding matrix holds a row for every token. This tool
+keeps the tokens the corpus actually produces, plus every single-character token
+and its ## continuation, so words outside the corpus are still split into known
+pieces instead of becoming [UNK]. The tokenizer and the encoder's embedding table
+are rebuilt to match and written as a model bundle:
+
+    python -m app.ml.vocab_pruning --output app/ml/pruned
+    MODEL_PATH=app/ml/pruned uvicorn main:app
+
+Greedy WordPiece on a subset vocabulary picks the same pieces for every word whose
+pieces were kept, so predictions on the corpus are unchanged.
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import torch
+import torch.nn as nn
+from transformers import AutoTokenizer
+
+from app.ml.bundle import save_bundle
+from app.ml.evaluation import load_dataset, predict_probabilities
+from app.ml.model import ModelPredictor
+
+REPORT_FILE = "pruning.json"
+
+
+def kept_token_ids(tokenizer, texts, batch_size=256):
+    """Old ids of the tokens to keep, in vocabulary order"""
+    vocab = tokenizer.get_vocab()
+    keep = set(tokenizer.all_special_ids)
+    for start in range(0, len(texts), batch_size):
+        encoded = tokenizer(texts[start:start + batch_size], truncation=False)["input_ids"]
+        for ids in encoded:
+            keep.update(ids)
+    # Characters and their continuations, so any word can still be spelled out
+    for token, token_id in vocab.items():
+        if len(token) == 1 or (token.startswith("##") and len(token) == 3):
+            keep.add(token_id)
+    return sorted(keep)
+
+
+def _remap_post_processor(processor, new_ids):
+    """Update the special token ids baked into a tokenizer.json post-processor"""
+    if processor is None:
+        return
+    kind = processor.get("type")
+    if kind == "TemplateProcessing":
+        for special in processor["special_tokens"].values():
+            special["ids"] = [new_ids[token] for token in special["tokens"]]
+    elif kind in ("BertProcessing", "RobertaProcessing"):
+        for key in ("sep", "cls"):
+            token = processor[key][0]
+            processor[key] = [token, new_ids[token]]
+    elif kind == "Sequence":
+        for child in processor["processors"]:
+            _remap_post_processor(child, new_ids)
+
+
+def prune_tokenizer(tokenizer, keep_ids):
+    """Copy of a fast WordPiece tokenizer whose vocabulary is keep_ids, renumbered from 0"""
+    if not tokenizer.is_fast:
+        raise ValueError("Vocabulary pruning needs a fast tokenizer")
+    state = json.loads(tokenizer.backend_tokenizer.to_str())
+    if state["model"]["type"] != "WordPiece":
+        raise ValueError(f"Vocabulary pruning supports WordPiece tokenizers, not {state['model']['type']}")
+
+    old_tokens = {token_id: token for token, token_id in tokenizer.get_vocab().items()}
+    tokens = [old_tokens[token_id] for token_id in keep_ids]
+    new_ids = {token: new_id for new_id, token in enumerate(tokens)}
+
+    state["model"]["vocab"] = new_ids
+    for added in state["added_tokens"]:
+        added["id"] = new_ids[added["content"]]
+    _remap_post_processor(state.get("post_processor"), new_ids)
+    if state.get("padding"):
+        state["padding"]["pad_id"] = new_ids[state["padding"]["pad_token"]]
+
+    # Round-trip through a directory, so the tokenizer keeps its class and settings
+    with tempfile.TemporaryDirectory() as tmp:
+        tokenizer.save_pretrained(tmp)
+        with open(Path(tmp) / "tokenizer.json", "w") as f:
+            json.dump(state, f)
+        if (Path(tmp) / "vocab.txt").exists():
+            with open(Path(tmp) / "vocab.txt", "w") as f:
+                f.write("".join(f"{token}\n" for token in tokens))
+        return AutoTokenizer.from_pretrained(tmp)
+
+
+def prune_embeddings(model, keep_ids, pad_token_id):
+    """Slice the encoder's word-embedding table down to the kept rows, in place"""
+    encoder = model.enc
+    weight = encoder.get_input_embeddings().weight.detach()
+    embeddings = nn.Embedding.from_pretrained(
+        weight[torch.tensor(keep_ids)].clone(), freeze=False, padding_idx=pad_token_id
+    )
+    encoder.set_input_embeddings(embeddings)
+    encoder.config.vocab_size = len(keep_ids)
+    encoder.config.pad_token_id = pad_token_id
+    return model
+
+
+def _embedding_mb(predictor):
+    weight = predictor.model.enc.get_input_embeddings().weight
+    return weight.numel() * weight.element_size() / 1e6
+
+
+def _timed_load(model_path):
+    start = time.perf_counter()
+    predictor = ModelPredictor(precision="fp32", model_path=model_path)
+    return predictor, (time.perf_counter() - start) * 1000.0
+
+
+def prune_to_bundle(output_dir, source_path=None, texts=None, check_samples=512):
+    """Write a pruned copy of the source checkpoint as a bundle and compare it with the source"""
+    source, source_load_ms = _timed_load(source_path)
+    keep_ids = kept_token_ids(source.tokenizer, texts)
+    tokenizer = prune_tokenizer(source.tokenizer, keep_ids)
+    print(f"Keeping {len(keep_ids)} of {len(source.tokenizer)} tokens from {len(texts)} texts")
+
+    # The source predictor is discarded, so its model can be pruned in place
+    model = prune_embeddings(source.model.float().cpu(), keep_ids, tokenizer.pad_token_id)
+    output_dir = save_bundle(
+        model,
+        tokenizer,
+        source.category_classes,
+        source.urgency_classes,
+        output_dir,
+        metadata={
+            "pruned_from": source.model_version,
+            "source_path": str(source.model_path),
+            "vocab_size": len(keep_ids),
+            "source_vocab_size": len(source.tokenizer),
+        }
+    )
+    source_vocab_size = len(source.tokenizer)
+    source_path = source.model_path
+    del source, model
+
+    source, _ = _timed_load(source_path)
+    pruned, pruned_load_ms = _timed_load(output_dir)
+    sample = texts[:check_samples]
+    source_probs = predict_probabilities(source, sample)
+    pruned_probs = predict_probabilities(pruned, sample)
+    report = {
+        "texts": len(texts),
+        "source_vocab_size": source_vocab_size,
+        "vocab_size": len(keep_ids),
+        "source_embedding_mb": _embedding_mb(source),
+        "embedding_mb": _embedding_mb(pruned),
+        "source_load_ms": source_load_ms,
+        "load_ms": pruned_load_ms,
+        "checked_texts": len(sample),
+        "identical_tokenization": sum(
+            source.tokenizer.tokenize(text) == pruned.tokenizer.tokenize(text) for text in sample
+        ) / max(1, len(sample)),
+        "max_probability_difference": float(max(
+            abs(source_probs[0] - pruned_probs[0]).max(), abs(source_probs[1] - pruned_probs[1]).max()
+        )) if sample else 0.0,
+    }
+    with open(Path(output_dir) / REPORT_FILE, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(
+        f"\nVocabulary {report['source_vocab_size']} -> {report['vocab_size']} tokens, word embeddings "
+        f"{report['source_embedding_mb']:.1f} -> {report['embedding_mb']:.1f} MB, load "
+        f"{report['source_load_ms']:.0f} -> {report['load_ms']:.0f} ms"
+    )
+    print(
+        f"Identical tokenization on {report['identical_tokenization']:.2%} of {len(sample)} texts, "
+        f"max probability difference {report['max_probability_difference']:.2e}"
+    )
+    return output_dir, report
+
+
+def load_corpus(csv_path=None, include_database=False):
+    """Complaint texts from the labelled CSV and, optionally, the complaints table"""
+    texts = load_dataset(csv_path)["complaint_text"].tolist()
+    if include_database:
+        from sqlalchemy import select
+        from app.db.database import SessionLocal
+        from app.models.domain.complaint import Complaint
+        db = SessionLocal()
+        try:
+            texts.extend(db.scalars(select(Complaint.complaint_text)))
+        finally:
+            db.close()
+    return texts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prune the tokenizer vocabulary and word embeddings to the complaint corpus")
+    parser.add_argument("--output", required=True, help="Pruned bundle directory to write")
+    parser.add_argument("--source", default=None, help="Checkpoint or bundle to prune (defaults to MODEL_PATH)")
+    parser.add_argument("--csv", default=None, help="Complaints CSV (defaults to data/complaints.csv)")
+    parser.add_argument("--include-database", action="store_true", help="Also keep the tokens of stored complaints")
+    args = parser.parse_args()
+
+    prune_to_bundle(
+        args.output,
+        source_path=args.source,
+        texts=load_corpus(args.csv, args.include_database)
+    )
@@ -0,0 +1,40 @@
+import time
+
+from app.core.config import settings
+from app.ml.cache import CachedPredictor
+
+WARMUP_TEXTS = [
+    "The wifi in my room keeps disconnecting.",
+    "There has been no hot water in the building since yesterday morning and it is getting really "
+    "difficult to shower, especially with the cold weather. Could someone please look into this as "
+    "soon as possible? Several people on the floor have reported the same problem to the front desk "
+    "but nothing has changed and we have not been told when it will be fixed.",
+]
+
+
+def _uncached(predictor):
+    """The layer under the prediction cache, or the predictor itself if it has none"""
+    layer = predictor
+    while "predictor" in vars(layer):
+        if isinstance(layer, CachedPredictor):
+            return layer.predictor
+        layer = vars(layer)["predictor"]
+    return predictor
+
+
+def warmup_predictor(predictor, batch_sizes=None):
+    """
+    Run the predictor over a few representative batch shapes, so the first real
+    requests do not pay for lazy initialization, first-call kernel selection and
+    allocator growth. The warmup goes under the prediction cache, so its texts do
+    not take cache entries. Returns the time spent in milliseconds.
+    """
+    predictor = _uncached(predictor)
+    batch_sizes = batch_sizes or sorted({1, 8, settings.INFERENCE_BATCH_SIZE})
+    start = time.perf_counter()
+    predictor.predict(WARMUP_TEXTS[0])
+    for batch_size in batch_sizes:
+        for text in WARMUP_TEXTS:
+            # Distinct texts, so the cascade and batcher see full batches
+            predictor.predict_batch([f"{text} ({i})" for i in range(batch_size)], batch_size=batch_size)
+    return (time.perf_counter() - start) * 1000.0
@@ -0,0 +1,27 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String
+from sqlalchemy.sql import func
+
+from app.db.database import Base
+
+
+class AssignmentCursor(Base):
+    """Position of a round-robin rotation, advanced with one atomic UPDATE per assignment"""
+    __tablename__ = "assignment_cursors"
+
+    name = Column(String(50), primary_key=True)
+    position = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+
+class AssigneeLoad(Base):
+    """
+    Open complaints held by an assignee, maintained incrementally whenever a complaint
+    is created, reassigned, relabelled, changes status or is deleted
+    """
+    __tablename__ = "assignee_loads"
+
+    assignee = Column(String(100), primary_key=True)
+    open_count = Column(Integer, nullable=False, default=0)
+    # Sum of the urgency weights of the open complaints
+    weighted_load = Column(Integer, nullable=False, default=0, index=True)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
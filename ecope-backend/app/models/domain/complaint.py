@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, LargeBinary, JSON
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
 
@@ -43,3 +44,56 @@ class Complaint(Base):
     status = Column(String(50), default="Pending")        
     assigned_to = Column(String(100), nullable=True)     
     response = Column(Text, nullable=True)
+
+    # "pending" until the background classifier has set the labels and assignee
+    # (ASYNC_CLASSIFICATION_ENABLED), otherwise "completed" from the start. A worker
+    # claims a pending complaint by setting "classifying" and claimed_at; claims older
+    # than CLASSIFICATION_LEASE_SECONDS are taken over, and a complaint claimed
+    # CLASSIFICATION_MAX_ATTEMPTS times without being written becomes "failed"
+    classification_status = Column(String(20), nullable=False, default="completed", server_default="completed", index=True)
+    classification_attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    classification_claimed_at = Column(DateTime, nullable=True)
+
+    # Model outputs kept for re-scoring and retraining without re-encoding the text
+    inference = relationship(
+        "ComplaintInference",
+        uselist=False,
+        cascade="all, delete-orphan",
+        back_populates="complaint"
+    )
+    correction = relationship(
+        "LabelCorrection",
+        uselist=False,
+        cascade="all, delete-orphan",
+        back_populates="complaint"
+    )
+
+
+class ComplaintInference(Base):
+    __tablename__ = "complaint_inferences"
+
+    complaint_id = Column(Integer, ForeignKey("complaints.id", ondelete="CASCADE"), primary_key=True)
+    model_version = Column(String(64), nullable=False, index=True)
+
+    embedding = Column(LargeBinary, nullable=True)        # [CLS] vector as float16 bytes
+    category_probs = Column(JSON, nullable=True)          # {class: probability}
+    urgency_probs = Column(JSON, nullable=True)
+
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    complaint = relationship("Complaint", back_populates="inference")
+
+
+class LabelCorrection(Base):
+    """Category and urgency set by staff in place of the model's labels"""
+    __tablename__ = "label_corrections"
+
+    complaint_id = Column(Integer, ForeignKey("complaints.id", ondelete="CASCADE"), primary_key=True)
+    category = Column(Enum(Category), nullable=True)      # None when only the urgency was corrected
+    urgency = Column(Enum(Urgency), nullable=True)
+    corrected_by = Column(String(255), nullable=True)
+    corrected_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    complaint = relationship("Complaint", back_populates="correction")
+
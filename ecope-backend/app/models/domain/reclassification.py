@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float
+from sqlalchemy.sql import func
+
+from app.db.database import Base
+
+
+class ReclassificationRun(Base):
+    """Progress of a bulk reclassification of the complaints table for one model version"""
+    __tablename__ = "reclassification_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    model_version = Column(String(64), nullable=False, index=True)
+    status = Column(String(20), default="running")        # queued, running, completed, partial, failed
+
+    # Keyset checkpoint: every complaint with a smaller or equal id has been handled
+    last_complaint_id = Column(Integer, default=0)
+    processed = Column(Integer, default=0)
+    # Complaints passed over because the model answered with the fallback prediction;
+    # they stay stale and a later run picks them up (status "partial")
+    skipped = Column(Integer, default=0, server_default="0")
+    elapsed_seconds = Column(Float, default=0.0)
+    error = Column(String(500), nullable=True)
+
+    started_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    finished_at = Column(DateTime, nullable=True)
+    # Written (in UTC) by the process running the job with every batch; a running run
+    # whose heartbeat is older than RECLASSIFY_LEASE_SECONDS may be taken over
+    heartbeat_at = Column(DateTime, nullable=True)
@@ -30,6 +30,7 @@ class ComplaintInDB(ComplaintBase):
     status: str
     assigned_to: Optional[str] = None
     response: Optional[str] = None
+    classification_status: str = "completed"
 
     class Config:
         from_attributes = True
@@ -47,6 +48,7 @@ class ComplaintPrediction(BaseModel):
 
 class PaginatedComplaintsResponse(BaseModel):
     items: List[ComplaintResponse]
-    total: int
+    total: Optional[int] = None  # None when the listing was requested without include_total
     page: int
-    size: int
\ No newline at end of file
+    size: int
+    has_more: bool = False
\ No newline at end of file
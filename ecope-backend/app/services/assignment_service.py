@@ -0,0 +1,285 @@
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import case, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.domain.assignment import AssigneeLoad, AssignmentCursor
+from app.models.domain.complaint import Complaint, Urgency
+from app.models.domain.user import User, UserRole
+
+# Assignee used when there are no active support users
+UNASSIGNED = "unassigned@university.edu"
+
+ROUND_ROBIN_CURSOR = "support_round_robin"
+
+# Complaints in these statuses no longer count towards their assignee's load
+CLOSED_STATUSES = ("Resolved", "Closed")
+
+# Contribution of an open complaint to its assignee's weighted load
+URGENCY_WEIGHTS = {
+    Urgency.LOW: 1,
+    Urgency.MEDIUM: 2,
+    Urgency.HIGH: 3,
+    Urgency.CRITICAL: 5,
+}
+
+# Emails of the active support users in id order, cached per process
+_roster: Optional[List[str]] = None
+_roster_expires_at = 0.0
+_roster_lock = threading.Lock()
+# Roster whose assignee_loads rows are known to exist in this process
+_load_rows_roster: Optional[List[str]] = None
+
+
+def _urgency_weight(urgency) -> int:
+    if urgency is None:
+        return URGENCY_WEIGHTS[Urgency.MEDIUM]
+    return URGENCY_WEIGHTS[Urgency(urgency)]
+
+
+def load_contribution(assigned_to: Optional[str], status: Optional[str], urgency) -> Tuple[int, int]:
+    """(open complaints, weighted load) that a complaint in this state adds to its assignee"""
+    if not assigned_to or status in CLOSED_STATUSES:
+        return 0, 0
+    return 1, _urgency_weight(urgency)
+
+
+class AssignmentService:
+    @staticmethod
+    def support_roster(db: Session) -> List[str]:
+        """Emails of the active support users, ordered by id"""
+        global _roster, _roster_expires_at
+        with _roster_lock:
+            if _roster is not None and time.monotonic() < _roster_expires_at:
+                return _roster
+        roster = list(db.scalars(
+            select(User.email)
+            .where(User.role == UserRole.SUPPORT, User.is_active == True)
+            .order_by(User.id)
+        ))
+        with _roster_lock:
+            _roster = roster
+            _roster_expires_at = time.monotonic() + settings.SUPPORT_ROSTER_TTL_SECONDS
+        return roster
+
+    @staticmethod
+    def invalidate_roster() -> None:
+        """Drop the cached roster; call after creating, changing or deleting users"""
+        global _roster
+        with _roster_lock:
+            _roster = None
+
+    @staticmethod
+    def advance_cursor(db: Session, name: str = ROUND_ROBIN_CURSOR) -> int:
+        """
+        Atomically increment a round-robin cursor and return its new position.
+
+        The UPDATE takes the row lock, so concurrent transactions get distinct
+        positions; the lock is held until the caller commits.
+        """
+        statement = (
+            update(AssignmentCursor)
+            .where(AssignmentCursor.name == name)
+            .values(position=AssignmentCursor.position + 1)
+        )
+        if db.bind.dialect.update_returning:
+            position = db.execute(statement.returning(AssignmentCursor.position)).scalar()
+        elif db.execute(statement).rowcount:
+            position = db.scalar(select(AssignmentCursor.position).where(AssignmentCursor.name == name))
+        else:
+            position = None
+        if position is not None:
+            return position
+
+        # First assignment: start where the old count-based rotation would have been
+        try:
+            with db.begin_nested():
+                position = db.scalar(select(func.count(Complaint.id))) + 1
+                db.execute(insert(AssignmentCursor).values(name=name, position=position))
+            return position
+        except IntegrityError:
+            # Another transaction created the cursor first
+            return AssignmentService.advance_cursor(db, name)
+
+    @staticmethod
+    def next_assignee(db: Session) -> str:
+        """Support user for a new complaint, chosen by the ASSIGNMENT_STRATEGY"""
+        roster = AssignmentService.support_roster(db)
+        if not roster:
+            return UNASSIGNED
+        if settings.ASSIGNMENT_STRATEGY == "least_loaded":
+            return AssignmentService.least_loaded_assignee(db, roster)
+        position = AssignmentService.advance_cursor(db)
+        return roster[(position - 1) % len(roster)]
+
+    @staticmethod
+    def least_loaded_assignee(db: Session, roster: List[str]) -> str:
+        """
+        Active support user with the lowest weighted load, read from the assignee_loads
+        index. The chosen row stays locked until the caller commits, and concurrent
+        transactions skip locked rows, so simultaneous complaints go to different people.
+        """
+        global _load_rows_roster
+        if _load_rows_roster is not roster:
+            AssignmentService._ensure_load_rows(db, roster)
+            _load_rows_roster = roster
+
+        query = (
+            select(AssigneeLoad.assignee)
+            .where(AssigneeLoad.assignee.in_(roster))
+            .order_by(AssigneeLoad.weighted_load, AssigneeLoad.open_count, AssigneeLoad.assignee)
+            .limit(1)
+        )
+        assignee = db.scalar(query.with_for_update(skip_locked=True))
+        if assignee is None:
+            # Every candidate is locked by a concurrent assignment
+            assignee = db.scalar(query)
+        return assignee or roster[0]
+
+    @staticmethod
+    def _ensure_load_rows(db: Session, roster: List[str]) -> None:
+        """Create zero counters for support users that have never held a complaint"""
+        existing = set(db.scalars(select(AssigneeLoad.assignee).where(AssigneeLoad.assignee.in_(roster))))
+        missing = [email for email in roster if email not in existing]
+        if not missing:
+            return
+        try:
+            with db.begin_nested():
+                db.execute(insert(AssigneeLoad), [
+                    {"assignee": email, "open_count": 0, "weighted_load": 0} for email in missing
+                ])
+        except IntegrityError:
+            # Created concurrently
+            pass
+
+    @staticmethod
+    def adjust_load(db: Session, assignee: Optional[str], open_delta: int, weight_delta: int) -> None:
+        """Atomically add to an assignee's counters, creating the row on first use"""
+        if not assignee or (open_delta == 0 and weight_delta == 0):
+            return
+        result = db.execute(
+            update(AssigneeLoad)
+            .where(AssigneeLoad.assignee == assignee)
+            .values(
+                open_count=AssigneeLoad.open_count + open_delta,
+                weighted_load=AssigneeLoad.weighted_load + weight_delta
+            )
+        )
+        if result.rowcount:
+            return
+        try:
+            with db.begin_nested():
+                db.execute(insert(AssigneeLoad).values(
+                    assignee=assignee, open_count=open_delta, weighted_load=weight_delta
+                ))
+        except IntegrityError:
+            AssignmentService.adjust_load(db, assignee, open_delta, weight_delta)
+
+    @staticmethod
+    def track_change(db: Session, before: Tuple[Any, Any, Any], after: Tuple[Any, Any, Any]) -> None:
+        """
+        Move a complaint's load contribution from its old (assigned_to, status, urgency)
+        state to the new one; either side may be None for a created or deleted complaint
+        """
+        old_assignee, old_open, old_weight = (before[0], *load_contribution(*before)) if before else (None, 0, 0)
+        new_assignee, new_open, new_weight = (after[0], *load_contribution(*after)) if after else (None, 0, 0)
+        if old_assignee == new_assignee:
+            AssignmentService.adjust_load(db, new_assignee, new_open - old_open, new_weight - old_weight)
+            return
+        # Lock the two counter rows in a fixed order, so concurrent reassignments
+        # between the same pair of people cannot deadlock
+        deltas = {old_assignee: (-old_open, -old_weight), new_assignee: (new_open, new_weight)}
+        for assignee in sorted(filter(None, deltas)):
+            AssignmentService.adjust_load(db, assignee, *deltas[assignee])
+
+    @staticmethod
+    def track_relabel(db: Session, changes: List[Tuple[Any, Any, Any, Any]]) -> None:
+        """
+        Adjust weighted loads after a bulk relabel; changes are the (assigned_to, status,
+        old urgency, new urgency) of each relabelled complaint
+        """
+        deltas = defaultdict(int)
+        for assigned_to, status, old_urgency, new_urgency in changes:
+            if assigned_to and status not in CLOSED_STATUSES:
+                deltas[assigned_to] += _urgency_weight(new_urgency) - _urgency_weight(old_urgency)
+        for assignee, delta in deltas.items():
+            AssignmentService.adjust_load(db, assignee, 0, delta)
+
+    @staticmethod
+    def reconcile_loads(db: Session) -> Dict[str, Any]:
+        """
+        Recompute every assignee's counters from the complaints table and fix any drift.
+
+        The counter rows are locked first, so assignments made meanwhile wait for the
+        reconciliation to commit instead of being overwritten by it.
+        """
+        stored = {
+            row.assignee: (row.open_count, row.weighted_load)
+            for row in db.execute(select(AssigneeLoad).with_for_update()).scalars()
+        }
+        weight = case(
+            *[(Complaint.urgency == urgency, value) for urgency, value in URGENCY_WEIGHTS.items()],
+            else_=URGENCY_WEIGHTS[Urgency.MEDIUM]
+        )
+        actual = {
+            assignee: (int(open_count), int(weighted_load or 0))
+            for assignee, open_count, weighted_load in db.execute(
+                select(Complaint.assigned_to, func.count(Complaint.id), func.sum(weight))
+                .where(Complaint.assigned_to.is_not(None))
+                .where(or_(Complaint.status.is_(None), Complaint.status.not_in(CLOSED_STATUSES)))
+                .group_by(Complaint.assigned_to)
+            )
+        }
+
+        corrected = {}
+        for assignee in stored.keys() | actual.keys():
+            expected = actual.get(assignee, (0, 0))
+            if stored.get(assignee) == expected:
+                continue
+            corrected[assignee] = {"stored": stored.get(assignee), "actual": expected}
+            if assignee in stored:
+                db.execute(
+                    update(AssigneeLoad)
+                    .where(AssigneeLoad.assignee == assignee)
+                    .values(open_count=expected[0], weighted_load=expected[1])
+                )
+            else:
+                db.execute(insert(AssigneeLoad).values(
+                    assignee=assignee, open_count=expected[0], weighted_load=expected[1]
+                ))
+        db.commit()
+        return {"assignees": len(stored.keys() | actual.keys()), "corrected": corrected}
+
+    @staticmethod
+    def backfill_loads(db: Session) -> Optional[Dict[str, Any]]:
+        """
+        Fill an empty assignee_loads table from the complaints table, for databases whose
+        complaints predate the counters. Returns the reconciliation, or None if the
+        counters already exist or there is nothing to count.
+        """
+        if db.scalar(select(AssigneeLoad.assignee).limit(1)) is not None:
+            return None
+        if db.scalar(select(Complaint.id).where(Complaint.assigned_to.is_not(None)).limit(1)) is None:
+            return None
+        try:
+            return AssignmentService.reconcile_loads(db)
+        except IntegrityError:
+            # Another worker backfilled the counters first
+            db.rollback()
+            return None
+
+    @staticmethod
+    def loads(db: Session) -> List[Dict[str, Any]]:
+        """Current counters, least loaded first"""
+        rows = db.scalars(
+            select(AssigneeLoad).order_by(AssigneeLoad.weighted_load, AssigneeLoad.open_count, AssigneeLoad.assignee)
+        )
+        return [
+            {"assignee": row.assignee, "open_count": row.open_count, "weighted_load": row.weighted_load}
+            for row in rows
+        ]
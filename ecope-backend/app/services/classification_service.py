@@ -0,0 +1,314 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import and_, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.ml.embeddings import pack_embedding
+from app.ml.predictions import FALLBACK_PREDICTION
+from app.ml.predictor import get_model_predictor
+from app.models.domain.complaint import Category, Complaint, ComplaintInference, Urgency
+from app.services.assignment_service import AssignmentService
+from app.services.reclassification_service import ReclassificationService
+
+PENDING = "pending"
+CLASSIFYING = "classifying"
+COMPLETED = "completed"
+FAILED = "failed"
+
+# Complaints whose background classification has not finished yet
+UNCLASSIFIED = (PENDING, CLASSIFYING)
+
+# Background classification workers of this process
+_workers: List[threading.Thread] = []
+_workers_lock = threading.Lock()
+_wake = threading.Event()
+_stop = threading.Event()
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Any] = {"batches": 0, "classified": 0, "failed": 0, "failed_batches": 0, "total_batch_seconds": 0.0}
+
+# Complaint id -> (event loop, asyncio.Event) of requests streaming its result
+_waiters: Dict[int, List[Any]] = {}
+_waiters_lock = threading.Lock()
+
+
+def _publish(complaint_ids: List[int]) -> None:
+    """Wake the event streams waiting for these complaints, from a worker thread"""
+    with _waiters_lock:
+        waiters = [waiter for complaint_id in complaint_ids for waiter in _waiters.pop(complaint_id, [])]
+    for loop, event in waiters:
+        loop.call_soon_threadsafe(event.set)
+
+
+class ClaimedComplaint(NamedTuple):
+    """A complaint claimed for classification; attempt identifies the claim"""
+    id: int
+    complaint_text: str
+    attempt: int
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _held(row: ClaimedComplaint) -> tuple:
+    """Conditions under which a worker's claim on a complaint is still its own"""
+    return (
+        Complaint.classification_status == CLASSIFYING,
+        Complaint.classification_attempts == row.attempt,
+    )
+
+
+class ClassificationService:
+    @staticmethod
+    def create_pending(db: Session, complaint_text: str, created_by: str) -> Complaint:
+        """Store a complaint for background classification and wake a worker"""
+        db_complaint = Complaint(
+            complaint_text=complaint_text,
+            created_by=created_by,
+            status="Pending",
+            classification_status=PENDING
+        )
+        db.add(db_complaint)
+        db.commit()
+        db.refresh(db_complaint)
+        ClassificationService.wake()
+        return db_complaint
+
+    @staticmethod
+    def wake() -> None:
+        """Tell an idle worker of this process that new complaints are pending"""
+        _wake.set()
+
+    @staticmethod
+    def claim_pending(db: Session, batch_size: int) -> List["ClaimedComplaint"]:
+        """
+        Claim a batch of pending complaints, and of claims whose lease expired, in a short
+        transaction; returns them with the attempt number each claim holds.
+
+        The rows are read with FOR UPDATE SKIP LOCKED only long enough to mark them
+        "classifying", so workers in other processes take different complaints and no
+        lock is held while the model runs. Expired claims that were already tried
+        CLASSIFICATION_MAX_ATTEMPTS times are marked failed instead of claimed again.
+        """
+        now = _utcnow()
+        expired = now - timedelta(seconds=settings.CLASSIFICATION_LEASE_SECONDS)
+        rows = db.execute(
+            select(Complaint.id, Complaint.complaint_text, Complaint.classification_attempts)
+            .where(or_(
+                Complaint.classification_status == PENDING,
+                and_(Complaint.classification_status == CLASSIFYING, Complaint.classification_claimed_at < expired)
+            ))
+            .order_by(Complaint.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+
+        exhausted = [row.id for row in rows if row.classification_attempts >= settings.CLASSIFICATION_MAX_ATTEMPTS]
+        claimed = [row for row in rows if row.classification_attempts < settings.CLASSIFICATION_MAX_ATTEMPTS]
+        if exhausted:
+            print(f"Giving up on classifying complaints {exhausted} after {settings.CLASSIFICATION_MAX_ATTEMPTS} attempts")
+            db.execute(update(Complaint).where(Complaint.id.in_(exhausted)).values(classification_status=FAILED))
+        if claimed:
+            db.execute(
+                update(Complaint)
+                .where(Complaint.id.in_([row.id for row in claimed]))
+                .values(
+                    classification_status=CLASSIFYING,
+                    classification_claimed_at=now,
+                    classification_attempts=Complaint.classification_attempts + 1
+                )
+            )
+        db.commit()
+        if exhausted:
+            with _stats_lock:
+                _stats["failed"] += len(exhausted)
+            _publish(exhausted)
+        return [ClaimedComplaint(*row[:-1], attempt=row.classification_attempts + 1) for row in claimed]
+
+    @staticmethod
+    def _predict(predictor, texts: List[str]) -> List[Dict[str, Any]]:
+        """Classify a batch; if the batch fails, classify its texts one at a time"""
+        try:
+            return ReclassificationService._classify(predictor, texts)
+        except Exception as e:
+            print(f"Classifying a batch of {len(texts)} complaints failed, retrying one at a time: {e}")
+        predictions = []
+        for text in texts:
+            try:
+                predictions.extend(ReclassificationService._classify(predictor, [text]))
+            except Exception as e:
+                print(f"Classifying a complaint failed, using the fallback prediction: {e}")
+                predictions.append(dict(FALLBACK_PREDICTION))
+        return predictions
+
+    @staticmethod
+    def _write(db: Session, row: ClaimedComplaint, prediction: Dict[str, Any]) -> bool:
+        """Write the labels, assignee and model outputs of one claimed complaint"""
+        # Read the complaint as it is now, locked, so edits staff made while the model ran
+        # are neither overwritten nor missed by the load counters
+        current = db.execute(
+            select(Complaint.category, Complaint.urgency, Complaint.assigned_to, Complaint.status)
+            .where(Complaint.id == row.id, *_held(row))
+            .with_for_update()
+        ).first()
+        if current is None:
+            # Deleted, or our lease expired and another worker took the complaint over
+            return False
+
+        # Labels and assignee staff set while the complaint was pending are kept
+        category = current.category or Category(prediction["category"])
+        urgency = current.urgency or Urgency(prediction["urgency"])
+        assigned_to = current.assigned_to or AssignmentService.next_assignee(db)
+        db.execute(
+            update(Complaint)
+            .where(Complaint.id == row.id)
+            .values(category=category, urgency=urgency, assigned_to=assigned_to, classification_status=COMPLETED)
+        )
+        AssignmentService.track_change(
+            db, (current.assigned_to, current.status, current.urgency), (assigned_to, current.status, urgency)
+        )
+
+        if settings.STORE_MODEL_OUTPUTS and "model_version" in prediction:
+            db.execute(insert(ComplaintInference).values(
+                complaint_id=row.id,
+                model_version=prediction["model_version"],
+                embedding=pack_embedding(prediction["embedding"]) if prediction.get("embedding") is not None else None,
+                category_probs=prediction.get("category_probs"),
+                urgency_probs=prediction.get("urgency_probs")
+            ))
+        return True
+
+    @staticmethod
+    def classify_pending(db: Session, predictor=None, batch_size: Optional[int] = None) -> int:
+        """
+        Claim, classify and assign one batch of pending complaints; returns how many were
+        claimed, so the caller keeps going while full batches are waiting.
+
+        Each complaint is written in its own savepoint. One that cannot be written is
+        released for another attempt, or marked failed after CLASSIFICATION_MAX_ATTEMPTS,
+        and the rest of the batch is committed without it.
+        """
+        batch_size = batch_size or settings.CLASSIFICATION_BATCH_SIZE
+        started = time.perf_counter()
+        rows = ClassificationService.claim_pending(db, batch_size)
+        if not rows:
+            return 0
+
+        predictor = predictor or get_model_predictor()
+        predictions = ClassificationService._predict(predictor, [row.complaint_text for row in rows])
+
+        classified, failed = [], []
+        for row, prediction in zip(rows, predictions):
+            try:
+                with db.begin_nested():
+                    written = ClassificationService._write(db, row, prediction or dict(FALLBACK_PREDICTION))
+            except Exception as e:
+                print(f"Storing the classification of complaint {row.id} failed: {e}")
+                gave_up = row.attempt >= settings.CLASSIFICATION_MAX_ATTEMPTS
+                db.execute(
+                    update(Complaint)
+                    .where(Complaint.id == row.id, *_held(row))
+                    .values(classification_status=FAILED if gave_up else PENDING, classification_claimed_at=None)
+                )
+                if gave_up:
+                    failed.append(row)
+                continue
+            if written:
+                classified.append(row)
+        db.commit()
+
+        with _stats_lock:
+            _stats["batches"] += 1
+            _stats["classified"] += len(classified)
+            _stats["failed"] += len(failed)
+            _stats["total_batch_seconds"] += time.perf_counter() - started
+        _publish([row.id for row in classified + failed])
+        return len(rows)
+
+    @staticmethod
+    def _work() -> None:
+        while not _stop.is_set():
+            db = SessionLocal()
+            try:
+                # Keep going while full batches are waiting, then sleep until woken
+                while ClassificationService.classify_pending(db) >= settings.CLASSIFICATION_BATCH_SIZE:
+                    if _stop.is_set():
+                        return
+            except Exception as e:
+                print(f"Background classification failed: {e}")
+                db.rollback()
+                with _stats_lock:
+                    _stats["failed_batches"] += 1
+            finally:
+                db.close()
+            _wake.wait(settings.CLASSIFICATION_POLL_SECONDS)
+            _wake.clear()
+
+    @staticmethod
+    def start_workers() -> None:
+        """Start the background classification threads of this process, once"""
+        with _workers_lock:
+            if _workers:
+                return
+            _stop.clear()
+            for i in range(max(1, settings.CLASSIFICATION_WORKERS)):
+                worker = threading.Thread(target=ClassificationService._work, name=f"classifier-{i}", daemon=True)
+                worker.start()
+                _workers.append(worker)
+        print(f"Started {len(_workers)} background classification workers")
+
+    @staticmethod
+    def stop_workers(timeout: float = 10.0) -> None:
+        """Let the workers finish their current batch and stop"""
+        with _workers_lock:
+            _stop.set()
+            _wake.set()
+            for worker in _workers:
+                worker.join(timeout)
+            _workers.clear()
+
+    @staticmethod
+    async def wait_for(complaint_id: int, timeout: float) -> None:
+        """Wait until a worker in this process classifies the complaint, or the timeout passes"""
+        event = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), event)
+        with _waiters_lock:
+            _waiters.setdefault(complaint_id, []).append(waiter)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with _waiters_lock:
+                waiters = _waiters.get(complaint_id, [])
+                if waiter in waiters:
+                    waiters.remove(waiter)
+                if not waiters:
+                    _waiters.pop(complaint_id, None)
+
+    @staticmethod
+    def stats(db: Session) -> Dict[str, Any]:
+        """Pending backlog and throughput of the background workers in this process"""
+        with _stats_lock:
+            stats = dict(_stats)
+        stats["workers"] = sum(worker.is_alive() for worker in _workers)
+        counts = dict(db.execute(
+            select(Complaint.classification_status, func.count(Complaint.id))
+            .where(Complaint.classification_status.in_((PENDING, CLASSIFYING, FAILED)))
+            .group_by(Complaint.classification_status)
+        ).all())
+        stats["pending"] = counts.get(PENDING, 0)
+        stats["classifying"] = counts.get(CLASSIFYING, 0)
+        # Complaints given up on after CLASSIFICATION_MAX_ATTEMPTS, in the whole database
+        stats["failed_complaints"] = counts.get(FAILED, 0)
+        batches, total_seconds = stats["batches"], stats.pop("total_batch_seconds")
+        stats["mean_batch_size"] = stats["classified"] / batches if batches else 0.0
+        stats["mean_batch_ms"] = total_seconds * 1000.0 / batches if batches else 0.0
+        return stats
@@ -1,61 +1,45 @@
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from app.models.domain.complaint import Complaint
+from typing import List, Optional, Tuple
+from app.core.config import settings
+from app.models.domain.complaint import Complaint, ComplaintInference, LabelCorrection
 from app.models.domain.user import User, UserRole
 from app.models.schemas.complaint import ComplaintCreate, ComplaintUpdate
-from app.ml.model import get_model_predictor
+from app.ml.embeddings import pack_embedding
+from app.ml.executor import analyze_async, predict_async
+from app.services.assignment_service import AssignmentService
+from app.services.classification_service import PENDING, ClassificationService
+from app.services.intake_buffer import get_intake_buffer
 
 
 class ComplaintService:
     @staticmethod
     async def create_complaint(db: Session, complaint: ComplaintCreate, current_user: User) -> Complaint:
+        if settings.INTAKE_BUFFER_ENABLED:
+            return await ComplaintService._create_buffered(db, complaint, current_user)
+
+        if settings.ASYNC_CLASSIFICATION_ENABLED:
+            # Labels and assignee are filled in by the background classification workers
+            return ClassificationService.create_pending(db, complaint.complaint_text, current_user.email)
+
         try:
             # Get predictions from ML model
-            model_predictor = get_model_predictor()
-            prediction = model_predictor.predict(complaint.complaint_text)
-            
-            # Decide on category and urgency
-            category = prediction["category"]
-            urgency = prediction["urgency"]
-            
-            # Implement Round Robin across all categories
-            # Fetch all active support users
-            support_users = db.query(User).filter(User.role == UserRole.SUPPORT, User.is_active == True).order_by(User.id).all()
-            
-            assigned_to = None
-            if support_users:
-                 # Find the next support guy in round robin based on total complaints
-                total_complaints_count = db.query(Complaint).count()
-                next_guy_index = total_complaints_count % len(support_users)
-                assigned_to = support_users[next_guy_index].email
+            if settings.STORE_MODEL_OUTPUTS:
+                prediction = await analyze_async(complaint.complaint_text)
             else:
-                 # Fallback if no support users found in DB (should be rare if seeded)
-                 # Keep legacy logic or assign to admin/unassigned
-                 assigned_to = "unassigned@university.edu"
-
+                prediction = await predict_async(complaint.complaint_text)
             
             # Create new complaint with predicted categories
             db_complaint = Complaint(
                 complaint_text=complaint.complaint_text,
                 created_by=current_user.email,
-                category=category,
-                urgency=urgency,
-                status="Pending",
-                assigned_to=assigned_to
+                category=prediction["category"],
+                urgency=prediction["urgency"],
+                status="Pending"
             )
+            db_complaint.inference = ComplaintService._build_inference(prediction)
         except Exception as e:
             print(f"Warning: Failed to use ML model for prediction: {e}")
-            
-            # Use Round Robin even in fallback
-            support_users = db.query(User).filter(User.role == UserRole.SUPPORT, User.is_active == True).order_by(User.id).all()
-            
-            assigned_to = None
-            if support_users:
-                total_complaints_count = db.query(Complaint).count()
-                next_guy_index = total_complaints_count % len(support_users)
-                assigned_to = support_users[next_guy_index].email
-            else:
-                 assigned_to = "unassigned@university.edu"
 
             # Default to medium priority and "Other" category if model fails
             db_complaint = Complaint(
@@ -63,30 +47,81 @@ class ComplaintService:
                 created_by=current_user.email,
                 category="Other",
                 urgency="Medium",
-                status="Pending",
-                assigned_to=assigned_to
+                status="Pending"
             )
+
+        # Assigned once, after the model call, whether or not it succeeded
+        db_complaint.assigned_to = AssignmentService.next_assignee(db)
+        AssignmentService.track_change(
+            db, None, (db_complaint.assigned_to, db_complaint.status, db_complaint.urgency)
+        )
         db.add(db_complaint)
         db.commit()
         db.refresh(db_complaint)
         return db_complaint
     
+    @staticmethod
+    async def _create_buffered(db: Session, complaint: ComplaintCreate, current_user: User) -> Complaint:
+        """
+        Create a complaint through the intake buffer, which writes concurrent submissions
+        with one multi-row INSERT and one commit and assigns them in that transaction
+        """
+        row = {"complaint_text": complaint.complaint_text, "created_by": current_user.email, "status": "Pending"}
+        # Hand the request's connection back to the pool, which the flush thread draws from
+        db.rollback()
+
+        if settings.ASYNC_CLASSIFICATION_ENABLED:
+            row["classification_status"] = PENDING
+            db_complaint = await get_intake_buffer().add(row)
+            ClassificationService.wake()
+            return db_complaint
+
+        inference = None
+        try:
+            if settings.STORE_MODEL_OUTPUTS:
+                prediction = await analyze_async(complaint.complaint_text)
+            else:
+                prediction = await predict_async(complaint.complaint_text)
+            row.update(category=prediction["category"], urgency=prediction["urgency"])
+            inference = ComplaintService._inference_values(prediction)
+        except Exception as e:
+            print(f"Warning: Failed to use ML model for prediction: {e}")
+            row.update(category="Other", urgency="Medium")
+        return await get_intake_buffer().add(row, inference)
+
+    @staticmethod
+    def _inference_values(prediction: dict) -> Optional[dict]:
+        """Model outputs worth keeping for a prediction, or None for a fallback answer"""
+        if "model_version" not in prediction:
+            return None
+        embedding = prediction.get("embedding")
+        return {
+            "model_version": prediction["model_version"],
+            "embedding": pack_embedding(embedding) if embedding is not None else None,
+            "category_probs": prediction.get("category_probs"),
+            "urgency_probs": prediction.get("urgency_probs"),
+        }
+
+    @staticmethod
+    def _build_inference(prediction: dict) -> Optional[ComplaintInference]:
+        values = ComplaintService._inference_values(prediction)
+        return ComplaintInference(**values) if values else None
+
     @staticmethod
     async def get_complaint(db: Session, complaint_id: int) -> Optional[Complaint]:
         return db.query(Complaint).filter(Complaint.id == complaint_id).first()
     
     @staticmethod
-    async def get_complaints(
+    def _filtered_query(
         db: Session,
         current_user: User,
-        skip: int = 0, 
-        limit: int = 100,
         category: Optional[str] = None,
         urgency: Optional[str] = None,
         status: Optional[str] = None,
         search: Optional[str] = None,
         assigned_to: Optional[str] = None
-    ) -> List[Complaint]:
+    ):
+        """Complaints the user may see, narrowed by the listing filters"""
         query = db.query(Complaint)
         
         # Apply role-based filtering
@@ -112,67 +147,87 @@ class ComplaintService:
             query = query.filter(Complaint.assigned_to == assigned_to)
         if search:
             query = query.filter(Complaint.complaint_text.ilike(f"%{search}%"))
-        
-        # Sort by created_at in descending order (newest first)
-        query = query.order_by(Complaint.created_at.desc())
-            
-        # Apply pagination
-        return query.offset(skip).limit(limit).all()
-        
+        return query
+
     @staticmethod
-    async def get_complaints_count(
+    async def get_complaints_page(
         db: Session,
         current_user: User,
+        skip: int = 0,
+        limit: int = 100,
+        include_total: bool = True,
         category: Optional[str] = None,
         urgency: Optional[str] = None,
         status: Optional[str] = None,
         search: Optional[str] = None,
         assigned_to: Optional[str] = None
-    ) -> int:
-        """Get the total count of complaints with the applied filters and role-based access."""
-        query = db.query(Complaint)
-        
-        # Apply role-based filtering
-        if current_user.role == UserRole.EMPLOYEE:
-            # Employees can only see their own complaints
-            query = query.filter(Complaint.created_by == current_user.email)
-        elif current_user.role == UserRole.SUPPORT:
-            # Support users can see complaints assigned to them OR created by them
-            query = query.filter(
-                (Complaint.assigned_to == current_user.email) | 
-                (Complaint.created_by == current_user.email)
-            )
-        # Admin users can see all complaints (no additional filtering)
-        
-        # Apply other filters if provided
-        if category:
-            query = query.filter(Complaint.category == category)
-        if urgency:
-            query = query.filter(Complaint.urgency == urgency)
-        if status:
-            query = query.filter(Complaint.status == status)
-        if assigned_to:
-            query = query.filter(Complaint.assigned_to == assigned_to)
-        if search:
-            query = query.filter(Complaint.complaint_text.ilike(f"%{search}%"))
-            
-        return query.count()
+    ) -> Tuple[List[Complaint], Optional[int], bool]:
+        """
+        One page of complaints, the total matching the filters and whether more follow,
+        from a single query. The total rides along on every row as COUNT(*) OVER ();
+        without include_total it is None and one extra row is read to tell if more follow.
+        """
+        query = ComplaintService._filtered_query(
+            db, current_user, category, urgency, status, search, assigned_to
+        ).order_by(Complaint.created_at.desc(), Complaint.id.desc())
+
+        if not include_total:
+            complaints = query.offset(skip).limit(limit + 1).all()
+            return complaints[:limit], None, len(complaints) > limit
+
+        rows = query.add_columns(func.count().over()).offset(skip).limit(limit).all()
+        if rows:
+            total = rows[0][1]
+        elif skip:
+            # Past the last page no row carries the total
+            total = query.order_by(None).count()
+        else:
+            total = 0
+        return [complaint for complaint, _ in rows], total, skip + len(rows) < total
     
     @staticmethod
-    async def update_complaint(db: Session, complaint_id: int, complaint_update: ComplaintUpdate) -> Optional[Complaint]:
+    async def update_complaint(
+        db: Session,
+        complaint_id: int,
+        complaint_update: ComplaintUpdate,
+        corrected_by: Optional[str] = None
+    ) -> Optional[Complaint]:
         db_complaint = db.query(Complaint).filter(Complaint.id == complaint_id).first()
         if db_complaint:
             update_data = complaint_update.model_dump(exclude_unset=True)
+            ComplaintService._record_correction(db_complaint, update_data, corrected_by)
+            before = (db_complaint.assigned_to, db_complaint.status, db_complaint.urgency)
             for key, value in update_data.items():
                 setattr(db_complaint, key, value)
+            AssignmentService.track_change(
+                db, before, (db_complaint.assigned_to, db_complaint.status, db_complaint.urgency)
+            )
             db.commit()
             db.refresh(db_complaint)
         return db_complaint
     
+    @staticmethod
+    def _record_correction(db_complaint: Complaint, update_data: dict, corrected_by: Optional[str]) -> None:
+        """Remember a changed category or urgency as a correction of the model's labels"""
+        changes = {
+            key: update_data[key] for key in ("category", "urgency")
+            if update_data.get(key) is not None and update_data[key] != getattr(db_complaint, key)
+        }
+        if not changes:
+            return
+        if db_complaint.correction is None:
+            db_complaint.correction = LabelCorrection()
+        for key, value in changes.items():
+            setattr(db_complaint.correction, key, value)
+        db_complaint.correction.corrected_by = corrected_by
+
     @staticmethod
     async def delete_complaint(db: Session, complaint_id: int) -> bool:
         db_complaint = db.query(Complaint).filter(Complaint.id == complaint_id).first()
         if db_complaint:
+            AssignmentService.track_change(
+                db, (db_complaint.assigned_to, db_complaint.status, db_complaint.urgency), None
+            )
             db.delete(db_complaint)
             db.commit()
             return True
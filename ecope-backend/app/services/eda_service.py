@@ -8,7 +8,6 @@ from sklearn.feature_extraction.text import TfidfVectorizer, CountVectorizer
 from sklearn.cluster import KMeans
 from sklearn.decomposition import PCA, LatentDirichletAllocation
 from sklearn.preprocessing import StandardScaler
-from sentence_transformers import SentenceTransformer
 from fastapi import HTTPException
 
 from app.models.domain.complaint import Complaint, Category, Urgency
@@ -208,7 +207,9 @@ class EdaService:
         urgencies = [str(c.urgency) for c in complaints]
         
         try:
-            # Use sentence transformers for better embeddings
+            # Use sentence transformers for better embeddings. Imported here so API
+            # workers only load torch when clustering is requested
+            from sentence_transformers import SentenceTransformer
             model = SentenceTransformer('all-MiniLM-L6-v2')
             embeddings = model.encode(texts)
         except Exception:
@@ -0,0 +1,89 @@
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.ml import predictor as predictor_module
+from app.ml.predictor import DummyPredictor, get_model_predictor
+from app.ml.warmup import warmup_predictor
+
+# Model lifecycle: not_started -> loading -> warming -> ready, or failed / degraded
+_model_state: Dict[str, Any] = {"status": "not_started"}
+
+# Model statuses that let the worker take traffic. A degraded worker serves fallback
+# predictions but every other endpoint works; since all workers load the same model
+# file, taking it out of rotation would take the whole API down with it. "on_demand"
+# is a worker started with MODEL_LOAD_AT_STARTUP=false, which loads on first use.
+READY_STATUSES = ("ready", "degraded", "on_demand")
+_model_state_lock = threading.Lock()
+
+
+def _set_model_state(**state) -> None:
+    with _model_state_lock:
+        _model_state.update(state)
+
+
+def _load_and_warm_model() -> None:
+    started = time.perf_counter()
+    _set_model_state(status="loading", started_at=time.time())
+    try:
+        predictor = get_model_predictor()
+        if isinstance(predictor, DummyPredictor):
+            _set_model_state(status="degraded", detail="Model failed to load, serving fallback predictions")
+            return
+        load_ms = (time.perf_counter() - started) * 1000.0
+        warmup_ms = 0.0
+        if settings.MODEL_WARMUP_ENABLED:
+            _set_model_state(status="warming", load_ms=load_ms)
+            warmup_ms = warmup_predictor(predictor)
+        _set_model_state(status="ready", load_ms=load_ms, warmup_ms=warmup_ms)
+    except Exception as e:
+        print(f"Background model loading failed: {e}")
+        _set_model_state(status="failed", detail=str(e))
+
+
+class HealthService:
+    @staticmethod
+    def start_model_loading() -> None:
+        """Load and warm up the model on a background thread, once per process"""
+        with _model_state_lock:
+            if _model_state["status"] != "not_started":
+                return
+            _model_state["status"] = "loading"
+        threading.Thread(target=_load_and_warm_model, name="model-loader", daemon=True).start()
+
+    @staticmethod
+    def model_status() -> Dict[str, Any]:
+        with _model_state_lock:
+            state = dict(_model_state)
+        if state["status"] == "not_started" and not settings.MODEL_LOAD_AT_STARTUP:
+            # Lazy loading: the first request loads the model, so there is nothing to wait for
+            predictor = predictor_module.model_predictor
+            if predictor is None:
+                state["status"] = "on_demand"
+            else:
+                state["status"] = "degraded" if isinstance(predictor, DummyPredictor) else "ready"
+        state["ready"] = state["status"] in READY_STATUSES
+        return state
+
+    @staticmethod
+    def database_status(db: Session) -> Dict[str, Any]:
+        try:
+            db.execute(text("SELECT 1"))
+            return {"status": "ready", "ready": True}
+        except Exception as e:
+            return {"status": "unavailable", "ready": False, "detail": str(e)}
+
+    @staticmethod
+    def readiness(db: Session) -> Dict[str, Any]:
+        components = {
+            "model": HealthService.model_status(),
+            "database": HealthService.database_status(db),
+        }
+        return {
+            "ready": all(component["ready"] for component in components.values()),
+            **components
+        }
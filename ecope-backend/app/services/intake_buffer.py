@@ -0,0 +1,262 @@
+import asyncio
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.ml.evaluation import latency_summary
+from app.models.domain.complaint import Complaint, ComplaintInference
+from app.services.assignment_service import AssignmentService
+from app.services.classification_service import PENDING
+
+# Number of recent flushes kept for the latency percentiles
+LATENCY_WINDOW = 1000
+
+# Columns every buffered row carries, so the rows share one INSERT statement
+COMPLAINT_COLUMNS = {
+    "complaint_text": None,
+    "created_by": None,
+    "category": None,
+    "urgency": None,
+    "status": "Pending",
+    "assigned_to": None,
+    "classification_status": "completed",
+}
+
+# Queued by close() to stop the flush thread once the rows ahead of it are written
+_STOP = object()
+
+
+def _size_bucket(size):
+    """Round a flush size up to the next power of two for the histogram"""
+    bucket = 1
+    while bucket < size:
+        bucket *= 2
+    return bucket
+
+
+def insert_complaints(db: Session, rows: List[Dict[str, Any]]) -> List[Complaint]:
+    """
+    Insert complaint rows with one multi-row INSERT and return them as loaded
+    Complaint objects, in the order of rows.
+
+    Dialects with RETURNING (PostgreSQL, SQLite, MariaDB) get the ids and defaults
+    back from the INSERT itself. Others (MySQL) get one INSERT per row, still in the
+    caller's transaction.
+    """
+    dialect = db.bind.dialect
+    if dialect.insert_executemany_returning_sort_by_parameter_order:
+        return list(db.scalars(insert(Complaint).returning(Complaint, sort_by_parameter_order=True), rows))
+
+    # No way to get the ids of a multi-row INSERT: one statement per row, still one transaction
+    complaints = [Complaint(**row) for row in rows]
+    db.add_all(complaints)
+    db.flush()
+    return complaints
+
+
+class IntakeBuffer:
+    """
+    Group commit for complaint creation.
+
+    Requests queue their complaint row; a single flush thread takes the first
+    waiting row, keeps collecting until max_rows are queued or max_wait_ms has
+    passed, then assigns them, writes them with one multi-row INSERT and one
+    commit, and resolves every caller's future with its own Complaint.
+    """
+
+    def __init__(self, max_rows=100, max_wait_ms=10.0):
+        self.max_rows = max(1, max_rows)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+
+        self._stats_lock = threading.Lock()
+        self._flush_sizes = Counter()
+        self._flush_ms = deque(maxlen=LATENCY_WINDOW)
+        self._wait_ms = deque(maxlen=LATENCY_WINDOW)
+        self._rows = 0
+        self._flushes = 0
+        self._failed_flushes = 0
+
+        self._queue = queue.Queue()
+        self._submit_lock = threading.Lock()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="intake-buffer", daemon=True)
+        self._worker.start()
+
+    def submit(self, row: Dict[str, Any], inference: Optional[Dict[str, Any]] = None) -> Future:
+        """
+        Queue a complaint row and return a Future for the stored Complaint. Rows without
+        assigned_to are assigned in the flush, unless their classification is pending.
+        """
+        future = Future()
+        row = {column: row.get(column, default) for column, default in COMPLAINT_COLUMNS.items()}
+        item = (row, inference, time.perf_counter(), future)
+        with self._submit_lock:
+            if not self._closed:
+                self._queue.put(item)
+                return future
+        # Shut down: late callers are written on their own, off the caller's thread,
+        # which may be the event loop
+        threading.Thread(target=self._flush, args=([item],), name="intake-late-flush").start()
+        return future
+
+    async def add(self, row: Dict[str, Any], inference: Optional[Dict[str, Any]] = None) -> Complaint:
+        """Queue a complaint row and await the stored Complaint"""
+        return await asyncio.wrap_future(self.submit(row, inference))
+
+    def close(self):
+        """Stop the flush thread after the queued rows are written"""
+        with self._submit_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._worker.join()
+
+    def _collect(self):
+        """
+        Block for the first row, then gather more until the flush is full or the wait expires.
+        Returns the rows and whether close() was requested.
+        """
+        item = self._queue.get()
+        if item is _STOP:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_rows:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            try:
+                batch, stopping = self._collect()
+                if batch:
+                    self._flush(batch)
+            except Exception as e:
+                # The thread must outlive any error, or every later caller would wait forever
+                print(f"Complaint intake flush thread error: {e}")
+                for _, _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _flush(self, batch):
+        """
+        Write a batch in one transaction. If that fails, the rows are retried one at a
+        time, so only the rows that fail on their own are failed.
+        """
+        error = self._write(batch)
+        if error is None or len(batch) == 1:
+            return
+        print(f"Retrying the {len(batch)} rows of the failed flush one at a time")
+        for item in batch:
+            self._write([item])
+
+    def _write(self, batch):
+        """Write one transaction and resolve its futures; returns the error, if any"""
+        started = time.perf_counter()
+        db = SessionLocal()
+        try:
+            # Assigned on copies, so a retry after a rollback assigns again
+            rows = [
+                {**row, "assigned_to": AssignmentService.next_assignee(db)}
+                if row["assigned_to"] is None and row["classification_status"] != PENDING else row
+                for row, _, _, _ in batch
+            ]
+
+            complaints = insert_complaints(db, rows)
+            inferences = [
+                {**inference, "complaint_id": complaint.id}
+                for (_, inference, _, _), complaint in zip(batch, complaints) if inference
+            ]
+            if inferences:
+                db.execute(insert(ComplaintInference), inferences)
+            for complaint in complaints:
+                AssignmentService.track_change(db, None, (complaint.assigned_to, complaint.status, complaint.urgency))
+
+            # Detach before the commit expires them, so callers can read them without a session
+            db.expunge_all()
+            db.commit()
+        except Exception as e:
+            print(f"Complaint intake flush of {len(batch)} rows failed: {e}")
+            db.rollback()
+            with self._stats_lock:
+                self._failed_flushes += 1
+            if len(batch) == 1:
+                batch[0][3].set_exception(e)
+            return e
+        finally:
+            db.close()
+
+        finished = time.perf_counter()
+        for (_, _, _, future), complaint in zip(batch, complaints):
+            future.set_result(complaint)
+        with self._stats_lock:
+            self._rows += len(batch)
+            self._flushes += 1
+            self._flush_sizes[_size_bucket(len(batch))] += 1
+            self._flush_ms.append((finished - started) * 1000.0)
+            self._wait_ms.extend((started - queued) * 1000.0 for _, _, queued, _ in batch)
+
+    def stats(self):
+        """Flush size histogram and latencies for tuning the buffering window"""
+        with self._stats_lock:
+            flush_ms = list(self._flush_ms)
+            wait_ms = list(self._wait_ms)
+            stats = {
+                "max_rows": self.max_rows,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "queued": self._queue.qsize(),
+                "rows": self._rows,
+                "flushes": self._flushes,
+                "failed_flushes": self._failed_flushes,
+                # Each flush is one INSERT and one commit instead of one per row
+                "commits_saved": self._rows - self._flushes,
+                "mean_flush_size": self._rows / self._flushes if self._flushes else 0.0,
+                # Keys are power-of-two upper bounds of the rows per flush
+                "flush_size_histogram": dict(sorted(self._flush_sizes.items())),
+            }
+        stats["flush"] = latency_summary(flush_ms) if flush_ms else None
+        stats["buffer_wait"] = latency_summary(wait_ms) if wait_ms else None
+        return stats
+
+
+intake_buffer = None
+_intake_buffer_lock = threading.Lock()
+
+
+def get_intake_buffer():
+    """Get or create the intake buffer singleton"""
+    global intake_buffer
+    if intake_buffer is None:
+        with _intake_buffer_lock:
+            if intake_buffer is None:
+                intake_buffer = IntakeBuffer(settings.INTAKE_BUFFER_MAX_ROWS, settings.INTAKE_BUFFER_MAX_WAIT_MS)
+    return intake_buffer
+
+
+def close_intake_buffer():
+    """Write the queued complaints and stop the flush thread, if it was started"""
+    global intake_buffer
+    with _intake_buffer_lock:
+        buffer, intake_buffer = intake_buffer, None
+    if buffer is not None:
+        buffer.close()
@@ -0,0 +1,196 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.ml import predictor as predictor_module
+from app.ml.predictor import get_model_predictor, swap_model_predictor
+from app.ml.registry import ModelRegistry
+from app.ml.shadow import ShadowPredictor
+from app.ml.warmup import warmup_predictor
+
+# At most one model version is loaded in the background at a time in this process
+_job_lock = threading.Lock()
+_job_thread: Optional[threading.Thread] = None
+_job_state: Dict[str, Any] = {"status": "idle"}
+
+
+# Thread that makes this worker follow versions activated by other workers
+_follower: Optional[threading.Thread] = None
+_follower_stop = threading.Event()
+
+
+def _set_job_state(**state) -> None:
+    with _job_lock:
+        _job_state.update(state)
+
+
+def _load_version(entry: Dict[str, Any]):
+    """Load and warm up a registered version next to the one being served"""
+    from app.ml.model import build_local_predictor
+    predictor = build_local_predictor(model_path=entry["path"], engine=entry["engine"], fallback=False)
+    if settings.MODEL_WARMUP_ENABLED:
+        _set_job_state(status="warming")
+        warmup_predictor(predictor)
+    return predictor
+
+
+def _activate(entry: Dict[str, Any], record: bool = True) -> None:
+    current = get_model_predictor()
+    if isinstance(current, ShadowPredictor) and current.shadow.model_version == entry["version"]:
+        # The candidate is already loaded and warm as the shadow: promote it
+        swap_model_predictor(current.shadow)
+        current.close()
+        current.predictor.close()
+    else:
+        predictor = _load_version(entry)
+        _set_job_state(status="swapping")
+        previous = swap_model_predictor(predictor)
+        # Requests already running on the previous version finish before it is closed
+        if isinstance(previous, ShadowPredictor):
+            previous.close()
+            previous.shadow.close()
+            previous = previous.predictor
+        previous.close()
+    if record:
+        ModelRegistry().activate(entry["version"])
+
+
+def _shadow(entry: Dict[str, Any], fraction: float) -> None:
+    shadow = _load_version(entry)
+    current = get_model_predictor()
+    if isinstance(current, ShadowPredictor):
+        previous_shadow, current = current, current.predictor
+    else:
+        previous_shadow = None
+    swap_model_predictor(ShadowPredictor(current, shadow, fraction))
+    if previous_shadow is not None:
+        previous_shadow.close()
+        previous_shadow.shadow.close()
+
+
+class ModelRegistryService:
+    @staticmethod
+    def versions() -> Dict[str, Any]:
+        """Registered versions, the version this worker serves and its shadow, if any"""
+        predictor = get_model_predictor()
+        return {
+            "serving": predictor.model_version,
+            "shadow": predictor.shadow.model_version if isinstance(predictor, ShadowPredictor) else None,
+            "versions": ModelRegistry().versions(),
+        }
+
+    @staticmethod
+    def register(checkpoint_path: str, engine: str = "torch", note: Optional[str] = None) -> Dict[str, Any]:
+        return ModelRegistry().register(checkpoint_path, engine, {"note": note} if note else None)
+
+    @staticmethod
+    def _start_job(kind: str, version: str, target, *args) -> bool:
+        """Run target(entry, *args) on a background thread; False if another job is running"""
+        global _job_thread
+        entry = ModelRegistry().get(version)
+        if entry is None:
+            raise KeyError(version)
+
+        with _job_lock:
+            if _job_thread is not None and _job_thread.is_alive():
+                return False
+
+            def job():
+                started = time.perf_counter()
+                try:
+                    target(entry, *args)
+                    _set_job_state(status="completed", elapsed_seconds=time.perf_counter() - started)
+                except Exception as e:
+                    print(f"Loading model version {version} failed: {e}")
+                    _set_job_state(status="failed", error=str(e)[:500], elapsed_seconds=time.perf_counter() - started)
+
+            _job_state.clear()
+            _job_state.update({"status": "loading", "kind": kind, "version": version, "started_at": time.time()})
+            _job_thread = threading.Thread(target=job, name=f"model-{kind}", daemon=True)
+            _job_thread.start()
+            return True
+
+    @staticmethod
+    def start_activation(version: str) -> bool:
+        """
+        Load, warm up and swap in a registered version in the background. Raises
+        KeyError for an unknown version; False if another job is running.
+        """
+        return ModelRegistryService._start_job("activate", version, _activate)
+
+    @staticmethod
+    def sync_with_registry(registry: Optional[ModelRegistry] = None) -> bool:
+        """
+        Start loading the registry's active version if this worker serves another one.
+        Returns False when a load is already running here, so the caller retries later.
+        """
+        registry = registry or ModelRegistry()
+        entry = registry.active()
+        if entry is None or predictor_module.model_predictor is None:
+            # MODEL_PATH is served, or the model is not loaded yet and will load the active version
+            return True
+        if get_model_predictor().model_version == entry["version"]:
+            return True
+        print(f"Following the model registry to version {entry['version']}")
+        return ModelRegistryService._start_job("follow", entry["version"], _activate, False)
+
+    @staticmethod
+    def _follow() -> None:
+        registry = ModelRegistry()
+        seen = None
+        while not _follower_stop.wait(settings.MODEL_REGISTRY_POLL_SECONDS):
+            try:
+                modified = registry.path.stat().st_mtime_ns if registry.path.exists() else None
+                if modified != seen and ModelRegistryService.sync_with_registry(registry):
+                    seen = modified
+            except Exception as e:
+                print(f"Following the model registry failed: {e}")
+
+    @staticmethod
+    def start_following() -> None:
+        """
+        Check the registry file every MODEL_REGISTRY_POLL_SECONDS and load the active
+        version when another worker activates one, so every worker serves the same version
+        """
+        global _follower
+        if settings.MODEL_REGISTRY_POLL_SECONDS <= 0 or settings.MODEL_SERVER_SOCKET:
+            return
+        with _job_lock:
+            if _follower is not None and _follower.is_alive():
+                return
+            _follower_stop.clear()
+            _follower = threading.Thread(target=ModelRegistryService._follow, name="registry-follower", daemon=True)
+            _follower.start()
+
+    @staticmethod
+    def stop_following() -> None:
+        _follower_stop.set()
+
+    @staticmethod
+    def start_shadow(version: str, fraction: Optional[float] = None) -> bool:
+        """Load a registered version in the background and shadow-score a fraction of requests on it"""
+        fraction = settings.MODEL_SHADOW_FRACTION if fraction is None else fraction
+        return ModelRegistryService._start_job("shadow", version, _shadow, fraction)
+
+    @staticmethod
+    def stop_shadow() -> bool:
+        """Stop shadow scoring and unload the shadow version; False if there is none"""
+        with _job_lock:
+            if _job_thread is not None and _job_thread.is_alive():
+                return False
+            current = get_model_predictor()
+            if not isinstance(current, ShadowPredictor):
+                return False
+            swap_model_predictor(current.predictor)
+        current.close()
+        current.shadow.close()
+        return True
+
+    @staticmethod
+    def status() -> Dict[str, Any]:
+        """State of the latest background load in this process"""
+        with _job_lock:
+            state = dict(_job_state)
+        state["active"] = _job_thread is not None and _job_thread.is_alive()
+        return state
@@ -0,0 +1,294 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import delete, insert, or_, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.ml.embeddings import pack_embedding
+from app.ml.predictions import FALLBACK_PREDICTION
+from app.ml.predictor import get_model_predictor
+from app.models.domain.complaint import Category, Complaint, ComplaintInference, LabelCorrection, Urgency
+from app.models.domain.reclassification import ReclassificationRun
+from app.services.assignment_service import AssignmentService
+
+# At most one reclassification job runs in this process; across processes the
+# running run is claimed in the reclassification_runs table
+_job_lock = threading.Lock()
+_job_thread: Optional[threading.Thread] = None
+
+# Runs that were interrupted and are resumed from their checkpoint
+RESUMABLE_STATUSES = ("queued", "running", "failed")
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _run_to_dict(run: ReclassificationRun) -> Dict[str, Any]:
+    return {
+        "id": run.id,
+        "model_version": run.model_version,
+        "status": run.status,
+        "last_complaint_id": run.last_complaint_id,
+        "processed": run.processed,
+        "skipped": run.skipped or 0,
+        "elapsed_seconds": run.elapsed_seconds,
+        "rows_per_second": run.processed / run.elapsed_seconds if run.elapsed_seconds else 0.0,
+        "error": run.error,
+        "started_at": run.started_at,
+        "finished_at": run.finished_at,
+    }
+
+
+def _without_cascade(predictor):
+    """The predictor under a classifier cascade, if any, so every text runs the model"""
+    from app.ml.cascade import CascadePredictor
+
+    layer = predictor
+    while "predictor" in vars(layer):
+        if isinstance(layer, CascadePredictor):
+            return layer.predictor
+        layer = vars(layer)["predictor"]
+    return predictor
+
+
+class ReclassificationService:
+    @staticmethod
+    def active_run(db: Session) -> Optional[ReclassificationRun]:
+        """The run some process is working on, going by its heartbeat, if any"""
+        cutoff = _utcnow() - timedelta(seconds=settings.RECLASSIFY_LEASE_SECONDS)
+        return db.query(ReclassificationRun).filter(
+            ReclassificationRun.status == "running",
+            ReclassificationRun.heartbeat_at >= cutoff
+        ).order_by(ReclassificationRun.id).first()
+
+    @staticmethod
+    def _claim(db: Session, model_version: str, progress: Callable[[str], None]) -> ReclassificationRun:
+        """
+        Resume the interrupted run for model_version, or start a new one, and claim it
+        with a conditional UPDATE of its status, so two processes never run it at once
+        """
+        run = db.query(ReclassificationRun).filter(
+            ReclassificationRun.model_version == model_version,
+            ReclassificationRun.status.in_(RESUMABLE_STATUSES)
+        ).order_by(ReclassificationRun.id.desc()).first()
+        if run is None:
+            run = ReclassificationRun(
+                model_version=model_version, status="queued",
+                last_complaint_id=0, processed=0, skipped=0, elapsed_seconds=0.0
+            )
+            db.add(run)
+            db.commit()
+        else:
+            progress(f"Resuming run {run.id} after complaint {run.last_complaint_id}")
+
+        now = _utcnow()
+        claimed = db.execute(
+            update(ReclassificationRun)
+            .where(ReclassificationRun.id == run.id)
+            .where(or_(
+                ReclassificationRun.status != "running",
+                ReclassificationRun.heartbeat_at.is_(None),
+                ReclassificationRun.heartbeat_at < now - timedelta(seconds=settings.RECLASSIFY_LEASE_SECONDS)
+            ))
+            .values(status="running", heartbeat_at=now, error=None)
+        ).rowcount
+        db.commit()
+        if not claimed:
+            raise RuntimeError(f"Reclassification run {run.id} is already running in another process")
+
+        # Runs claimed at the same moment for different versions: the oldest goes ahead
+        active = ReclassificationService.active_run(db)
+        if active is not None and active.id != run.id:
+            db.execute(update(ReclassificationRun).where(ReclassificationRun.id == run.id).values(status="queued"))
+            db.commit()
+            raise RuntimeError(f"Reclassification run {active.id} is already running")
+        db.refresh(run)
+        return run
+
+    @staticmethod
+    def stale_complaints(db: Session, model_version: str, after_id: int, limit: int) -> List[Any]:
+        """
+        Next batch of complaints after after_id (keyset order) that were not labelled by
+        model_version, including complaints that have no stored model outputs at all.
+        """
+        return db.execute(
+            select(Complaint.id, Complaint.complaint_text)
+            .outerjoin(ComplaintInference, ComplaintInference.complaint_id == Complaint.id)
+            .where(Complaint.id > after_id)
+            .where(or_(
+                ComplaintInference.model_version.is_(None),
+                ComplaintInference.model_version != model_version
+            ))
+            .order_by(Complaint.id)
+            .limit(limit)
+        ).all()
+
+    @staticmethod
+    def _classify(predictor, texts: List[str]) -> List[Dict[str, Any]]:
+        if getattr(predictor, "supports_analysis", False):
+            return predictor.analyze_batch(texts)
+        predictions = predictor.predict_batch(texts)
+        for prediction in predictions:
+            if prediction != FALLBACK_PREDICTION:
+                prediction["model_version"] = predictor.model_version
+        return predictions
+
+    @staticmethod
+    def _write_batch(db: Session, rows: List[Any], predictions: List[Dict[str, Any]]) -> int:
+        """
+        Bulk UPDATE the labels and replace the stored model outputs of one batch;
+        returns the number of complaints whose labels were written
+        """
+        labelled = [
+            (row, prediction) for row, prediction in zip(rows, predictions)
+            if "model_version" in prediction
+        ]
+        if not labelled:
+            return 0
+        ids = [row.id for row, _ in labelled]
+
+        # Labels corrected by staff are kept; only their stored model outputs are refreshed
+        corrected = set(db.scalars(
+            select(LabelCorrection.complaint_id).where(LabelCorrection.complaint_id.in_(ids))
+        ))
+        relabelled = [
+            {
+                "id": row.id,
+                "category": Category(prediction["category"]),
+                "urgency": Urgency(prediction["urgency"])
+            }
+            for row, prediction in labelled if row.id not in corrected
+        ]
+        if relabelled:
+            current = {
+                row.id: row for row in db.execute(
+                    select(Complaint.id, Complaint.assigned_to, Complaint.status, Complaint.urgency)
+                    .where(Complaint.id.in_([values["id"] for values in relabelled]))
+                )
+            }
+            db.execute(update(Complaint), relabelled)
+            AssignmentService.track_relabel(db, [
+                (current[values["id"]].assigned_to, current[values["id"]].status,
+                 current[values["id"]].urgency, values["urgency"])
+                for values in relabelled
+            ])
+        db.execute(delete(ComplaintInference).where(ComplaintInference.complaint_id.in_(ids)))
+        db.execute(insert(ComplaintInference), [
+            {
+                "complaint_id": row.id,
+                "model_version": prediction["model_version"],
+                "embedding": pack_embedding(prediction["embedding"]) if prediction.get("embedding") is not None else None,
+                "category_probs": prediction.get("category_probs"),
+                "urgency_probs": prediction.get("urgency_probs")
+            }
+            for row, prediction in labelled
+        ])
+        return len(relabelled)
+
+    @staticmethod
+    def run(
+        db: Session,
+        predictor=None,
+        batch_size: Optional[int] = None,
+        progress: Callable[[str], None] = print
+    ) -> Dict[str, Any]:
+        """
+        Relabel every complaint not yet classified by the current model version.
+
+        Each batch's label updates and the run's checkpoint are committed together, so an
+        interrupted run resumes after the last committed complaint id. Complaints the
+        model answered with the fallback prediction are left stale and counted as
+        skipped; the run then ends "partial", and the next run picks them up again.
+        """
+        # First-stage answers are stored under their own version, so they would come back
+        # stale on every run if the cascade answered them again
+        predictor = _without_cascade(predictor or get_model_predictor())
+        model_version = predictor.model_version
+        if model_version == "dummy":
+            raise RuntimeError("The model is not loaded, refusing to reclassify with fallback predictions")
+        batch_size = batch_size or settings.RECLASSIFY_BATCH_SIZE
+
+        run = ReclassificationService._claim(db, model_version, progress)
+
+        elapsed_before = run.elapsed_seconds or 0.0
+        started = time.perf_counter()
+        updated = 0
+        try:
+            while True:
+                rows = ReclassificationService.stale_complaints(db, model_version, run.last_complaint_id, batch_size)
+                if not rows:
+                    break
+                predictions = ReclassificationService._classify(predictor, [row.complaint_text for row in rows])
+                updated += ReclassificationService._write_batch(db, rows, predictions)
+
+                run.last_complaint_id = rows[-1].id
+                run.processed += len(rows)
+                run.skipped = (run.skipped or 0) + sum("model_version" not in prediction for prediction in predictions)
+                run.elapsed_seconds = elapsed_before + time.perf_counter() - started
+                run.heartbeat_at = _utcnow()
+                db.commit()
+                progress(
+                    f"Reclassified {run.processed} complaints up to id {run.last_complaint_id} "
+                    f"({run.processed / run.elapsed_seconds:.1f} rows/s)"
+                )
+
+            if run.skipped:
+                progress(f"{run.skipped} complaints got fallback predictions and are still stale; run again to retry them")
+            run.status = "partial" if run.skipped else "completed"
+            run.finished_at = func.now()
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            run.status = "failed"
+            run.error = str(e)[:500]
+            db.commit()
+            raise
+
+        db.refresh(run)
+        result = _run_to_dict(run)
+        result["updated"] = updated
+        return result
+
+    @staticmethod
+    def start_background(batch_size: Optional[int] = None) -> bool:
+        """Run a reclassification on a background thread; False if one is already running"""
+        global _job_thread
+        with _job_lock:
+            if _job_thread is not None and _job_thread.is_alive():
+                return False
+            db = SessionLocal()
+            try:
+                if ReclassificationService.active_run(db) is not None:
+                    # Running in another process
+                    return False
+            finally:
+                db.close()
+
+            def job():
+                db = SessionLocal()
+                try:
+                    ReclassificationService.run(db, batch_size=batch_size)
+                except Exception as e:
+                    print(f"Reclassification failed: {e}")
+                finally:
+                    db.close()
+
+            _job_thread = threading.Thread(target=job, name="reclassification", daemon=True)
+            _job_thread.start()
+            return True
+
+    @staticmethod
+    def status(db: Session) -> Dict[str, Any]:
+        """Latest reclassification run and whether a job is active in any process"""
+        run = db.query(ReclassificationRun).order_by(ReclassificationRun.id.desc()).first()
+        return {
+            "active": (_job_thread is not None and _job_thread.is_alive())
+            or ReclassificationService.active_run(db) is not None,
+            "run": _run_to_dict(run) if run else None,
+        }
@@ -0,0 +1,19 @@
+# Gunicorn configuration that loads the classifier once in the master process.
+#
+#   gunicorn main:app -c gunicorn.conf.py
+#
+# Workers are forked after the model is loaded, so they share its weights and
+# serve their first request without a multi-second model load.
+import os
+
+from app.core.config import settings
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = settings.WEB_CONCURRENCY
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+
+def on_starting(server):
+    from app.ml.preload import preload_model
+    preload_model()
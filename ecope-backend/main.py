@@ -3,11 +3,16 @@ from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 import os
 
-from app.api.routes import api_router
+from app.api.routes import api_router, health
 from app.core.config import settings
 from app.db.database import Base, engine, get_db
 from app.models.domain.user import User, UserRole
 from app.core.security import get_password_hash
+from app.services.assignment_service import AssignmentService
+from app.services.classification_service import ClassificationService
+from app.services.health_service import HealthService
+from app.services.intake_buffer import close_intake_buffer
+from app.services.model_registry_service import ModelRegistryService
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
@@ -30,6 +35,57 @@ app.add_middleware(
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+# Health probes for load balancers, outside the versioned API
+app.include_router(health.router, prefix="/health", tags=["health"])
+
+
+# Load and warm up the model in the background so the first complaint does not pay for it
+@app.on_event("startup")
+async def load_model_in_background():
+    if settings.MODEL_LOAD_AT_STARTUP:
+        HealthService.start_model_loading()
+
+
+# Load model versions activated through another worker process
+@app.on_event("startup")
+async def follow_model_registry():
+    ModelRegistryService.start_following()
+
+
+@app.on_event("shutdown")
+async def stop_following_model_registry():
+    ModelRegistryService.stop_following()
+
+
+# Classify complaints created with ASYNC_CLASSIFICATION_ENABLED in background threads
+@app.on_event("startup")
+async def start_classification_workers():
+    if settings.ASYNC_CLASSIFICATION_ENABLED:
+        ClassificationService.start_workers()
+
+
+@app.on_event("shutdown")
+async def stop_classification_workers():
+    ClassificationService.stop_workers()
+
+
+# Write complaints still waiting in the intake buffer before exiting
+@app.on_event("shutdown")
+async def flush_intake_buffer():
+    close_intake_buffer()
+
+
+# Count the open complaints of databases created before the assignee_loads table existed
+@app.on_event("startup")
+async def backfill_assignee_loads():
+    db = next(get_db())
+    try:
+        result = AssignmentService.backfill_loads(db)
+    finally:
+        db.close()
+    if result:
+        print(f"Backfilled assignee loads for {result['assignees']} assignees")
+
 
 # Create initial admin user if none exists
 @app.on_event("startup")
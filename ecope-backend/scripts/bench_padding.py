@@ -0,0 +1,77 @@
+import argparse
+import math
+import os
+import sys
+import time
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.ml.evaluation import load_dataset
+from app.ml.model import ModelPredictor, length_buckets
+
+
+def padded_tokens(lengths, batches, multiple):
+    """Number of token positions the model computes for the given batches"""
+    total = 0
+    for batch in batches:
+        longest = max(lengths[i] for i in batch)
+        if multiple:
+            longest = math.ceil(longest / multiple) * multiple
+        total += longest * len(batch)
+    return total
+
+
+def run(label, fn, texts, real_tokens, computed_tokens, repeats):
+    fn(texts[:8])
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(texts)
+    elapsed = (time.perf_counter() - start) / repeats
+    print(
+        f"{label:<22}{len(texts) / elapsed:>10.1f}{real_tokens / elapsed:>14.0f}"
+        f"{computed_tokens:>14}{1 - real_tokens / computed_tokens:>10.1%}"
+    )
+
+
+def benchmark(csv_path=None, limit=None, batch_size=32, repeats=1):
+    """
+    Tokens per second of arrival-order batches padded to their longest member
+    versus length-bucketed batches from predict_batch.
+    """
+    texts = load_dataset(csv_path, limit)["complaint_text"].tolist()
+    predictor = ModelPredictor()
+
+    lengths = [
+        len(ids) for ids in predictor.tokenizer(
+            texts, truncation=True, max_length=settings.INFERENCE_MAX_LENGTH
+        )["input_ids"]
+    ]
+    real_tokens = sum(lengths)
+    multiple = settings.INFERENCE_PAD_TO_MULTIPLE_OF
+    arrival = [list(range(start, min(start + batch_size, len(texts)))) for start in range(0, len(texts), batch_size)]
+    bucketed = length_buckets(lengths, batch_size)
+
+    def arrival_order(items):
+        for start in range(0, len(items), batch_size):
+            predictor._predict_texts(items[start:start + batch_size])
+
+    print(f"{len(texts)} complaints, {real_tokens} tokens, batch size {batch_size}, pad multiple {multiple or 'off'}\n")
+    print(f"{'':<22}{'texts/s':>10}{'tokens/s':>14}{'computed':>14}{'padding':>10}")
+    run("arrival order", arrival_order, texts, real_tokens, padded_tokens(lengths, arrival, multiple), repeats)
+    run(
+        "length bucketed",
+        lambda items: predictor.predict_batch(items, batch_size=batch_size),
+        texts, real_tokens, padded_tokens(lengths, bucketed, multiple), repeats
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark length-bucketed batching against arrival-order batching")
+    parser.add_argument("--csv", default=None, help="Complaints CSV (defaults to data/complaints.csv)")
+    parser.add_argument("--limit", type=int, default=None, help="Only use the first N complaints")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=1)
+    args = parser.parse_args()
+    benchmark(args.csv, args.limit, args.batch_size, args.repeats)
@@ -0,0 +1,139 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+
+from app.core.config import settings
+from app.ml.evaluation import load_dataset, measure_single_latency, measure_throughput
+
+
+def peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def load_predictor(engine):
+    if engine == "onnx":
+        from app.ml.onnx_engine import OnnxModelPredictor
+        return OnnxModelPredictor()
+    from app.ml.model import ModelPredictor
+    return ModelPredictor()
+
+
+def benchmark(engine, precision, csv_path=None, limit=None, latency_samples=200,
+              batch_sizes=(1, 8, 32, 64), thread_counts=None):
+    """Replay the complaints dataset against one engine/precision configuration"""
+    settings.MODEL_ENGINE = engine
+    settings.MODEL_PRECISION = precision
+    texts = load_dataset(csv_path, limit)["complaint_text"].tolist()
+
+    rss_before_load = peak_rss_mb()
+    start = time.perf_counter()
+    predictor = load_predictor(engine)
+    cold_load_s = time.perf_counter() - start
+    rss_after_load = peak_rss_mb()
+
+    single = measure_single_latency(predictor, texts[:latency_samples])
+
+    # onnxruntime fixes its thread pools when the session is created
+    if engine == "onnx":
+        thread_counts = [settings.ONNX_INTRA_OP_THREADS]
+    else:
+        thread_counts = thread_counts or sorted({1, 2, 4, os.cpu_count() or 1})
+
+    throughput = []
+    for threads in thread_counts:
+        if engine != "onnx":
+            torch.set_num_threads(threads)
+        for batch_size in batch_sizes:
+            result = measure_throughput(predictor, texts, batch_size)
+            throughput.append({"threads": threads, **result})
+            print(f"  threads={threads:<3} batch={batch_size:<4} {result['texts_per_second']:8.1f} texts/s")
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "engine": engine,
+        "precision": precision if engine != "onnx" else "fp32",
+        "model_path": str(predictor.model_path),
+        "model_version": predictor.model_version,
+        "dataset_size": len(texts),
+        "environment": {
+            "python": platform.python_version(),
+            "torch": torch.__version__,
+            "cpu_count": os.cpu_count(),
+            "machine": platform.machine(),
+        },
+        "cold_load_s": cold_load_s,
+        "rss_mb": {
+            "before_load": rss_before_load,
+            "after_load": rss_after_load,
+            "peak": peak_rss_mb(),
+        },
+        "single_request": single,
+        "throughput": throughput,
+    }
+
+
+def compare(paths):
+    """Print a side-by-side summary of several benchmark result files"""
+    print(f"{'run':<36}{'load s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'best/s':>9}{'peak MB':>9}")
+    for path in paths:
+        with open(path) as f:
+            run = json.load(f)
+        best = max(row["texts_per_second"] for row in run["throughput"])
+        label = f"{run['commit'] or '?'} {run['engine']}/{run['precision']}"
+        single = run["single_request"]
+        print(
+            f"{label:<36}{run['cold_load_s']:>8.2f}{single['p50_ms']:>9.2f}{single['p95_ms']:>9.2f}"
+            f"{single['p99_ms']:>9.2f}{best:>9.1f}{run['rss_mb']['peak']:>9.0f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark complaint classifier inference")
+    parser.add_argument("--engine", default=settings.MODEL_ENGINE, choices=["torch", "onnx"])
+    parser.add_argument("--precision", default=settings.MODEL_PRECISION, choices=["fp32", "bf16", "dynamic-int8"])
+    parser.add_argument("--csv", default=None, help="Complaints CSV to replay (defaults to data/complaints.csv)")
+    parser.add_argument("--limit", type=int, default=None, help="Only replay the first N complaints")
+    parser.add_argument("--latency-samples", type=int, default=200, help="Requests used for single-request latency")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--threads", type=int, nargs="+", default=None, help="Torch thread counts to sweep")
+    parser.add_argument("--output", default=None, help="JSON results path")
+    parser.add_argument("--compare", nargs="+", default=None, help="Summarize existing result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(args.compare)
+        sys.exit(0)
+
+    results = benchmark(
+        args.engine, args.precision, args.csv, args.limit,
+        args.latency_samples, args.batch_sizes, args.threads
+    )
+    output = args.output or f"benchmark-{results['commit'] or 'local'}-{results['engine']}-{results['precision']}.json"
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nCold load {results['cold_load_s']:.2f}s, single p50 {results['single_request']['p50_ms']:.2f} ms, "
+          f"p99 {results['single_request']['p99_ms']:.2f} ms, peak RSS {results['rss_mb']['peak']:.0f} MB")
+    print(f"Results written to {output}")
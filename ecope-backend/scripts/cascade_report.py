@@ -0,0 +1,110 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ml.cascade import FirstStageClassifier
+from app.ml.evaluation import load_dataset, predict_probabilities
+from app.ml.model import ModelPredictor
+
+
+def cascade_report(thresholds, csv_path=None, limit=None, holdout=0.2, batch_size=32, seed=0):
+    """
+    Share of complaints each cascade stage handles and the accuracy cost against the
+    model alone, for every gate threshold. The first stage is trained on a random
+    split of the dataset and everything is measured on the held-out rest.
+    """
+    df = load_dataset(csv_path, limit).sample(frac=1.0, random_state=seed)
+    split = int(len(df) * (1.0 - holdout))
+    train, test = df.iloc[:split], df.iloc[split:]
+    texts = test["complaint_text"].tolist()
+    print(f"Training the first stage on {len(train)} complaints, evaluating on {len(texts)}")
+
+    predictor = ModelPredictor()
+    first_stage = FirstStageClassifier.train(
+        train["complaint_text"].tolist(),
+        train["category"].astype(str).to_numpy(),
+        train["urgency"].astype(str).to_numpy(),
+        predictor.category_classes,
+        predictor.urgency_classes
+    )
+    category_classes = np.array(predictor.category_classes)
+    urgency_classes = np.array(predictor.urgency_classes)
+    true_categories = test["category"].astype(str).to_numpy()
+    true_urgencies = test["urgency"].astype(str).to_numpy()
+
+    start = time.perf_counter()
+    fast_category, fast_urgency = first_stage.predict_proba(texts)
+    first_stage_ms = (time.perf_counter() - start) * 1000.0 / len(texts)
+
+    start = time.perf_counter()
+    model_category, model_urgency = predict_probabilities(predictor, texts, batch_size)
+    model_ms = (time.perf_counter() - start) * 1000.0 / len(texts)
+
+    model_category_correct = category_classes[model_category.argmax(1)] == true_categories
+    model_urgency_correct = urgency_classes[model_urgency.argmax(1)] == true_urgencies
+    fast_category_correct = category_classes[fast_category.argmax(1)] == true_categories
+    fast_urgency_correct = urgency_classes[fast_urgency.argmax(1)] == true_urgencies
+    fast_confidence = np.minimum(fast_category.max(1), fast_urgency.max(1))
+
+    report = {
+        "model": {
+            "category_accuracy": float(model_category_correct.mean()),
+            "urgency_accuracy": float(model_urgency_correct.mean()),
+            "ms_per_text": model_ms,
+        },
+        "first_stage_ms_per_text": first_stage_ms,
+        "thresholds": [],
+    }
+    for threshold in thresholds:
+        gated = fast_confidence >= threshold
+        category_correct = np.where(gated, fast_category_correct, model_category_correct)
+        urgency_correct = np.where(gated, fast_urgency_correct, model_urgency_correct)
+        share = float(gated.mean())
+        report["thresholds"].append({
+            "threshold": threshold,
+            "first_stage_share": share,
+            "category_accuracy": float(category_correct.mean()),
+            "urgency_accuracy": float(urgency_correct.mean()),
+            "category_accuracy_cost": float(model_category_correct.mean() - category_correct.mean()),
+            "urgency_accuracy_cost": float(model_urgency_correct.mean() - urgency_correct.mean()),
+            # Every text pays for the first stage; only deferred texts pay for the model
+            "estimated_ms_per_text": first_stage_ms + (1.0 - share) * model_ms,
+        })
+
+    print(
+        f"\nModel only: category {report['model']['category_accuracy']:.2%}, "
+        f"urgency {report['model']['urgency_accuracy']:.2%}, {model_ms:.2f} ms/text"
+    )
+    print(f"{'threshold':>10}{'stage 1':>9}{'cat acc':>9}{'urg acc':>9}{'cat cost':>10}{'urg cost':>10}{'ms/text':>9}")
+    for row in report["thresholds"]:
+        print(
+            f"{row['threshold']:>10.2f}{row['first_stage_share']:>9.1%}"
+            f"{row['category_accuracy']:>9.2%}{row['urgency_accuracy']:>9.2%}"
+            f"{row['category_accuracy_cost']:>10.2%}{row['urgency_accuracy_cost']:>10.2%}"
+            f"{row['estimated_ms_per_text']:>9.2f}"
+        )
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the classifier cascade against the model alone")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.99])
+    parser.add_argument("--csv", default=None, help="Labelled complaints CSV (defaults to data/complaints.csv)")
+    parser.add_argument("--limit", type=int, default=None, help="Only use the first N complaints")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Fraction of complaints held out for evaluation")
+    parser.add_argument("--batch-size", type=int, default=32, help="Batch size for the model")
+    parser.add_argument("--output", default=None, help="Also write the report as JSON to this path")
+    args = parser.parse_args()
+
+    report = cascade_report(args.thresholds, args.csv, args.limit, args.holdout, args.batch_size)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
@@ -0,0 +1,82 @@
+import argparse
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.ml.model import build_local_predictor
+
+
+def _layers(predictor):
+    """The predictor and every predictor it wraps, outermost first"""
+    layers = [predictor]
+    while "predictor" in vars(layers[-1]):
+        layers.append(vars(layers[-1])["predictor"])
+    return layers
+
+
+def _find(predictor, name):
+    return next((layer for layer in _layers(predictor) if type(layer).__name__ == name), None)
+
+
+def _batched_requests(predictor):
+    batcher = _find(predictor, "BatchingPredictor")
+    return batcher.stats()["batching"]["requests"] if batcher else None
+
+
+def check_stack(text):
+    """
+    Check that creating a complaint with its model outputs stored (analyze_batch, as
+    POST /complaints does with STORE_MODEL_OUTPUTS) goes through the same cache and
+    micro-batcher as classifying it. Returns True when it does.
+    """
+    predictor = build_local_predictor(fallback=False)
+    print("Stack:", " -> ".join(type(layer).__name__ for layer in _layers(predictor)))
+    if not getattr(predictor, "supports_analysis", False):
+        print("The engine does not store model outputs, nothing to check")
+        return True
+
+    ok = True
+    cached = _find(predictor, "CachedPredictor")
+    batched = _batched_requests(predictor)
+
+    # A new text is analyzed through the batcher
+    analysis = predictor.analyze_batch([f"{text} (new)"])[0]
+    if "model_version" not in analysis:
+        print("FAILED: analyze_batch did not return the model version")
+        ok = False
+    if batched is not None:
+        if _batched_requests(predictor) != batched + 1:
+            print("FAILED: analyze_batch bypassed the micro-batcher")
+            ok = False
+        batched = _batched_requests(predictor)
+
+    # Classify, then create: the second call is served from the cache
+    predictor.predict(text)
+    if cached is not None:
+        hits = cached.cache.hits
+        predictor.analyze_batch([text])
+        if cached.cache.hits != hits + 1:
+            print("FAILED: analyze_batch after predict missed the prediction cache")
+            ok = False
+        if batched is not None and _batched_requests(predictor) != batched + 1:
+            print("FAILED: the cached text was run through the model again")
+            ok = False
+
+    print("\nSTACK OK" if ok else "\nSTACK CHECK FAILED")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that stored-output predictions use the cache and micro-batcher")
+    parser.add_argument("--text", default="The wifi in the library keeps disconnecting every few minutes.")
+    args = parser.parse_args()
+
+    print(
+        f"Cache {'on' if settings.PREDICTION_CACHE_ENABLED else 'off'}, "
+        f"batching {'on' if settings.INFERENCE_BATCHING_ENABLED else 'off'}, "
+        f"cascade {'on' if settings.CASCADE_ENABLED else 'off'}"
+    )
+    sys.exit(0 if check_stack(args.text) else 1)
@@ -0,0 +1,114 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ml.early_exit import EarlyExitPredictor, save_exit_heads, train_exit_heads
+from app.ml.evaluation import load_dataset, measure_single_latency
+from app.ml.model import ModelPredictor
+
+
+def evaluate(predictor, df, latency_samples):
+    texts = df["complaint_text"].tolist()
+    predictions = predictor.predict_batch(texts)
+    # Predictions carry enum-validated labels, so validate the CSV labels the same way
+    categories = [c if c in predictor.category_values else "Other" for c in df["category"]]
+    urgencies = [u if u in predictor.urgency_values else "Medium" for u in df["urgency"]]
+    return {
+        "predictions": predictions,
+        "category_accuracy": float(np.mean([p["category"] == c for p, c in zip(predictions, categories)])),
+        "urgency_accuracy": float(np.mean([p["urgency"] == u for p, u in zip(predictions, urgencies)])),
+        "single": measure_single_latency(predictor, texts[:latency_samples]),
+    }
+
+
+def early_exit_report(thresholds, csv_path=None, limit=None, holdout=0.2, epochs=30, latency_samples=100, seed=0):
+    """
+    Latency and accuracy of early-exit inference for every threshold against the full
+    model. The exit heads are trained on a random split of the dataset and everything
+    is measured on the held-out rest.
+    """
+    df = load_dataset(csv_path, limit).sample(frac=1.0, random_state=seed)
+    split = int(len(df) * (1.0 - holdout))
+    train, test = df.iloc[:split], df.iloc[split:]
+    print(f"Training exit heads on {len(train)} complaints, evaluating on {len(test)}")
+
+    full = ModelPredictor(precision="fp32")
+    heads = train_exit_heads(full, train["complaint_text"].tolist(), epochs=epochs)
+    baseline = evaluate(full, test, latency_samples)
+    model_version = full.model_version
+    del full
+
+    with tempfile.TemporaryDirectory() as tmp:
+        heads_path = os.path.join(tmp, "early_exit.pt")
+        save_exit_heads(heads, heads_path, model_version)
+        predictor = EarlyExitPredictor(precision="fp32", heads_path=heads_path)
+
+    report = {
+        "full_model": {
+            "category_accuracy": baseline["category_accuracy"],
+            "urgency_accuracy": baseline["urgency_accuracy"],
+            "single": baseline["single"],
+        },
+        "thresholds": [],
+    }
+    for threshold in thresholds:
+        predictor.threshold = threshold
+        result = evaluate(predictor, test, latency_samples)
+        exit_layers = [p["exit_layer"] for p in result["predictions"]]
+        report["thresholds"].append({
+            "threshold": threshold,
+            "mean_exit_layer": float(np.mean(exit_layers)),
+            "exits_per_layer": {
+                int(layer): int(count) for layer, count in zip(*np.unique(exit_layers, return_counts=True))
+            },
+            "category_accuracy": result["category_accuracy"],
+            "urgency_accuracy": result["urgency_accuracy"],
+            "category_agreement": float(np.mean([
+                p["category"] == b["category"] for p, b in zip(result["predictions"], baseline["predictions"])
+            ])),
+            "urgency_agreement": float(np.mean([
+                p["urgency"] == b["urgency"] for p, b in zip(result["predictions"], baseline["predictions"])
+            ])),
+            "single": result["single"],
+        })
+
+    print(
+        f"\nFull model ({predictor.num_layers} layers): category {baseline['category_accuracy']:.2%}, "
+        f"urgency {baseline['urgency_accuracy']:.2%}, p50 {baseline['single']['p50_ms']:.2f} ms"
+    )
+    print(f"{'threshold':>10}{'layer':>7}{'cat acc':>9}{'urg acc':>9}{'cat agr':>9}{'urg agr':>9}{'p50 ms':>9}{'p95 ms':>9}")
+    for row in report["thresholds"]:
+        print(
+            f"{row['threshold']:>10.2f}{row['mean_exit_layer']:>7.2f}"
+            f"{row['category_accuracy']:>9.2%}{row['urgency_accuracy']:>9.2%}"
+            f"{row['category_agreement']:>9.2%}{row['urgency_agreement']:>9.2%}"
+            f"{row['single']['p50_ms']:>9.2f}{row['single']['p95_ms']:>9.2f}"
+        )
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure early-exit inference against the full model")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.5, 0.7, 0.8, 0.9, 0.95, 0.99])
+    parser.add_argument("--csv", default=None, help="Labelled complaints CSV (defaults to data/complaints.csv)")
+    parser.add_argument("--limit", type=int, default=None, help="Only use the first N complaints")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Fraction of complaints held out for evaluation")
+    parser.add_argument("--epochs", type=int, default=30, help="Training epochs for the exit heads")
+    parser.add_argument("--latency-samples", type=int, default=100, help="Complaints used for single-request latency")
+    parser.add_argument("--output", default=None, help="Also write the report as JSON to this path")
+    args = parser.parse_args()
+
+    report = early_exit_report(
+        args.thresholds, args.csv, args.limit, args.holdout, args.epochs, args.latency_samples
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
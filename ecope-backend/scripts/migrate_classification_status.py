@@ -0,0 +1,49 @@
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+
+from app.db.database import engine
+
+
+def add_classification_status():
+    """Add complaints.classification_status to a database created before it existed"""
+    columns = {column["name"] for column in inspect(engine).get_columns("complaints")}
+    if "classification_status" in columns:
+        print("complaints.classification_status already exists")
+        return
+
+    with engine.begin() as connection:
+        # Existing complaints were classified synchronously
+        connection.execute(text(
+            "ALTER TABLE complaints ADD COLUMN classification_status VARCHAR(20) NOT NULL DEFAULT 'completed'"
+        ))
+        connection.execute(text(
+            "CREATE INDEX ix_complaints_classification_status ON complaints (classification_status)"
+        ))
+    print("Added complaints.classification_status")
+
+
+def add_classification_claims():
+    """Add the claim columns of the background classifier to complaints"""
+    columns = {column["name"] for column in inspect(engine).get_columns("complaints")}
+    if "classification_attempts" in columns and "classification_claimed_at" in columns:
+        print("complaints.classification_attempts and classification_claimed_at already exist")
+        return
+
+    with engine.begin() as connection:
+        if "classification_attempts" not in columns:
+            connection.execute(text(
+                "ALTER TABLE complaints ADD COLUMN classification_attempts INTEGER NOT NULL DEFAULT 0"
+            ))
+        if "classification_claimed_at" not in columns:
+            connection.execute(text("ALTER TABLE complaints ADD COLUMN classification_claimed_at TIMESTAMP NULL"))
+    print("Added complaints.classification_attempts and classification_claimed_at")
+
+
+if __name__ == "__main__":
+    add_classification_status()
+    add_classification_claims()
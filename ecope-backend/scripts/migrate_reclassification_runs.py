@@ -0,0 +1,32 @@
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+
+from app.db.database import engine
+
+
+def add_run_claim_columns():
+    """Add reclassification_runs.skipped and heartbeat_at to a database created before they existed"""
+    inspector = inspect(engine)
+    if not inspector.has_table("reclassification_runs"):
+        print("reclassification_runs does not exist yet; it is created with every column on startup")
+        return
+    columns = {column["name"] for column in inspector.get_columns("reclassification_runs")}
+    if "skipped" in columns and "heartbeat_at" in columns:
+        print("reclassification_runs.skipped and heartbeat_at already exist")
+        return
+
+    with engine.begin() as connection:
+        if "skipped" not in columns:
+            connection.execute(text("ALTER TABLE reclassification_runs ADD COLUMN skipped INTEGER NOT NULL DEFAULT 0"))
+        if "heartbeat_at" not in columns:
+            connection.execute(text("ALTER TABLE reclassification_runs ADD COLUMN heartbeat_at TIMESTAMP NULL"))
+    print("Added reclassification_runs.skipped and heartbeat_at")
+
+
+if __name__ == "__main__":
+    add_run_claim_columns()
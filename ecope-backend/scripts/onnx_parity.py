@@ -0,0 +1,69 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ml.evaluation import (
+    load_dataset,
+    predict_probabilities,
+    measure_single_latency,
+    measure_throughput,
+)
+from app.ml.model import ModelPredictor
+from app.ml.onnx_engine import OnnxModelPredictor
+
+
+def check_parity(csv_path=None, limit=None, atol=1e-4, latency_samples=100, batch_size=32):
+    """
+    Compare the ONNX Runtime engine against eager PyTorch on the bundled complaints.
+    Returns True when every probability matches within atol.
+    """
+    df = load_dataset(csv_path, limit)
+    texts = df["complaint_text"].tolist()
+    print(f"Comparing engines on {len(texts)} complaints")
+
+    torch_predictor = ModelPredictor()
+    onnx_predictor = OnnxModelPredictor()
+
+    torch_cat, torch_urg = predict_probabilities(torch_predictor, texts, batch_size)
+    onnx_cat, onnx_urg = predict_probabilities(onnx_predictor, texts, batch_size)
+
+    max_diff_cat = float(np.abs(torch_cat - onnx_cat).max())
+    max_diff_urg = float(np.abs(torch_urg - onnx_urg).max())
+    agree_cat = float((torch_cat.argmax(1) == onnx_cat.argmax(1)).mean())
+    agree_urg = float((torch_urg.argmax(1) == onnx_urg.argmax(1)).mean())
+
+    print("\nParity")
+    print(f"  max |p_torch - p_onnx| category: {max_diff_cat:.2e}, urgency: {max_diff_urg:.2e}")
+    print(f"  label agreement        category: {agree_cat:.2%}, urgency: {agree_urg:.2%}")
+
+    print("\nLatency")
+    sample = texts[:latency_samples]
+    for name, predictor in (("torch", torch_predictor), ("onnx", onnx_predictor)):
+        single = measure_single_latency(predictor, sample)
+        batched = measure_throughput(predictor, texts, batch_size)
+        print(
+            f"  {name:5s} single p50 {single['p50_ms']:7.2f} ms  p95 {single['p95_ms']:7.2f} ms  "
+            f"batch={batch_size} {batched['texts_per_second']:8.1f} texts/s"
+        )
+
+    ok = max_diff_cat <= atol and max_diff_urg <= atol
+    print("\nPARITY OK" if ok else f"\nPARITY FAILED (atol={atol})")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check ONNX Runtime parity and latency against PyTorch")
+    parser.add_argument("--csv", default=None, help="Labelled complaints CSV (defaults to data/complaints.csv)")
+    parser.add_argument("--limit", type=int, default=None, help="Only use the first N complaints")
+    parser.add_argument("--atol", type=float, default=1e-4, help="Allowed absolute probability difference")
+    parser.add_argument("--latency-samples", type=int, default=100, help="Complaints used for single-request latency")
+    parser.add_argument("--batch-size", type=int, default=32, help="Batch size for throughput")
+    args = parser.parse_args()
+
+    ok = check_parity(args.csv, args.limit, args.atol, args.latency_samples, args.batch_size)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,94 @@
+import argparse
+import io
+import json
+import os
+import sys
+
+import numpy as np
+import torch
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ml.evaluation import (
+    load_dataset,
+    predict_probabilities,
+    measure_single_latency,
+    measure_throughput,
+)
+from app.ml.model import ModelPredictor, PRECISIONS
+
+
+def model_size_mb(model):
+    """Serialized size of the model weights, including packed int8 parameters"""
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell() / (1024 * 1024)
+
+
+def precision_report(precisions, csv_path=None, limit=None, latency_samples=100, batch_size=32):
+    """
+    Accuracy and latency of every inference precision against the fp32 checkpoint
+    on the bundled complaints dataset.
+    """
+    df = load_dataset(csv_path, limit)
+    texts = df["complaint_text"].tolist()
+    print(f"Evaluating {', '.join(precisions)} on {len(texts)} complaints")
+
+    reference = None
+    report = []
+    for precision in ["fp32"] + [p for p in precisions if p != "fp32"]:
+        predictor = ModelPredictor(precision=precision)
+        category_probs, urgency_probs = predict_probabilities(predictor, texts, batch_size)
+        categories = np.array(predictor.category_classes)[category_probs.argmax(1)]
+        urgencies = np.array(predictor.urgency_classes)[urgency_probs.argmax(1)]
+        if reference is None:
+            reference = (category_probs, urgency_probs)
+
+        row = {
+            "precision": precision,
+            "model_size_mb": model_size_mb(predictor.model),
+            "category_accuracy": float((categories == df["category"].to_numpy()).mean()),
+            "urgency_accuracy": float((urgencies == df["urgency"].to_numpy()).mean()),
+            "category_agreement_with_fp32": float((category_probs.argmax(1) == reference[0].argmax(1)).mean()),
+            "urgency_agreement_with_fp32": float((urgency_probs.argmax(1) == reference[1].argmax(1)).mean()),
+            "max_prob_diff_vs_fp32": float(max(
+                np.abs(category_probs - reference[0]).max(),
+                np.abs(urgency_probs - reference[1]).max()
+            )),
+            "single": measure_single_latency(predictor, texts[:latency_samples]),
+            "batched": measure_throughput(predictor, texts, batch_size),
+        }
+        report.append(row)
+        del predictor
+
+    print(
+        f"\n{'precision':<14}{'size MB':>9}{'cat acc':>9}{'urg acc':>9}"
+        f"{'cat agr':>9}{'urg agr':>9}{'p50 ms':>9}{'p95 ms':>9}{'texts/s':>9}"
+    )
+    for row in report:
+        print(
+            f"{row['precision']:<14}{row['model_size_mb']:>9.1f}"
+            f"{row['category_accuracy']:>9.2%}{row['urgency_accuracy']:>9.2%}"
+            f"{row['category_agreement_with_fp32']:>9.2%}{row['urgency_agreement_with_fp32']:>9.2%}"
+            f"{row['single']['p50_ms']:>9.2f}{row['single']['p95_ms']:>9.2f}"
+            f"{row['batched']['texts_per_second']:>9.1f}"
+        )
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare MODEL_PRECISION modes against the fp32 checkpoint")
+    parser.add_argument("--precisions", nargs="+", default=list(PRECISIONS), choices=PRECISIONS)
+    parser.add_argument("--csv", default=None, help="Labelled complaints CSV (defaults to data/complaints.csv)")
+    parser.add_argument("--limit", type=int, default=None, help="Only use the first N complaints")
+    parser.add_argument("--latency-samples", type=int, default=100, help="Complaints used for single-request latency")
+    parser.add_argument("--batch-size", type=int, default=32, help="Batch size for accuracy and throughput")
+    parser.add_argument("--output", default=None, help="Also write the report as JSON to this path")
+    args = parser.parse_args()
+
+    report = precision_report(args.precisions, args.csv, args.limit, args.latency_samples, args.batch_size)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
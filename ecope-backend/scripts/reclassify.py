@@ -0,0 +1,32 @@
+import argparse
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.db.database import Base, SessionLocal, engine
+from app.ml.model import build_local_predictor
+from app.services.reclassification_service import ReclassificationService
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Relabel complaints classified by an older model version; rerun to resume an interrupted job"
+    )
+    parser.add_argument("--batch-size", type=int, default=settings.RECLASSIFY_BATCH_SIZE)
+    args = parser.parse_args()
+
+    # Make sure the checkpoint and model output tables exist
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        result = ReclassificationService.run(db, predictor=build_local_predictor(), batch_size=args.batch_size)
+        print(
+            f"Run {result['id']} {result['status']}: {result['updated']} complaints relabelled, "
+            f"{result['processed']} scanned at {result['rows_per_second']:.1f} rows/s"
+        )
+    finally:
+        db.close()
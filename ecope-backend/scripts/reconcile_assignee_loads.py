@@ -0,0 +1,40 @@
+import argparse
+import os
+import sys
+import time
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.database import Base, SessionLocal, engine
+from app.services.assignment_service import AssignmentService
+
+
+def reconcile():
+    db = SessionLocal()
+    try:
+        result = AssignmentService.reconcile_loads(db)
+    finally:
+        db.close()
+    for assignee, drift in result["corrected"].items():
+        print(f"Corrected {assignee}: stored {drift['stored']}, actual {drift['actual']}")
+    print(f"Checked {result['assignees']} assignees, corrected {len(result['corrected'])}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Recompute the open-complaint counters used by least-loaded assignment and fix any drift"
+    )
+    parser.add_argument(
+        "--interval", type=float, default=None,
+        help="Keep running and reconcile every INTERVAL seconds (default: once)"
+    )
+    args = parser.parse_args()
+
+    # Make sure the counter table exists
+    Base.metadata.create_all(bind=engine)
+
+    reconcile()
+    while args.interval:
+        time.sleep(args.interval)
+        reconcile()
@@ -0,0 +1,116 @@
+import argparse
+import json
+import os
+import random
+import sys
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.ml.embeddings import unpack_embedding
+from app.ml.head_training import is_improvement, save_retrained_checkpoint, train_heads
+from app.ml.model import ModelPredictor
+from app.models.domain.complaint import ComplaintInference, LabelCorrection
+
+
+def load_examples(db, predictor, replay_ratio=4, seed=0):
+    """
+    Corrected complaints as (embedding, class index) pairs per task, plus a sample of
+    uncorrected complaints with their stored probabilities for replay. Only embeddings
+    produced by this model's encoder are used.
+    """
+    versions = predictor.embedding_versions
+    category_index = {label: i for i, label in enumerate(predictor.category_classes)}
+    urgency_index = {label: i for i, label in enumerate(predictor.urgency_classes)}
+
+    rows = db.query(LabelCorrection, ComplaintInference).join(
+        ComplaintInference, ComplaintInference.complaint_id == LabelCorrection.complaint_id
+    ).filter(
+        ComplaintInference.model_version.in_(versions),
+        ComplaintInference.embedding.isnot(None)
+    ).all()
+
+    corrections = {"category": ([], []), "urgency": ([], [])}
+    skipped = 0
+    for correction, inference in rows:
+        embedding = unpack_embedding(inference.embedding)
+        for task, label, index in (
+            ("category", correction.category, category_index),
+            ("urgency", correction.urgency, urgency_index),
+        ):
+            if label is None:
+                continue
+            if label.value not in index:
+                # The checkpoint has no output for this label
+                skipped += 1
+                continue
+            corrections[task][0].append(embedding)
+            corrections[task][1].append(index[label.value])
+
+    corrected_ids = [correction.complaint_id for correction, _ in rows]
+    candidate_ids = [
+        complaint_id for (complaint_id,) in db.query(ComplaintInference.complaint_id).filter(
+            ComplaintInference.model_version.in_(versions),
+            ComplaintInference.embedding.isnot(None),
+            ComplaintInference.category_probs.isnot(None),
+            ComplaintInference.complaint_id.notin_(corrected_ids or [0])
+        )
+    ]
+    random.Random(seed).shuffle(candidate_ids)
+    replay_ids = candidate_ids[:replay_ratio * max(len(rows), 1)]
+
+    replay = ([], [], [])
+    for inference in db.query(ComplaintInference).filter(ComplaintInference.complaint_id.in_(replay_ids)):
+        replay[0].append(unpack_embedding(inference.embedding))
+        replay[1].append([inference.category_probs.get(label, 0.0) for label in predictor.category_classes])
+        replay[2].append([inference.urgency_probs.get(label, 0.0) for label in predictor.urgency_classes])
+
+    return corrections, replay, skipped
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Retrain head_cat and head_urg on staff corrections using stored embeddings"
+    )
+    parser.add_argument("--min-corrections", type=int, default=20, help="Do nothing below this many corrections")
+    parser.add_argument("--replay-ratio", type=int, default=4, help="Uncorrected complaints replayed per correction")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Fraction held out for validation")
+    parser.add_argument("--epochs", type=int, default=200)
+    parser.add_argument("--lr", type=float, default=1e-3)
+    parser.add_argument("--output-dir", default=settings.MODEL_CHECKPOINT_DIR)
+    parser.add_argument("--force", action="store_true", help="Write the checkpoint even if the holdout gets worse")
+    args = parser.parse_args()
+
+    predictor = ModelPredictor(precision="fp32")
+    db = SessionLocal()
+    try:
+        corrections, replay, skipped = load_examples(db, predictor, args.replay_ratio)
+    finally:
+        db.close()
+
+    n_corrections = len(corrections["category"][1]) + len(corrections["urgency"][1])
+    print(
+        f"{len(corrections['category'][1])} category and {len(corrections['urgency'][1])} urgency corrections, "
+        f"{len(replay[0])} replayed complaints ({skipped} corrections to labels the model does not have)"
+    )
+    if n_corrections < args.min_corrections:
+        print(f"Fewer than {args.min_corrections} corrections, nothing to do")
+        sys.exit(0)
+
+    corrections = {task: (np.array(x), np.array(y)) for task, (x, y) in corrections.items()}
+    head_cat, head_urg, report = train_heads(
+        predictor.model, corrections, replay, holdout=args.holdout, epochs=args.epochs, lr=args.lr
+    )
+    print(json.dumps(report, indent=2))
+
+    if not is_improvement(report) and not args.force:
+        print("New heads are less accurate on the holdout, checkpoint not written (use --force to override)")
+        sys.exit(1)
+    path = save_retrained_checkpoint(
+        predictor, head_cat, head_urg, args.output_dir, metadata={"retraining": report}
+    )
+    print(f"Load it into a running server with POST /api/v1/model/heads {{\"checkpoint\": \"{os.path.basename(path)}\"}}")